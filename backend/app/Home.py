@@ -1,11 +1,22 @@
+import os
+
 import streamlit as st
 
+from examples import EXAMPLES
+
 st.set_page_config(
     page_title="Comparador Semântico",
     page_icon="🧠",
     layout="wide",
 )
 
+# STS_PRELOAD_MODELS="Multilingual (final)" carrega/aquece o modelo em segundo plano
+# enquanto a Home é exibida (sem a variável, a Home não importa o core)
+if os.environ.get("STS_PRELOAD_MODELS"):
+    from model_registry import preload_from_env
+
+    preload_from_env()
+
 st.title("🧠 Comparador Semântico de Textos (PT-BR)")
 st.write(
     "Aplicação que compara **dois textos** usando **embeddings** e calcula a **similaridade semântica** "
@@ -20,74 +31,12 @@ st.divider()
 # =============================
 st.subheader("🚀 Exemplos rápidos para teste")
 
-examples = [
-    # PARÁFRASE FORTE
-    (
-        "Paráfrase forte",
-        "O aluno estudou muito para a prova final.",
-        "O estudante se dedicou bastante para o exame final."
-    ),
-    (
-        "Paráfrase forte",
-        "O sistema apresentou falhas após a atualização.",
-        "Depois da atualização, o software começou a apresentar erros."
-    ),
-
-    # PARÁFRASE MÉDIA
-    (
-        "Paráfrase média",
-        "A empresa reduziu custos para aumentar o lucro.",
-        "A organização diminuiu despesas para lucrar mais."
-    ),
-    (
-        "Paráfrase média",
-        "O servidor caiu durante o pico de acesso.",
-        "Em horário de maior tráfego, o sistema ficou fora do ar."
-    ),
-
-    # MESMO TEMA
-    (
-        "Mesmo tema",
-        "Redes neurais são usadas para reconhecimento de imagens.",
-        "Algoritmos de aprendizado de máquina analisam dados visuais."
-    ),
-    (
-        "Mesmo tema",
-        "Testes automatizados ajudam a manter a qualidade do software.",
-        "Revisar código é importante antes da entrega."
-    ),
-
-    # CONTRADITÓRIO
-    (
-        "Contraditório",
-        "O projeto foi entregue antes do prazo.",
-        "O projeto atrasou e não foi concluído no tempo previsto."
-    ),
-    (
-        "Contraditório",
-        "A internet está muito rápida hoje.",
-        "A conexão está extremamente lenta hoje."
-    ),
-
-    # DIFERENTES
-    (
-        "Diferentes",
-        "O banco de dados utiliza chaves primárias.",
-        "Gosto de viajar para a praia nas férias."
-    ),
-    (
-        "Diferentes",
-        "O algoritmo utiliza busca em largura.",
-        "Meu cachorro dorme no sofá."
-    ),
-]
-
 # guarda exemplos no session_state pra página Comparar
 if "example_a" not in st.session_state:
     st.session_state["example_a"] = ""
     st.session_state["example_b"] = ""
 
-for i, (cat, a, b) in enumerate(examples, start=1):
+for i, (cat, a, b) in enumerate(EXAMPLES, start=1):
     with st.container():
         col1, col2, col3 = st.columns([1, 4, 1])
 
@@ -0,0 +1,207 @@
+from __future__ import annotations
+
+import csv
+import itertools
+import json
+import math
+import os
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import TYPE_CHECKING, Iterable, Optional, Tuple
+
+import numpy as np
+
+from core import EmbeddingCache, embedding_dim, model_key
+from embedding_store import EmbeddingStore
+
+if TYPE_CHECKING:
+    from sentence_transformers import SentenceTransformer
+
+# Similaridade N x M entre duas coleções sem materializar a matriz inteira:
+#   1) cada coleção vira um EmbeddingStore (memmap) dentro de out_dir;
+#   2) a matriz é calculada em blocos (linhas x colunas) dimensionados pelo
+#      orçamento de memória e gravada incrementalmente:
+#        - "dense":  scores.f16 (float16, N x M, row-major, lido via memmap)
+#        - "sparse": pairs.csv com (i, j, score) apenas acima do limiar
+#   3) progress.json registra as faixas de linhas concluídas; ao reexecutar com
+#      os mesmos parâmetros, o cálculo continua de onde parou.
+MODES = ("dense", "sparse")
+# modo sparse: o bloco é varrido em faixas de até SPARSE_CHUNK_CELLS células, então
+# com limiar baixo os acertos em memória (índices e linhas do CSV) ficam limitados
+# por faixa e não crescem com o bloco inteiro
+SPARSE_CHUNK_CELLS = 1 << 16
+
+
+@dataclass(frozen=True)
+class AllPairsPlan:
+    model_name: str
+    n_rows: int
+    n_cols: int
+    dim: int
+    mode: str
+    threshold: float
+    tile_rows: int
+    tile_cols: int
+
+
+def plan_tiles(n_rows: int, n_cols: int, dim: int, memory_budget_mb: float) -> Tuple[int, int]:
+    # por bloco (em float32): scores r*c + vetores das linhas e colunas (r + c)*dim
+    budget = max(0.01, memory_budget_mb) * 1024 * 1024 / 4
+    side = max(1, int(math.sqrt(dim * dim + budget) - dim))
+    tile_cols = max(1, min(n_cols, side))
+    # se há poucas colunas, o orçamento que sobra vai para as linhas
+    tile_rows = max(1, min(n_rows, int((budget - tile_cols * dim) // (tile_cols + dim))))
+    return tile_rows, tile_cols
+
+
+def embed_collection(
+    store_dir: Path,
+    model_label: str,
+    model: SentenceTransformer,
+    texts: Iterable[str],
+    batch_size: int = 256,
+    cache: Optional[EmbeddingCache] = None,
+) -> EmbeddingStore:
+    # retoma um store parcial: os textos já gravados são pulados
+    if (store_dir / "meta.json").exists():
+        store = EmbeddingStore.open(store_dir)
+        store.check_model(model)
+    else:
+        store = EmbeddingStore.create(store_dir, model_label, embedding_dim(model), key=model_key(model))
+    store.add_texts(model, itertools.islice(texts, len(store), None), batch_size=batch_size, cache=cache)
+    return store
+
+
+def _load_progress(path: Path) -> dict:
+    if not path.exists():
+        return {"rows_done": 0, "bytes": 0}
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _save_progress(path: Path, progress: dict) -> None:
+    tmp = path.with_suffix(".tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(progress, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+def all_pairs(
+    model_label: str,
+    model: SentenceTransformer,
+    texts_a: Iterable[str],
+    texts_b: Iterable[str],
+    out_dir: Path,
+    mode: str = "sparse",
+    threshold: float = 0.7,
+    memory_budget_mb: float = 256,
+    batch_size: int = 256,
+    cache: Optional[EmbeddingCache] = None,
+) -> AllPairsPlan:
+    if mode not in MODES:
+        raise ValueError(f"Modo inválido: {mode} (use {', '.join(MODES)})")
+
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    store_a = embed_collection(out_dir / "a", model_label, model, texts_a, batch_size, cache)
+    store_b = embed_collection(out_dir / "b", model_label, model, texts_b, batch_size, cache)
+
+    n_rows, n_cols, dim = len(store_a), len(store_b), store_a.meta.dim
+    tile_rows, tile_cols = plan_tiles(n_rows, n_cols, dim, memory_budget_mb)
+    plan = AllPairsPlan(
+        model_name=store_a.meta.model_name,
+        n_rows=n_rows,
+        n_cols=n_cols,
+        dim=dim,
+        mode=mode,
+        threshold=threshold if mode == "sparse" else 0.0,
+        tile_rows=tile_rows,
+        tile_cols=tile_cols,
+    )
+
+    plan_path = out_dir / "plan.json"
+    progress_path = out_dir / "progress.json"
+    if plan_path.exists():
+        with open(plan_path, "r", encoding="utf-8") as f:
+            previous = json.load(f)
+        # retomada só com os mesmos dados/parâmetros; o tamanho do bloco pode mudar
+        same = {k: v for k, v in previous.items() if k not in ("tile_rows", "tile_cols")}
+        if same != {k: v for k, v in asdict(plan).items() if k not in ("tile_rows", "tile_cols")}:
+            raise ValueError(f"{out_dir} contém outra execução; use outra pasta de saída.")
+    else:
+        with open(plan_path, "w", encoding="utf-8") as f:
+            json.dump(asdict(plan), f, indent=2)
+
+    progress = _load_progress(progress_path)
+    if mode == "dense":
+        _run_dense(store_a, store_b, out_dir / "scores.f16", plan, progress, progress_path)
+    else:
+        _run_sparse(store_a, store_b, out_dir / "pairs.csv", plan, progress, progress_path)
+    return plan
+
+
+def _column_tiles(store_b: EmbeddingStore, tile_cols: int):
+    for c0 in range(0, len(store_b), tile_cols):
+        yield c0, np.asarray(store_b.vectors[c0:c0 + tile_cols], dtype=np.float32)
+
+
+def _run_dense(
+    store_a: EmbeddingStore,
+    store_b: EmbeddingStore,
+    path: Path,
+    plan: AllPairsPlan,
+    progress: dict,
+    progress_path: Path,
+) -> None:
+    shape = (plan.n_rows, plan.n_cols)
+    if plan.n_rows == 0 or plan.n_cols == 0:
+        path.touch()
+        return
+    mode = "r+" if path.exists() else "w+"
+    scores = np.memmap(path, dtype=np.float16, mode=mode, shape=shape)
+
+    for r0 in range(progress["rows_done"], plan.n_rows, plan.tile_rows):
+        rows = np.asarray(store_a.vectors[r0:r0 + plan.tile_rows], dtype=np.float32)
+        for c0, cols in _column_tiles(store_b, plan.tile_cols):
+            scores[r0:r0 + rows.shape[0], c0:c0 + cols.shape[0]] = rows @ cols.T
+        scores.flush()
+        progress["rows_done"] = r0 + rows.shape[0]
+        _save_progress(progress_path, progress)
+    del scores
+
+
+def _run_sparse(
+    store_a: EmbeddingStore,
+    store_b: EmbeddingStore,
+    path: Path,
+    plan: AllPairsPlan,
+    progress: dict,
+    progress_path: Path,
+) -> None:
+    # descarta linhas escritas depois do último checkpoint
+    if path.exists():
+        os.truncate(path, progress["bytes"])
+    with open(path, "a", newline="", encoding="utf-8") as f:
+        w = csv.writer(f)
+        if progress["bytes"] == 0:
+            w.writerow(["i", "j", "score"])
+
+        for r0 in range(progress["rows_done"], plan.n_rows, plan.tile_rows):
+            rows = np.asarray(store_a.vectors[r0:r0 + plan.tile_rows], dtype=np.float32)
+            for c0, cols in _column_tiles(store_b, plan.tile_cols):
+                tile = rows @ cols.T
+                step = max(1, SPARSE_CHUNK_CELLS // tile.shape[1])
+                for t0 in range(0, tile.shape[0], step):
+                    band = tile[t0:t0 + step]
+                    ii, jj = np.nonzero(band >= plan.threshold)
+                    w.writerows(
+                        (r0 + t0 + i, c0 + j, f"{s:.6f}")
+                        for i, j, s in zip(ii.tolist(), jj.tolist(), band[ii, jj].tolist())
+                    )
+            f.flush()
+            os.fsync(f.fileno())
+            progress["rows_done"] = r0 + rows.shape[0]
+            progress["bytes"] = os.fstat(f.fileno()).st_size
+            _save_progress(progress_path, progress)
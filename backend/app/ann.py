@@ -0,0 +1,244 @@
+from __future__ import annotations
+
+import json
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Optional, Tuple
+
+import numpy as np
+
+from embedding_store import EmbeddingStore
+from search import top_k_scores
+
+# Índice IVF (inverted file) para busca aproximada:
+#   - k-means grosso particiona o corpus em `nlist` listas;
+#   - na consulta, só as `nprobe` listas mais próximas são varridas;
+#   - "mais próximo" é distância euclidiana, como no treino do k-means, nas duas
+#     pontas (atribuição e sondagem): ||x - c||² = ||x||² - 2<x, c> + ||c||², e com
+#     ||x|| fixo basta maximizar <x, c> - ||c||²/2;
+#   - opcionalmente, os resíduos (vetor - centróide) são comprimidos com
+#     product quantization (PQ): `m` subespaços x 256 centróides = m bytes/vetor.
+# Com PQ, os candidatos são pontuados por tabela (ADC) e os `rerank` melhores
+# são reavaliados com os vetores exatos do store.
+# 2: listas atribuídas por distância euclidiana (índices do formato 1 precisam de build-ann de novo)
+ANN_FORMAT = 2
+
+
+@dataclass(frozen=True)
+class IVFParams:
+    nlist: int = 1024
+    pq_m: int = 0  # 0 = sem PQ (listas com vetores completos via store)
+    pq_bits: int = 8
+    train_size: int = 100_000
+    seed: int = 42
+
+
+def _kmeans(data: np.ndarray, k: int, seed: int) -> np.ndarray:
+    # import tardio: consultas a um índice salvo não precisam do scikit-learn
+    from sklearn.cluster import MiniBatchKMeans
+
+    km = MiniBatchKMeans(
+        n_clusters=k,
+        random_state=seed,
+        batch_size=max(1024, 4 * k),
+        n_init=3,
+    )
+    km.fit(data)
+    return km.cluster_centers_.astype(np.float32)
+
+
+def _half_sq_norms(centroids: np.ndarray) -> np.ndarray:
+    return 0.5 * np.einsum("ij,ij->i", centroids, centroids)
+
+
+def _assign(vectors: np.ndarray, centroids: np.ndarray, block_rows: int = 65_536) -> np.ndarray:
+    # centróide mais próximo em distância euclidiana (os centróides do k-means não
+    # têm norma 1: só o produto interno favoreceria os de norma maior)
+    half_norms = _half_sq_norms(centroids)
+    out = np.empty(vectors.shape[0], dtype=np.int64)
+    for start in range(0, vectors.shape[0], block_rows):
+        block = np.asarray(vectors[start:start + block_rows], dtype=np.float32)
+        out[start:start + block.shape[0]] = np.argmax(block @ centroids.T - half_norms, axis=1)
+    return out
+
+
+class IVFIndex:
+    def __init__(
+        self,
+        store: EmbeddingStore,
+        params: IVFParams,
+        centroids: np.ndarray,
+        list_offsets: np.ndarray,
+        list_ids: np.ndarray,
+        pq_codebooks: Optional[np.ndarray] = None,
+        pq_codes: Optional[np.ndarray] = None,
+    ):
+        self.store = store
+        self.params = params
+        self.centroids = centroids
+        self._half_norms = _half_sq_norms(centroids)
+        # listas invertidas em formato CSR: ids da lista c em list_ids[off[c]:off[c+1]]
+        self.list_offsets = list_offsets
+        self.list_ids = list_ids
+        self.pq_codebooks = pq_codebooks  # (m, 2**bits, dim/m)
+        self.pq_codes = pq_codes  # (n, m) alinhado com list_ids
+
+    @property
+    def nlist(self) -> int:
+        return self.centroids.shape[0]
+
+    @classmethod
+    def build(cls, store: EmbeddingStore, params: IVFParams = IVFParams()) -> "IVFIndex":
+        n, dim = store.vectors.shape
+        if n == 0:
+            raise ValueError("Store vazio: nada para indexar.")
+        if params.pq_m and dim % params.pq_m:
+            raise ValueError(f"pq_m={params.pq_m} precisa dividir a dimensão {dim}.")
+
+        rng = np.random.default_rng(params.seed)
+        sample_idx = np.sort(rng.choice(n, size=min(n, params.train_size), replace=False))
+        sample = np.asarray(store.vectors[sample_idx], dtype=np.float32)
+
+        nlist = min(params.nlist, sample.shape[0])
+        centroids = _kmeans(sample, nlist, params.seed)
+        assign = _assign(store.vectors, centroids)
+
+        order = np.argsort(assign, kind="stable")
+        counts = np.bincount(assign, minlength=nlist)
+        list_offsets = np.concatenate([[0], np.cumsum(counts)]).astype(np.int64)
+        list_ids = order.astype(np.int64)
+
+        codebooks = codes = None
+        if params.pq_m:
+            codebooks, codes = cls._train_pq(store, centroids, assign, list_ids, sample_idx, params)
+
+        return cls(store, params, centroids, list_offsets, list_ids, codebooks, codes)
+
+    @staticmethod
+    def _train_pq(
+        store: EmbeddingStore,
+        centroids: np.ndarray,
+        assign: np.ndarray,
+        list_ids: np.ndarray,
+        sample_idx: np.ndarray,
+        params: IVFParams,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        m, ksub = params.pq_m, 2 ** params.pq_bits
+        dim = centroids.shape[1]
+        dsub = dim // m
+
+        residuals = np.asarray(store.vectors[sample_idx], dtype=np.float32) - centroids[assign[sample_idx]]
+        codebooks = np.stack([
+            _kmeans(residuals[:, j * dsub:(j + 1) * dsub], min(ksub, residuals.shape[0]), params.seed + j)
+            for j in range(m)
+        ])
+
+        codes = np.empty((list_ids.shape[0], m), dtype=np.uint8 if ksub <= 256 else np.uint16)
+        for start in range(0, list_ids.shape[0], 65_536):
+            ids = list_ids[start:start + 65_536]
+            res = np.asarray(store.vectors[np.sort(ids)], dtype=np.float32)
+            # np.sort para leitura sequencial do memmap; reordena de volta para list_ids
+            res = res[np.argsort(np.argsort(ids))] - centroids[assign[ids]]
+            for j in range(m):
+                sub = res[:, j * dsub:(j + 1) * dsub]
+                dists = (
+                    (sub ** 2).sum(axis=1, keepdims=True)
+                    - 2 * sub @ codebooks[j].T
+                    + (codebooks[j] ** 2).sum(axis=1)
+                )
+                codes[start:start + ids.shape[0], j] = np.argmin(dists, axis=1)
+        return codebooks, codes
+
+    def search_vector(
+        self,
+        query: np.ndarray,
+        k: int = 10,
+        nprobe: int = 8,
+        rerank: int = 100,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        query = np.asarray(query, dtype=np.float32).ravel()
+        nprobe = max(1, min(nprobe, self.nlist))
+
+        coarse = self.centroids @ query
+        # sonda pelas mesmas distâncias da atribuição; `coarse` (<q, c>) segue no ADC
+        probe = np.argpartition(coarse - self._half_norms, -nprobe)[-nprobe:]
+        spans = [(self.list_offsets[c], self.list_offsets[c + 1]) for c in probe]
+        positions = np.concatenate([np.arange(a, b) for a, b in spans]) if spans else np.zeros(0, np.int64)
+        if positions.shape[0] == 0:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)
+
+        candidates = self.list_ids[positions]
+
+        if self.pq_codes is None:
+            # sem PQ: produto interno exato só nas listas sondadas
+            rows = np.sort(candidates)
+            idx, scores = top_k_scores(self.store.vectors[rows], query, k)
+            return rows[idx], scores
+
+        # ADC: <q, c + r> = <q, c> + sum_j <q_j, codebook_j[code_j]>
+        m, dsub = self.pq_codebooks.shape[0], self.pq_codebooks.shape[2]
+        tables = np.einsum("jkd,jd->jk", self.pq_codebooks, query.reshape(m, dsub))
+        codes = self.pq_codes[positions]
+        approx = tables[np.arange(m), codes].sum(axis=1)
+        list_of_pos = np.repeat(probe, [b - a for a, b in spans])
+        approx += coarse[list_of_pos]
+
+        shortlist = min(max(rerank, k), approx.shape[0])
+        top = np.argpartition(approx, -shortlist)[-shortlist:]
+        rows = np.sort(candidates[top])
+        idx, scores = top_k_scores(self.store.vectors[rows], query, k)
+        return rows[idx], scores
+
+    def save(self, path: Path) -> None:
+        path = Path(path)
+        path.mkdir(parents=True, exist_ok=True)
+        arrays = {
+            "centroids": self.centroids,
+            "list_offsets": self.list_offsets,
+            "list_ids": self.list_ids,
+        }
+        if self.pq_codes is not None:
+            arrays["pq_codebooks"] = self.pq_codebooks
+            arrays["pq_codes"] = self.pq_codes
+        np.savez(path / "ivf.npz", **arrays)
+        meta = {
+            "format": ANN_FORMAT,
+            "store": str(Path(self.store.path).resolve()),
+            "store_count": len(self.store),
+            "model_name": self.store.meta.model_name,
+            "model_key": self.store.meta.model_key,
+            "params": asdict(self.params),
+        }
+        with open(path / "ivf.json", "w", encoding="utf-8") as f:
+            json.dump(meta, f, ensure_ascii=False, indent=2)
+
+    @classmethod
+    def load(cls, path: Path, store: Optional[EmbeddingStore] = None) -> "IVFIndex":
+        path = Path(path)
+        with open(path / "ivf.json", "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        if meta.get("format") != ANN_FORMAT:
+            raise ValueError(
+                f"Formato de índice não suportado em {path}: {meta.get('format')}; reconstrua com build-ann."
+            )
+
+        store = store or EmbeddingStore.open(Path(meta["store"]))
+        # model_key = nome + backend (name#int8, name#onnx); índices sem ele são do torch
+        if store.meta.model_key != meta.get("model_key", meta["model_name"]):
+            raise ValueError("O índice foi construído com outro modelo (ou backend) que não o do store.")
+        if len(store) != meta["store_count"]:
+            # linhas novas no store ainda não estão nas listas invertidas
+            raise ValueError(
+                f"Store tem {len(store)} linhas, índice cobre {meta['store_count']}; reconstrua o índice."
+            )
+
+        with np.load(path / "ivf.npz") as data:
+            return cls(
+                store=store,
+                params=IVFParams(**meta["params"]),
+                centroids=data["centroids"],
+                list_offsets=data["list_offsets"],
+                list_ids=data["list_ids"],
+                pq_codebooks=data["pq_codebooks"] if "pq_codes" in data else None,
+                pq_codes=data["pq_codes"] if "pq_codes" in data else None,
+            )
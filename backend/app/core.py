@@ -1,13 +1,32 @@
 from __future__ import annotations
 
-import csv
+import atexit
+import gc
+import hashlib
+import os
+import sqlite3
+import sys
+import threading
+import time
+import unicodedata
+import weakref
+from collections import OrderedDict
 from dataclasses import dataclass
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, Tuple
+from typing import TYPE_CHECKING, Any, Dict, Iterable, List, Optional, Sequence, Tuple
 
+import numpy as np
 import pandas as pd
-from sentence_transformers import SentenceTransformer, util
+
+import metrics
+import profiling
+from file_cache import get_file_cache
+from history_store import HISTORY_COLUMNS, HistoryStore, HistoryWriter
+
+if TYPE_CHECKING:
+    # torch/transformers custam segundos para importar: só são carregados em load_model()
+    from sentence_transformers import SentenceTransformer
 
 
 @dataclass(frozen=True)
@@ -16,16 +35,19 @@ class AppPaths:
     data_dir: Path
     reports_dir: Path
     history_csv: Path
+    history_db: Path
     batch_csv: Path
+    embedding_cache_db: Path
+    stores_dir: Path
 
 
 def get_paths() -> AppPaths:
-    # base_dir = backend/
+    # base_dir = backend/; STS_DATA_DIR troca a pasta de dados (ex.: testes sem tocar em data/)
     base_dir = Path(__file__).resolve().parents[1]
-    data_dir = base_dir / "data"
+    data_dir = Path(os.environ.get("STS_DATA_DIR") or base_dir / "data")
     reports_dir = base_dir / "reports"
 
-    data_dir.mkdir(exist_ok=True)
+    data_dir.mkdir(parents=True, exist_ok=True)
     reports_dir.mkdir(exist_ok=True)
 
     return AppPaths(
@@ -33,7 +55,10 @@ def get_paths() -> AppPaths:
         data_dir=data_dir,
         reports_dir=reports_dir,
         history_csv=data_dir / "history.csv",
+        history_db=data_dir / "history.sqlite",
         batch_csv=data_dir / "results_multilingual_batch.csv",
+        embedding_cache_db=data_dir / "embedding_cache.sqlite",
+        stores_dir=data_dir / "stores",
     )
 
 
@@ -43,15 +68,408 @@ MODELS: Dict[str, str] = {
 }
 
 
-def load_model(model_label: str) -> SentenceTransformer:
+# Backends de inferência (todos expõem a mesma API de SentenceTransformer):
+#   torch -> float32 PyTorch (padrão)
+#   int8  -> camadas Linear quantizadas dinamicamente para int8 (CPU)
+#   onnx  -> grafo ONNX via ONNX Runtime (requer `pip install sentence-transformers[onnx]`)
+BACKENDS = ("torch", "int8", "onnx")
+
+MODEL_BACKENDS: Dict[str, str] = {
+    "Multilingual (final)": "torch",
+    "Baseline (comparação)": "torch",
+}
+
+_MODEL_KEYS: "weakref.WeakKeyDictionary[SentenceTransformer, str]" = weakref.WeakKeyDictionary()
+
+
+def load_model(model_label: str, backend: Optional[str] = None) -> SentenceTransformer:
+    from sentence_transformers import SentenceTransformer
+
+    model_name = MODELS[model_label]
+    backend = backend or MODEL_BACKENDS.get(model_label, "torch")
+
+    if backend == "torch":
+        model = SentenceTransformer(model_name)
+    elif backend == "int8":
+        import torch
+
+        model = torch.ao.quantization.quantize_dynamic(
+            SentenceTransformer(model_name, device="cpu"),
+            {torch.nn.Linear},
+            dtype=torch.qint8,
+        )
+    elif backend == "onnx":
+        model = SentenceTransformer(model_name, backend="onnx")
+    else:
+        raise ValueError(f"Backend desconhecido: {backend} (use {', '.join(BACKENDS)})")
+
+    _MODEL_KEYS[model] = cache_key(model_label, backend)
+    return model
+
+
+def cache_key(model_label: str, backend: Optional[str] = None) -> str:
+    # vetores de backends diferentes não são idênticos: a chave do cache os separa.
+    # Não carrega o modelo: dá para consultar o cache antes de decidir carregá-lo.
     model_name = MODELS[model_label]
-    return SentenceTransformer(model_name)
+    backend = backend or MODEL_BACKENDS.get(model_label, "torch")
+    return model_name if backend == "torch" else f"{model_name}#{backend}"
+
+
+def model_key(model: SentenceTransformer) -> Optional[str]:
+    # identifica os pesos que geraram um embedding; None = modelo desconhecido (sem cache)
+    return _MODEL_KEYS.get(model)
+
+
+def embedding_dim(model: SentenceTransformer) -> int:
+    # sentence-transformers renomeou o método nas versões 5.x mais recentes
+    getter = getattr(model, "get_embedding_dimension", None) or model.get_sentence_embedding_dimension
+    return int(getter() or 0)
+
+
+def normalize_text(text: str) -> str:
+    # espaços extras não mudam a tokenização, então não devem gerar entradas novas no cache
+    return " ".join(unicodedata.normalize("NFC", text).split())
+
+
+def text_hash(text: str) -> str:
+    return hashlib.sha1(normalize_text(text).encode("utf-8")).hexdigest()
+
+
+# Cache de embeddings em dois níveis: LRU em memória (limitado por bytes) + SQLite em disco.
+# A chave é (model_key, hash do texto normalizado): trocar de modelo nunca devolve vetores antigos.
+class EmbeddingCache:
 
+    def __init__(self, max_bytes: int = 64 * 1024 * 1024, disk_path: Optional[Path] = None):
+        self.max_bytes = max_bytes
+        self.disk_path = disk_path
+        self._mem: "OrderedDict[Tuple[str, str], np.ndarray]" = OrderedDict()
+        self._mem_bytes = 0
+        self._lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+        self.hits_memory = 0
+        self.hits_disk = 0
+        self.misses = 0
 
-def cosine_similarity(model: SentenceTransformer, text_a: str, text_b: str) -> float:
-    emb_a = model.encode(text_a, convert_to_tensor=True)
-    emb_b = model.encode(text_b, convert_to_tensor=True)
-    return float(util.cos_sim(emb_a, emb_b).item())
+        if disk_path is not None:
+            self._db = sqlite3.connect(str(disk_path), check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS embeddings ("
+                " model_key TEXT NOT NULL,"
+                " text_hash TEXT NOT NULL,"
+                " dim INTEGER NOT NULL,"
+                " vector BLOB NOT NULL,"
+                " PRIMARY KEY (model_key, text_hash)"
+                ") WITHOUT ROWID"
+            )
+            self._db.commit()
+
+    def _remember(self, key: Tuple[str, str], vec: np.ndarray) -> None:
+        old = self._mem.pop(key, None)
+        if old is not None:
+            self._mem_bytes -= old.nbytes
+        if vec.nbytes > self.max_bytes:
+            return
+        self._mem[key] = vec
+        self._mem_bytes += vec.nbytes
+        while self._mem_bytes > self.max_bytes:
+            _, evicted = self._mem.popitem(last=False)
+            self._mem_bytes -= evicted.nbytes
+
+    def get_many(self, model_key: str, texts: Sequence[str]) -> List[Optional[np.ndarray]]:
+        hashes = [text_hash(t) for t in texts]
+        found: List[Optional[np.ndarray]] = [None] * len(texts)
+
+        with self._lock:
+            pending: Dict[str, List[int]] = {}
+            for i, h in enumerate(hashes):
+                vec = self._mem.get((model_key, h))
+                if vec is not None:
+                    self._mem.move_to_end((model_key, h))
+                    found[i] = vec
+                    self.hits_memory += 1
+                else:
+                    pending.setdefault(h, []).append(i)
+
+            if pending and self._db is not None:
+                keys = list(pending)
+                for start in range(0, len(keys), 500):
+                    chunk = keys[start:start + 500]
+                    marks = ",".join("?" * len(chunk))
+                    rows = self._db.execute(
+                        f"SELECT text_hash, dim, vector FROM embeddings "
+                        f"WHERE model_key = ? AND text_hash IN ({marks})",
+                        [model_key, *chunk],
+                    ).fetchall()
+                    for h, dim, blob in rows:
+                        vec = np.frombuffer(blob, dtype=np.float32)
+                        if vec.shape[0] != dim:
+                            continue
+                        self._remember((model_key, h), vec)
+                        for i in pending.pop(h):
+                            found[i] = vec
+                            self.hits_disk += 1
+
+            self.misses += sum(len(idx) for idx in pending.values())
+        return found
+
+    def put_many(self, model_key: str, texts: Sequence[str], vectors: np.ndarray) -> None:
+        rows = []
+        with self._lock:
+            for text, vec in zip(texts, vectors):
+                vec = np.array(vec, dtype=np.float32)
+                vec.flags.writeable = False
+                h = text_hash(text)
+                self._remember((model_key, h), vec)
+                rows.append((model_key, h, int(vec.shape[0]), vec.tobytes()))
+            if self._db is not None and rows:
+                self._db.executemany(
+                    "INSERT OR REPLACE INTO embeddings (model_key, text_hash, dim, vector) "
+                    "VALUES (?, ?, ?, ?)",
+                    rows,
+                )
+                self._db.commit()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "hits_memory": self.hits_memory,
+                "hits_disk": self.hits_disk,
+                "misses": self.misses,
+                "entries": len(self._mem),
+                "bytes": self._mem_bytes,
+                "max_bytes": self.max_bytes,
+            }
+
+    def clear(self, disk: bool = False) -> None:
+        with self._lock:
+            self._mem.clear()
+            self._mem_bytes = 0
+            if disk and self._db is not None:
+                self._db.execute("DELETE FROM embeddings")
+                self._db.commit()
+
+
+_CACHES: Dict[Path, EmbeddingCache] = {}
+_CACHES_LOCK = threading.Lock()
+
+
+def get_embedding_cache(paths: AppPaths) -> EmbeddingCache:
+    # um cache por processo, compartilhado entre sessões/threads
+    with _CACHES_LOCK:
+        cache = _CACHES.get(paths.embedding_cache_db)
+        if cache is None:
+            cache = EmbeddingCache(disk_path=paths.embedding_cache_db)
+            _CACHES[paths.embedding_cache_db] = cache
+        return cache
+
+
+# Lotes por orçamento de tokens: os textos são ordenados pelo comprimento em
+# tokens e cada lote cresce até (maior comprimento do lote x nº de textos)
+# atingir o orçamento. Frases curtas saem em lotes grandes, parágrafos longos em
+# lotes pequenos, e quase nada é gasto com padding. Se faltar memória, o orçamento
+# cai pela metade, o restante é replanejado e o valor reduzido fica valendo para o modelo;
+# no piso (MIN_TOKEN_BUDGET) passa a cair o nº de textos por lote, até falhar com um texto só.
+# Um pico passageiro não deixa o processo lento para sempre: a cada
+# BUDGET_RECOVERY_BATCHES lotes seguidos sem falha o orçamento reduzido dobra,
+# até voltar a DEFAULT_TOKEN_BUDGET.
+DEFAULT_TOKEN_BUDGET = 4096
+MIN_TOKEN_BUDGET = 256
+BUDGET_RECOVERY_BATCHES = 50
+
+# modelo -> (orçamento reduzido, lotes sem falha desde a última redução)
+_TOKEN_BUDGETS: "weakref.WeakKeyDictionary[SentenceTransformer, Tuple[int, int]]" = weakref.WeakKeyDictionary()
+
+
+def token_lengths(model: SentenceTransformer, texts: Sequence[str]) -> np.ndarray:
+    # comprimento após truncamento em max_seq_length (é o que o forward realmente processa)
+    t0 = time.perf_counter() if metrics.ENABLED else None
+    max_len = getattr(model, "max_seq_length", None) or 512
+    tokenizer = getattr(model, "tokenizer", None)
+    if tokenizer is None:
+        # estimativa grosseira (~4 caracteres por token) para modelos sem tokenizer exposto
+        lengths = np.array([len(t) // 4 + 2 for t in texts], dtype=np.int64)
+    else:
+        ids = tokenizer(
+            list(texts),
+            truncation=True,
+            max_length=max_len,
+            return_attention_mask=False,
+            return_token_type_ids=False,
+        )["input_ids"]
+        lengths = np.fromiter((len(x) for x in ids), dtype=np.int64, count=len(texts))
+    if t0 is not None:
+        metrics.observe("token_lengths", model_key(model), time.perf_counter() - t0, len(texts))
+    return np.minimum(lengths, max_len)
+
+
+def plan_batches(lengths: np.ndarray, token_budget: int, max_batch: int) -> List[np.ndarray]:
+    # índices (na ordem original) de cada lote, do mais curto ao mais longo
+    order = np.argsort(lengths, kind="stable")
+    batches: List[np.ndarray] = []
+    start = 0
+    for pos in range(1, len(order)):
+        count = pos + 1 - start
+        # ordenado: se entrar no lote, o texto `pos` é o mais longo dele
+        if count > max_batch or count * int(lengths[order[pos]]) > token_budget:
+            batches.append(order[start:pos])
+            start = pos
+    if len(order):
+        batches.append(order[start:])
+    return batches
+
+
+def _is_oom(exc: BaseException) -> bool:
+    return isinstance(exc, MemoryError) or "out of memory" in str(exc).lower()
+
+
+def release_memory() -> None:
+    gc.collect()
+    torch = sys.modules.get("torch")
+    if torch is not None and torch.cuda.is_available():
+        torch.cuda.empty_cache()
+
+
+def _encode_batch(model: SentenceTransformer, texts: Sequence[str], batch_size: int) -> np.ndarray:
+    t0 = None
+    if metrics.ENABLED:
+        # hooks de tokenize/forward/pooling só existem com as métricas ligadas
+        metrics.instrument(model, model_key(model))
+        t0 = time.perf_counter()
+    emb = model.encode(
+        list(texts),
+        batch_size=batch_size,
+        convert_to_numpy=True,
+        normalize_embeddings=True,
+        show_progress_bar=False,
+    )
+    if t0 is not None:
+        metrics.observe("encode", model_key(model), time.perf_counter() - t0, len(texts))
+    if profiling.ACTIVE is not None:
+        profiling.step()
+    return np.asarray(emb, dtype=np.float32)
+
+
+def _recover_budget(model: SentenceTransformer) -> None:
+    state = _TOKEN_BUDGETS.get(model)
+    if state is None:
+        return
+    budget, ok = state[0], state[1] + 1
+    if ok < BUDGET_RECOVERY_BATCHES:
+        _TOKEN_BUDGETS[model] = (budget, ok)
+    elif budget * 2 >= DEFAULT_TOKEN_BUDGET:
+        _TOKEN_BUDGETS.pop(model, None)
+    else:
+        _TOKEN_BUDGETS[model] = (budget * 2, 0)
+
+
+def _encode(
+    model: SentenceTransformer,
+    texts: Sequence[str],
+    batch_size: int,
+    token_budget: Optional[int] = DEFAULT_TOKEN_BUDGET,
+) -> np.ndarray:
+    if not token_budget:
+        # lotes de tamanho fixo (comportamento anterior)
+        return _encode_batch(model, texts, batch_size)
+
+    state = _TOKEN_BUDGETS.get(model)
+    budget = min(token_budget, state[0]) if state is not None else token_budget
+    lengths = token_lengths(model, texts)
+    out = np.empty((len(texts), embedding_dim(model)), dtype=np.float32)
+
+    max_batch = batch_size
+    pending = plan_batches(lengths, budget, max_batch)[::-1]
+    while pending:
+        idx = pending.pop()
+        try:
+            out[idx] = _encode_batch(model, [texts[i] for i in idx], len(idx))
+            _recover_budget(model)
+        except (RuntimeError, MemoryError) as exc:
+            if not _is_oom(exc) or (len(idx) == 1 and budget <= MIN_TOKEN_BUDGET):
+                raise
+            release_memory()
+            if budget > MIN_TOKEN_BUDGET:
+                budget = max(MIN_TOKEN_BUDGET, budget // 2)
+            else:
+                # orçamento já no piso: reduz textos por lote (cada falha encolhe o lote até 1)
+                max_batch = max(1, len(idx) // 2)
+            _TOKEN_BUDGETS[model] = (budget, 0)
+            # replaneja o que falta (incluindo este lote) com os limites menores
+            remaining = np.concatenate([idx] + pending)
+            pending = [remaining[b] for b in plan_batches(lengths[remaining], budget, max_batch)][::-1]
+    return out
+
+
+def encode_texts(
+    model: SentenceTransformer,
+    texts: Sequence[str],
+    batch_size: int = 64,
+    cache: Optional[EmbeddingCache] = None,
+    token_budget: Optional[int] = DEFAULT_TOKEN_BUDGET,
+) -> np.ndarray:
+    # embeddings normalizados (norma 1, float32), na mesma ordem de `texts`;
+    # batch_size limita textos por lote e token_budget (None = desligado) os tokens
+    if len(texts) == 0:
+        return np.zeros((0, embedding_dim(model)), dtype=np.float32)
+
+    key = model_key(model) if cache is not None else None
+    if key is None:
+        return _encode(model, texts, batch_size, token_budget)
+
+    # textos repetidos (após normalização) são consultados/codificados uma vez só
+    normalized = [normalize_text(t) for t in texts]
+    unique = list(dict.fromkeys(normalized))
+    t0 = time.perf_counter() if metrics.ENABLED else None
+    found = cache.get_many(key, unique)
+    if t0 is not None:
+        metrics.observe("cache_lookup", key, time.perf_counter() - t0, len(unique))
+
+    missing = [i for i, vec in enumerate(found) if vec is None]
+    if missing:
+        todo = [unique[i] for i in missing]
+        fresh = _encode(model, todo, batch_size, token_budget)
+        cache.put_many(key, todo, fresh)
+        for j, i in enumerate(missing):
+            found[i] = fresh[j]
+
+    position = {text: i for i, text in enumerate(unique)}
+    return np.vstack(found)[[position[t] for t in normalized]]
+
+
+def cosine_similarity_batch(
+    model: SentenceTransformer,
+    pairs: Iterable[Tuple[str, str]],
+    batch_size: int = 64,
+    cache: Optional[EmbeddingCache] = None,
+) -> List[float]:
+    # cada texto distinto é codificado uma única vez, mesmo que apareça em vários pares
+    index: Dict[str, int] = {}
+    idx_a: List[int] = []
+    idx_b: List[int] = []
+    for text_a, text_b in pairs:
+        idx_a.append(index.setdefault(text_a, len(index)))
+        idx_b.append(index.setdefault(text_b, len(index)))
+
+    if not index:
+        return []
+
+    emb = encode_texts(model, list(index), batch_size=batch_size, cache=cache)
+    # com vetores normalizados, o cosseno é o produto interno linha a linha
+    t0 = time.perf_counter() if metrics.ENABLED else None
+    scores = np.einsum("ij,ij->i", emb[idx_a], emb[idx_b])
+    if t0 is not None:
+        metrics.observe("cosine", model_key(model), time.perf_counter() - t0, len(idx_a))
+    return [float(s) for s in scores]
+
+
+def cosine_similarity(
+    model: SentenceTransformer,
+    text_a: str,
+    text_b: str,
+    cache: Optional[EmbeddingCache] = None,
+) -> float:
+    return cosine_similarity_batch(model, [(text_a, text_b)], cache=cache)[0]
 
 
 def classify(score: float) -> str:
@@ -66,82 +484,135 @@ def classify(score: float) -> str:
         return "baixa"
 
 
+_HISTORY_STORES: Dict[Path, HistoryStore] = {}
+_HISTORY_WRITERS: Dict[Path, HistoryWriter] = {}
+_HISTORY_LOCK = threading.Lock()
+
+# durabilidade do histórico: "flush", "group" (fsync por grupo) ou "shutdown"
+HISTORY_DURABILITY = "group"
+
+
+def get_history_store(paths: AppPaths) -> HistoryStore:
+    # um store por processo; na primeira abertura importa o history.csv antigo, se houver
+    with _HISTORY_LOCK:
+        store = _HISTORY_STORES.get(paths.history_db)
+        if store is None:
+            store = HistoryStore(paths.history_db)
+            store.migrate_csv(paths.history_csv)
+            _HISTORY_STORES[paths.history_db] = store
+        return store
+
+
+def get_history_writer(paths: AppPaths) -> HistoryWriter:
+    # um writer em segundo plano por processo; drenado ao sair do interpretador
+    store = get_history_store(paths)
+    with _HISTORY_LOCK:
+        writer = _HISTORY_WRITERS.get(paths.history_db)
+        if writer is None:
+            writer = HistoryWriter(store, durability=HISTORY_DURABILITY)
+            atexit.register(writer.close)
+            _HISTORY_WRITERS[paths.history_db] = writer
+        return writer
+
+
+def history_writer_metrics(paths: AppPaths) -> Optional[Dict[str, Any]]:
+    # métricas do writer deste processo, sem criá-lo (None = nada escrito ainda)
+    writer = _HISTORY_WRITERS.get(paths.history_db)
+    return writer.metrics() if writer is not None else None
+
+
 def append_history(
     paths: AppPaths,
     model_label: str,
     text_a: str,
     text_b: str,
     score: float,
-) -> None:
+) -> bool:
+    # não bloqueia: a linha vai para a fila do writer (False = descartada, fila cheia)
+    t0 = time.perf_counter() if metrics.ENABLED else None
     now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    header = [
-        "timestamp",
-        "model_label",
-        "model_name",
-        "text_a",
-        "text_b",
-        "similarity",
-        "percent",
-        "classificacao",
-    ]
     row = [
         now,
         model_label,
         MODELS[model_label],
         text_a,
         text_b,
-        f"{score:.6f}",
-        f"{score * 100:.2f}",
+        round(float(score), 6),
+        round(float(score) * 100, 2),
         classify(score),
     ]
+    accepted = get_history_writer(paths).put(row)
+    if t0 is not None:
+        metrics.observe("history_append", MODELS[model_label], time.perf_counter() - t0)
+    return accepted
 
-    file_exists = paths.history_csv.exists()
-    with open(paths.history_csv, "a", newline="", encoding="utf-8") as f:
-        w = csv.writer(f)
-        if not file_exists:
-            w.writerow(header)
-        w.writerow(row)
-
-
-def read_history(paths: AppPaths) -> pd.DataFrame:
-    if not paths.history_csv.exists():
-        return pd.DataFrame(
-            columns=[
-                "timestamp",
-                "model_label",
-                "model_name",
-                "text_a",
-                "text_b",
-                "similarity",
-                "percent",
-                "classificacao",
-            ]
-        )
-    df = pd.read_csv(paths.history_csv)
-    # garantir tipos
-    if "similarity" in df.columns:
-        df["similarity"] = pd.to_numeric(df["similarity"], errors="coerce")
-    if "percent" in df.columns:
-        df["percent"] = pd.to_numeric(df["percent"], errors="coerce")
-    return df
+
+def read_history(
+    paths: AppPaths,
+    limit: Optional[int] = None,
+    offset: int = 0,
+    **filters,
+) -> pd.DataFrame:
+    # filtros: model_label, classificacao, since, until, min_similarity, text
+    # (ver HistoryStore.query); limit=None devolve tudo, do mais recente ao mais antigo
+    if not paths.history_db.exists() and not paths.history_csv.exists():
+        return pd.DataFrame(columns=HISTORY_COLUMNS)
+    writer = _HISTORY_WRITERS.get(paths.history_db)
+    if writer is not None:
+        # lê as próprias escritas: espera a fila deste processo chegar ao SQLite
+        writer.flush(timeout=5)
+    # em WAL cada commit altera o -wal e cada checkpoint o .sqlite: a assinatura dos
+    # dois (mais o CSV antigo, que dispara a migração) invalida o resultado em cache
+    files = [paths.history_db, Path(f"{paths.history_db}-wal"), paths.history_csv]
+    key = ("read_history", str(paths.history_db), limit, offset, tuple(sorted(filters.items())))
+    return get_file_cache().get(
+        key, files, lambda: get_history_store(paths).query(limit=limit, offset=offset, **filters)
+    )
+
+
+# Leituras de data/ e reports/ passam pelo cache de arquivos (file_cache): cada
+# arquivo é lido uma vez por processo e recarregado quando mtime/tamanho mudam.
+# DataFrames e bytes devolvidos são compartilhados entre sessões: não modifique.
+
+REPORT_FIGURES = {
+    "Boxplot (batch)": "boxplot_batch.png",
+    "Boxplot por categoria": "boxplot_categoria.png",
+    "Scatter (batch)": "scatter_batch.png",
+    "Boxplot (baseline vs multi)": "boxplot.png",
+    "Scatter (baseline vs multi)": "scatter.png",
+}
+
+# colunas de percentual aceitas no batch (convertidas para float na leitura)
+BATCH_PERCENT_COLUMNS = ["similaridade_percent", "percent", "percentual", "similarity_percent"]
 
 
 def reports_available(paths: AppPaths) -> Dict[str, Path]:
     # mostra o que existir
-    wanted = {
-        "Boxplot (batch)": paths.reports_dir / "boxplot_batch.png",
-        "Boxplot por categoria": paths.reports_dir / "boxplot_categoria.png",
-        "Scatter (batch)": paths.reports_dir / "scatter_batch.png",
-        "Boxplot (baseline vs multi)": paths.reports_dir / "boxplot.png",
-        "Scatter (baseline vs multi)": paths.reports_dir / "scatter.png",
-    }
-    return {k: v for k, v in wanted.items() if v.exists()}
+    wanted = {title: paths.reports_dir / name for title, name in REPORT_FIGURES.items()}
+    return get_file_cache().get(
+        ("reports_available", str(paths.reports_dir)),
+        wanted.values(),
+        lambda: {k: v for k, v in wanted.items() if v.exists()},
+    )
+
+
+def read_report(path: Path) -> bytes:
+    # bytes da figura (st.image aceita bytes); regravar o PNG invalida a entrada
+    return get_file_cache().get(("read_report", str(path)), [path], path.read_bytes)
+
+
+def _parse_batch(path: Path) -> pd.DataFrame:
+    df = pd.read_csv(path)
+    for col in BATCH_PERCENT_COLUMNS:
+        if col in df.columns:
+            df[col] = pd.to_numeric(df[col], errors="coerce")
+    return df
 
 
 def load_batch(paths: AppPaths) -> Tuple[pd.DataFrame, str]:
     if not paths.batch_csv.exists():
         return pd.DataFrame(), f"Não encontrei o arquivo {paths.batch_csv.name} em data/."
-    df = pd.read_csv(paths.batch_csv)
-    if "similaridade_percent" in df.columns:
-        df["similaridade_percent"] = pd.to_numeric(df["similaridade_percent"], errors="coerce")
+    df = get_file_cache().get(
+        ("load_batch", str(paths.batch_csv)), [paths.batch_csv], lambda: _parse_batch(paths.batch_csv)
+    )
     return df, ""
@@ -0,0 +1,246 @@
+from __future__ import annotations
+
+import json
+import os
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import TYPE_CHECKING, Iterable, List, Optional, Sequence
+
+import numpy as np
+
+from core import MODELS, EmbeddingCache, cache_key, encode_texts, model_key
+
+if TYPE_CHECKING:
+    # leitores do store não precisam carregar torch
+    from sentence_transformers import SentenceTransformer
+
+# Formato em disco (um diretório por store):
+#   meta.json    -> cabeçalho (modelo + backend, dimensão, normalização, nº de linhas confirmadas)
+#   vectors.bin  -> matriz float32 contígua (linhas x dim), row-major
+#   offsets.bin  -> int64 com o offset final de cada texto em texts.bin
+#   texts.bin    -> textos em UTF-8, concatenados
+#   ids.bin      -> int64 com o id externo de cada linha
+#
+# Só o que está contado em meta.json["count"] existe para os leitores: os dados
+# são gravados antes e o cabeçalho é trocado atomicamente no final do append.
+STORE_FORMAT = 1
+
+_META = "meta.json"
+_VECTORS = "vectors.bin"
+_OFFSETS = "offsets.bin"
+_TEXTS = "texts.bin"
+_IDS = "ids.bin"
+
+
+@dataclass(frozen=True)
+class StoreMeta:
+    model_label: str
+    model_name: str
+    dim: int
+    normalized: bool
+    count: int
+    dtype: str = "float32"
+    format: int = STORE_FORMAT
+    # chave do cache (nome + "#backend" fora do torch); vazia nos stores antigos
+    model_key: str = ""
+
+
+def _read_meta(path: Path) -> StoreMeta:
+    with open(path / _META, "r", encoding="utf-8") as f:
+        raw = json.load(f)
+    if raw.get("format") != STORE_FORMAT:
+        raise ValueError(f"Formato de store não suportado em {path}: {raw.get('format')}")
+    # stores antigos só guardavam o nome: foram gerados com o backend torch
+    raw.setdefault("model_key", raw["model_name"])
+    return StoreMeta(**raw)
+
+
+def _write_meta(path: Path, meta: StoreMeta) -> None:
+    tmp = path / (_META + ".tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(asdict(meta), f, ensure_ascii=False, indent=2)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path / _META)
+
+
+def _map(path: Path, dtype: str, shape: tuple) -> np.ndarray:
+    # np.memmap não aceita arquivo vazio
+    if shape[0] == 0:
+        return np.zeros(shape, dtype=dtype)
+    return np.memmap(path, dtype=dtype, mode="r", shape=shape)
+
+
+class EmbeddingStore:
+    # Store somente-append de embeddings de um corpus, lido via numpy.memmap.
+    # Vários processos podem abrir o mesmo store e compartilhar as páginas do SO.
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.refresh()
+
+    @classmethod
+    def create(
+        cls,
+        path: Path,
+        model_label: str,
+        dim: int,
+        normalized: bool = True,
+        key: Optional[str] = None,
+    ) -> "EmbeddingStore":
+        # key = model_key(modelo usado); padrão: o backend configurado em MODEL_BACKENDS
+        if model_label not in MODELS:
+            raise KeyError(f"Modelo desconhecido: {model_label}")
+        path = Path(path)
+        if (path / _META).exists():
+            raise FileExistsError(f"Já existe um store em {path}")
+        path.mkdir(parents=True, exist_ok=True)
+        for name in (_VECTORS, _OFFSETS, _TEXTS, _IDS):
+            (path / name).touch()
+        _write_meta(
+            path,
+            StoreMeta(
+                model_label=model_label,
+                model_name=MODELS[model_label],
+                dim=int(dim),
+                normalized=normalized,
+                count=0,
+                model_key=key or cache_key(model_label),
+            ),
+        )
+        return cls(path)
+
+    @classmethod
+    def open(cls, path: Path) -> "EmbeddingStore":
+        return cls(path)
+
+    def refresh(self) -> None:
+        # relê o cabeçalho para enxergar linhas adicionadas por outro processo
+        self.meta = _read_meta(self.path)
+        n, dim = self.meta.count, self.meta.dim
+        self.vectors = _map(self.path / _VECTORS, self.meta.dtype, (n, dim))
+        self.offsets = _map(self.path / _OFFSETS, "int64", (n,))
+        self.ids = _map(self.path / _IDS, "int64", (n,))
+        text_bytes = int(self.offsets[-1]) if n else 0
+        self._texts = _map(self.path / _TEXTS, "uint8", (text_bytes,))
+
+    def __len__(self) -> int:
+        return self.meta.count
+
+    @property
+    def model_label(self) -> str:
+        return self.meta.model_label
+
+    @property
+    def backend(self) -> str:
+        # backend com que os vetores foram gerados (para carregar o mesmo modelo)
+        return self.meta.model_key.partition("#")[2] or "torch"
+
+    def check_model(self, model: SentenceTransformer) -> None:
+        # garante que consultas usem o mesmo modelo (e backend) que gerou os vetores
+        key = model_key(model)
+        if key != self.meta.model_key:
+            raise ValueError(
+                f"Store {self.path.name} foi gerado com {self.meta.model_key}, "
+                f"mas o modelo recebido é {key or 'desconhecido'}."
+            )
+
+    def text(self, i: int) -> str:
+        start = int(self.offsets[i - 1]) if i > 0 else 0
+        end = int(self.offsets[i])
+        return bytes(self._texts[start:end]).decode("utf-8")
+
+    def texts(self, indices: Iterable[int]) -> List[str]:
+        return [self.text(int(i)) for i in indices]
+
+    def append(
+        self,
+        vectors: np.ndarray,
+        texts: Sequence[str],
+        ids: Optional[Sequence[int]] = None,
+    ) -> None:
+        # um único escritor por store; leitores só veem o bloco após o novo meta.json
+        vectors = np.ascontiguousarray(vectors, dtype=self.meta.dtype)
+        if vectors.ndim != 2 or vectors.shape[1] != self.meta.dim:
+            raise ValueError(f"Esperava vetores (n, {self.meta.dim}), recebi {vectors.shape}")
+        if len(texts) != vectors.shape[0]:
+            raise ValueError("Quantidade de textos difere da quantidade de vetores.")
+
+        meta = _read_meta(self.path)
+        start_id = meta.count
+        if ids is None:
+            ids = range(start_id, start_id + len(texts))
+        ids_arr = np.asarray(list(ids), dtype=np.int64)
+        if ids_arr.shape[0] != len(texts):
+            raise ValueError("Quantidade de ids difere da quantidade de textos.")
+
+        encoded = [t.encode("utf-8") for t in texts]
+        base = self._committed_text_bytes(meta.count)
+        ends = base + np.cumsum([len(b) for b in encoded], dtype=np.int64)
+
+        # descarta restos de um append interrompido (além do que o meta confirma)
+        self._truncate(meta.count, base)
+
+        for name, payload in (
+            (_VECTORS, vectors.tobytes()),
+            (_OFFSETS, ends.tobytes()),
+            (_TEXTS, b"".join(encoded)),
+            (_IDS, ids_arr.tobytes()),
+        ):
+            with open(self.path / name, "ab") as f:
+                f.write(payload)
+                f.flush()
+                os.fsync(f.fileno())
+
+        _write_meta(self.path, StoreMeta(**{**asdict(meta), "count": meta.count + len(texts)}))
+        self.refresh()
+
+    def add_texts(
+        self,
+        model: SentenceTransformer,
+        texts: Iterable[str],
+        ids: Optional[Iterable[int]] = None,
+        chunk_size: int = 10_000,
+        batch_size: int = 256,
+        cache: Optional[EmbeddingCache] = None,
+    ) -> int:
+        # codifica e grava em blocos, sem manter o corpus inteiro em memória
+        self.check_model(model)
+        id_iter = iter(ids) if ids is not None else None
+        added = 0
+        chunk: List[str] = []
+
+        def flush() -> None:
+            nonlocal added
+            chunk_ids = [next(id_iter) for _ in chunk] if id_iter is not None else None
+            emb = encode_texts(model, chunk, batch_size=batch_size, cache=cache)
+            self.append(emb, chunk, chunk_ids)
+            added += len(chunk)
+            chunk.clear()
+
+        for text in texts:
+            chunk.append(text)
+            if len(chunk) >= chunk_size:
+                flush()
+        if chunk:
+            flush()
+        return added
+
+    def _committed_text_bytes(self, count: int) -> int:
+        if count == 0:
+            return 0
+        offsets = np.memmap(self.path / _OFFSETS, dtype="int64", mode="r", shape=(count,))
+        return int(offsets[-1])
+
+    def _truncate(self, count: int, text_bytes: int) -> None:
+        itemsize = np.dtype(self.meta.dtype).itemsize
+        sizes = {
+            _VECTORS: count * self.meta.dim * itemsize,
+            _OFFSETS: count * 8,
+            _TEXTS: text_bytes,
+            _IDS: count * 8,
+        }
+        for name, size in sizes.items():
+            file = self.path / name
+            if file.stat().st_size != size:
+                os.truncate(file, size)
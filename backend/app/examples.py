@@ -0,0 +1,63 @@
+# Exemplos rápidos da página inicial (categoria, texto A, texto B).
+# Ficam fora do Home.py para poderem ser reaproveitados nos experimentos.
+EXAMPLES = [
+    # PARÁFRASE FORTE
+    (
+        "Paráfrase forte",
+        "O aluno estudou muito para a prova final.",
+        "O estudante se dedicou bastante para o exame final."
+    ),
+    (
+        "Paráfrase forte",
+        "O sistema apresentou falhas após a atualização.",
+        "Depois da atualização, o software começou a apresentar erros."
+    ),
+
+    # PARÁFRASE MÉDIA
+    (
+        "Paráfrase média",
+        "A empresa reduziu custos para aumentar o lucro.",
+        "A organização diminuiu despesas para lucrar mais."
+    ),
+    (
+        "Paráfrase média",
+        "O servidor caiu durante o pico de acesso.",
+        "Em horário de maior tráfego, o sistema ficou fora do ar."
+    ),
+
+    # MESMO TEMA
+    (
+        "Mesmo tema",
+        "Redes neurais são usadas para reconhecimento de imagens.",
+        "Algoritmos de aprendizado de máquina analisam dados visuais."
+    ),
+    (
+        "Mesmo tema",
+        "Testes automatizados ajudam a manter a qualidade do software.",
+        "Revisar código é importante antes da entrega."
+    ),
+
+    # CONTRADITÓRIO
+    (
+        "Contraditório",
+        "O projeto foi entregue antes do prazo.",
+        "O projeto atrasou e não foi concluído no tempo previsto."
+    ),
+    (
+        "Contraditório",
+        "A internet está muito rápida hoje.",
+        "A conexão está extremamente lenta hoje."
+    ),
+
+    # DIFERENTES
+    (
+        "Diferentes",
+        "O banco de dados utiliza chaves primárias.",
+        "Gosto de viajar para a praia nas férias."
+    ),
+    (
+        "Diferentes",
+        "O algoritmo utiliza busca em largura.",
+        "Meu cachorro dorme no sofá."
+    ),
+]
@@ -0,0 +1,231 @@
+from __future__ import annotations
+
+import hashlib
+import threading
+from collections import OrderedDict
+from io import BytesIO
+from typing import Any, Callable, Dict, Optional, Sequence, Tuple
+
+import numpy as np
+from matplotlib.figure import Figure
+
+# Gráficos das páginas de análise renderizados para bytes (PNG/SVG) e guardados
+# num LRU limitado por bytes. A chave é (renderer, formato, impressão digital dos
+# argumentos): dados, bins, toggles e range entram todos na impressão digital,
+# então um rerun sem mudança devolve a imagem pronta e só o gráfico cujo
+# controle mudou é redesenhado. O cache é do processo: sessões com os mesmos
+# dados (ex.: batch do TCC) compartilham as imagens.
+# Usa Figure direto (sem pyplot): nada fica registrado no gerenciador de figuras.
+
+FIGURE_CACHE_BYTES = 32 * 1024 * 1024
+
+# mesmos padrões do st.pyplot
+SAVEFIG_OPTIONS = {"dpi": 200, "bbox_inches": "tight"}
+
+PERCENT_LIMITS = (-100, 100)
+
+
+def _feed(h: Any, value: Any) -> None:
+    if isinstance(value, np.ndarray):
+        arr = np.ascontiguousarray(value)
+        h.update(f"nd{arr.dtype.str}{arr.shape}".encode())
+        h.update(arr.tobytes())
+    elif isinstance(value, (list, tuple)):
+        h.update(f"seq{len(value)}(".encode())
+        for item in value:
+            _feed(h, item)
+        h.update(b")")
+    elif isinstance(value, dict):
+        h.update(b"map{")
+        for k in sorted(value):
+            _feed(h, k)
+            _feed(h, value[k])
+        h.update(b"}")
+    else:
+        h.update(f"{type(value).__name__}:{value!r};".encode())
+
+
+def fingerprint(*args: Any, **kwargs: Any) -> str:
+    h = hashlib.sha1()
+    _feed(h, list(args))
+    _feed(h, kwargs)
+    return h.hexdigest()
+
+
+class FigureCache:
+    def __init__(self, max_bytes: int = FIGURE_CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self._items: "OrderedDict[Tuple[str, str, str], bytes]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Tuple[str, str, str]) -> Optional[bytes]:
+        with self._lock:
+            data = self._items.get(key)
+            if data is None:
+                self.misses += 1
+                return None
+            self._items.move_to_end(key)
+            self.hits += 1
+            return data
+
+    def put(self, key: Tuple[str, str, str], data: bytes) -> None:
+        with self._lock:
+            old = self._items.pop(key, None)
+            if old is not None:
+                self._bytes -= len(old)
+            if len(data) > self.max_bytes:
+                return
+            self._items[key] = data
+            self._bytes += len(data)
+            while self._bytes > self.max_bytes:
+                _, evicted = self._items.popitem(last=False)
+                self._bytes -= len(evicted)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._items.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "entries": len(self._items),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+            }
+
+
+_FIGURE_CACHE: Optional[FigureCache] = None
+_FIGURE_CACHE_LOCK = threading.Lock()
+
+
+def get_figure_cache() -> FigureCache:
+    global _FIGURE_CACHE
+    with _FIGURE_CACHE_LOCK:
+        if _FIGURE_CACHE is None:
+            _FIGURE_CACHE = FigureCache()
+        return _FIGURE_CACHE
+
+
+def render(renderer: Callable[..., Figure], *args: Any, fmt: str = "png", **kwargs: Any) -> bytes:
+    # devolve a imagem do cache ou desenha, salva em bytes e guarda
+    cache = get_figure_cache()
+    key = (renderer.__name__, fmt, fingerprint(*args, **kwargs))
+    data = cache.get(key)
+    if data is None:
+        fig = renderer(*args, **kwargs)
+        buf = BytesIO()
+        fig.savefig(buf, format=fmt, **SAVEFIG_OPTIONS)
+        data = buf.getvalue()
+        cache.put(key, data)
+    return data
+
+
+def _axes() -> Tuple[Figure, Any]:
+    fig = Figure()
+    return fig, fig.subplots()
+
+
+def _mean_line(ax: Any, mean_val: float) -> None:
+    ax.axvline(mean_val, linestyle="--", linewidth=2)
+    ax.text(
+        mean_val,
+        ax.get_ylim()[1] * 0.95,
+        f" média={mean_val:.1f}%",
+        rotation=90,
+        va="top",
+    )
+
+
+# ---------- renderers (Análises) ----------
+
+def histogram(counts: np.ndarray, edges: np.ndarray, mean: Optional[float], fixed_range: bool) -> Figure:
+    fig, ax = _axes()
+    ax.stairs(counts, edges, fill=True, edgecolor="black")
+    if fixed_range:
+        ax.set_xlim(*PERCENT_LIMITS)
+    ax.set_title("Histograma — Similaridade (%)")
+    ax.set_xlabel("Similaridade (%)")
+    ax.set_ylabel("Frequência")
+    ax.grid(True, axis="y", alpha=0.3)
+    if mean is not None:
+        _mean_line(ax, mean)
+    return fig
+
+
+def class_histogram(
+    names: Sequence[str],
+    counts: Sequence[np.ndarray],
+    edges: np.ndarray,
+    fixed_range: bool,
+) -> Figure:
+    fig, ax = _axes()
+    for name, c in zip(names, counts):
+        ax.stairs(c, edges, fill=True, alpha=0.5, label=str(name), edgecolor="black")
+    if fixed_range:
+        ax.set_xlim(*PERCENT_LIMITS)
+    ax.set_title("Histograma por classificação — sessão")
+    ax.set_xlabel("Similaridade (%)")
+    ax.set_ylabel("Frequência")
+    ax.grid(True, axis="y", alpha=0.3)
+    ax.legend()
+    return fig
+
+
+def timeline(series: np.ndarray, fixed_range: bool) -> Figure:
+    fig, ax = _axes()
+    x = np.arange(1, series.shape[0] + 1)
+    ax.plot(x, series, marker="o" if series.shape[0] <= 500 else None, linewidth=2)
+    ax.set_title("Similaridade (%) ao longo da sessão")
+    ax.set_xlabel("Ordem dos testes")
+    ax.set_ylabel("Similaridade (%)")
+    if fixed_range:
+        ax.set_ylim(*PERCENT_LIMITS)
+    ax.grid(True, axis="y", alpha=0.3)
+    return fig
+
+
+def boxplot(q1: float, med: float, q3: float, lo: float, hi: float, fixed_range: bool) -> Figure:
+    fig, ax = _axes()
+    # quartis do histograma agregado; bigodes em mínimo/máximo
+    ax.bxp(
+        [{"med": med, "q1": q1, "q3": q3, "whislo": lo, "whishi": hi, "fliers": []}],
+        vert=False,
+    )
+    ax.set_title("Boxplot — Similaridade (%) na sessão")
+    ax.set_xlabel("Similaridade (%)")
+    if fixed_range:
+        ax.set_xlim(*PERCENT_LIMITS)
+    ax.grid(True, axis="x", alpha=0.3)
+    return fig
+
+
+def cosine_histogram(counts: np.ndarray, edges: np.ndarray) -> Figure:
+    fig, ax = _axes()
+    ax.stairs(counts, edges / 100, fill=True, edgecolor="black")
+    ax.set_xlim(-1, 1)
+    ax.set_title("Histograma — cosine similarity (debug)")
+    ax.set_xlabel("Cosine similarity")
+    ax.set_ylabel("Frequência")
+    ax.grid(True, axis="y", alpha=0.3)
+    return fig
+
+
+# ---------- renderers (Avaliação TCC) ----------
+
+def batch_histogram(values: np.ndarray, bins: int, show_mean: bool) -> Figure:
+    fig, ax = _axes()
+    ax.hist(values, bins=bins, edgecolor="black")
+    ax.set_title("Histograma — Similaridade (%) no batch")
+    ax.set_xlabel("Similaridade (%)")
+    ax.set_ylabel("Frequência")
+    ax.grid(True, axis="y", alpha=0.3)
+    if show_mean:
+        _mean_line(ax, float(values.mean()))
+    return fig
+
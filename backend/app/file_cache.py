@@ -0,0 +1,82 @@
+from __future__ import annotations
+
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Callable, Dict, Hashable, Iterable, Optional, Tuple
+
+# Cache de leituras de arquivos do processo (compartilhado por todas as sessões).
+# Cada entrada guarda a assinatura (caminho, mtime_ns, tamanho) dos arquivos de
+# que depende; a cada acesso só é feito um stat() e, se algum arquivo mudou
+# (ex.: um script de experimento regravou data/ ou reports/), o valor é
+# recarregado. Os valores devolvidos são compartilhados: trate-os como somente
+# leitura (copie antes de modificar um DataFrame).
+
+FILE_CACHE_ENTRIES = 128
+
+Signature = Tuple[Tuple[str, int, int], ...]
+
+
+def file_signature(paths: Iterable[Path]) -> Signature:
+    out = []
+    for path in paths:
+        try:
+            st = os.stat(path)
+        except FileNotFoundError:
+            out.append((str(path), -1, -1))
+        else:
+            out.append((str(path), st.st_mtime_ns, st.st_size))
+    return tuple(out)
+
+
+class FileCache:
+    def __init__(self, max_entries: int = FILE_CACHE_ENTRIES):
+        self.max_entries = max_entries
+        self._items: "OrderedDict[Hashable, Tuple[Signature, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable, paths: Iterable[Path], loader: Callable[[], Any]) -> Any:
+        sig = file_signature(paths)
+        with self._lock:
+            item = self._items.get(key)
+            if item is not None and item[0] == sig:
+                self._items.move_to_end(key)
+                self.hits += 1
+                return item[1]
+            self.misses += 1
+        # parse fora do lock: duas sessões podem carregar ao mesmo tempo, sem prejuízo
+        value = loader()
+        with self._lock:
+            self._items[key] = (sig, value)
+            self._items.move_to_end(key)
+            while len(self._items) > self.max_entries:
+                self._items.popitem(last=False)
+        return value
+
+    def clear(self) -> None:
+        with self._lock:
+            self._items.clear()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "entries": len(self._items),
+                "max_entries": self.max_entries,
+            }
+
+
+_FILE_CACHE: Optional[FileCache] = None
+_FILE_CACHE_LOCK = threading.Lock()
+
+
+def get_file_cache() -> FileCache:
+    global _FILE_CACHE
+    with _FILE_CACHE_LOCK:
+        if _FILE_CACHE is None:
+            _FILE_CACHE = FileCache()
+        return _FILE_CACHE
@@ -0,0 +1,178 @@
+from __future__ import annotations
+
+import os
+import resource
+import sys
+import threading
+import time
+import weakref
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+from session_log import SessionLog
+from session_stats import SessionStats
+
+# Governador de memória do processo Streamlit (compartilhado por todas as sessões).
+# Cada página registra a sessão atual (touch); o governador guarda o tamanho
+# estimado do histórico/agregados de cada sessão e, quando a soma passa do
+# orçamento global, compacta as sessões ociosas (mais antigas primeiro),
+# mandando o histórico em memória para o segmento em disco do SessionLog.
+# Sessões encerradas somem sozinhas (referências fracas).
+
+SESSION_MEMORY_BUDGET = 256 * 1024 * 1024
+IDLE_SECONDS = 300.0
+
+
+def process_rss() -> int:
+    # RSS atual (Linux: /proc); fora do Linux, o pico informado pelo getrusage
+    try:
+        with open("/proc/self/statm", "r") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+
+
+def open_figures() -> int:
+    # figuras do pyplot que não foram fechadas continuam ocupando memória
+    plt = sys.modules.get("matplotlib.pyplot")
+    return len(plt.get_fignums()) if plt is not None else 0
+
+
+@dataclass
+class _Session:
+    log: "weakref.ref[SessionLog]"
+    stats: Optional["weakref.ref[SessionStats]"]
+    last_seen: float
+    nbytes: int = 0
+    compactions: int = 0
+
+
+class MemoryGovernor:
+    def __init__(self, budget_bytes: int = SESSION_MEMORY_BUDGET, idle_seconds: float = IDLE_SECONDS):
+        self.budget_bytes = budget_bytes
+        self.idle_seconds = idle_seconds
+        self._sessions: Dict[str, _Session] = {}
+        self._lock = threading.Lock()
+        self.compactions = 0
+        self.compacted_bytes = 0
+
+    @staticmethod
+    def _measure(entry: _Session) -> int:
+        log = entry.log()
+        stats = entry.stats() if entry.stats is not None else None
+        return (log.memory_bytes() if log is not None else 0) + (stats.nbytes() if stats is not None else 0)
+
+    def touch(self, session_id: str, log: SessionLog, stats: Optional[SessionStats] = None) -> None:
+        # chamado a cada execução de página: atualiza uso e aplica o orçamento
+        entry = _Session(weakref.ref(log), weakref.ref(stats) if stats is not None else None, time.monotonic())
+        entry.nbytes = self._measure(entry)
+        with self._lock:
+            old = self._sessions.get(session_id)
+            if old is not None:
+                entry.compactions = old.compactions
+            self._sessions[session_id] = entry
+        self.enforce(exclude=session_id)
+
+    def _prune(self) -> None:
+        dead = [sid for sid, e in self._sessions.items() if e.log() is None]
+        for sid in dead:
+            del self._sessions[sid]
+
+    def total_bytes(self) -> int:
+        with self._lock:
+            self._prune()
+            return sum(e.nbytes for e in self._sessions.values())
+
+    def enforce(self, exclude: Optional[str] = None, ignore_budget: bool = False) -> int:
+        # compacta sessões ociosas (da mais antiga para a mais nova) até caber no
+        # orçamento; com ignore_budget, compacta todas as ociosas. Sessões ativas
+        # nunca são compactadas por outra sessão: só o próprio log se compacta ao crescer.
+        freed = 0
+        with self._lock:
+            self._prune()
+            total = sum(e.nbytes for e in self._sessions.values())
+            if total <= self.budget_bytes and not ignore_budget:
+                return 0
+            now = time.monotonic()
+            idle = sorted(
+                (
+                    item for item in self._sessions.items()
+                    if item[0] != exclude and now - item[1].last_seen >= self.idle_seconds
+                ),
+                key=lambda item: item[1].last_seen,
+            )
+            for _, entry in idle:
+                if total <= self.budget_bytes and not ignore_budget:
+                    break
+                log = entry.log()
+                if log is None or not log.memory_rows:
+                    continue
+                log.spill_all()
+                after = self._measure(entry)
+                total -= entry.nbytes - after
+                freed += entry.nbytes - after
+                entry.nbytes = after
+                entry.compactions += 1
+                self.compactions += 1
+            self.compacted_bytes += freed
+        return freed
+
+    def compact_idle(self) -> int:
+        return self.enforce(ignore_budget=True)
+
+    def report(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        with self._lock:
+            self._prune()
+            sessions: List[Dict[str, Any]] = []
+            for sid, entry in self._sessions.items():
+                log = entry.log()
+                sessions.append({
+                    "session": sid[:8],
+                    "rows": len(log) if log is not None else 0,
+                    "memory_rows": log.memory_rows if log is not None else 0,
+                    "spilled_rows": log.spilled_rows if log is not None else 0,
+                    "bytes": entry.nbytes,
+                    "idle_s": round(now - entry.last_seen, 1),
+                    "compactions": entry.compactions,
+                })
+        sessions.sort(key=lambda s: -s["bytes"])
+        return {
+            "rss_bytes": process_rss(),
+            "sessions_bytes": sum(s["bytes"] for s in sessions),
+            "budget_bytes": self.budget_bytes,
+            "sessions": sessions,
+            "open_figures": open_figures(),
+            "compactions": self.compactions,
+            "compacted_bytes": self.compacted_bytes,
+        }
+
+
+_GOVERNOR: Optional[MemoryGovernor] = None
+_GOVERNOR_LOCK = threading.Lock()
+
+
+def get_governor() -> MemoryGovernor:
+    global _GOVERNOR
+    with _GOVERNOR_LOCK:
+        if _GOVERNOR is None:
+            _GOVERNOR = MemoryGovernor()
+        return _GOVERNOR
+
+
+def current_session_id() -> Optional[str]:
+    # import tardio: o módulo também é usado fora do Streamlit
+    try:
+        from streamlit.runtime.scriptrunner import get_script_run_ctx
+    except ImportError:
+        return None
+    ctx = get_script_run_ctx()
+    return ctx.session_id if ctx is not None else None
+
+
+def touch_session(log: Optional[SessionLog], stats: Optional[SessionStats] = None) -> None:
+    # atalho das páginas: registra a sessão Streamlit atual no governador
+    session_id = current_session_id()
+    if session_id is not None and log is not None:
+        get_governor().touch(session_id, log, stats)
@@ -0,0 +1,414 @@
+from __future__ import annotations
+
+import csv
+import queue
+import sqlite3
+import threading
+import time
+from collections import deque
+from pathlib import Path
+from typing import Any, Deque, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import pandas as pd
+
+# Histórico de comparações em SQLite (WAL): vários leitores e escritores
+# (threads do Streamlit, CLI, outros processos) sem reescrever arquivo nenhum.
+# Leituras são paginadas/filtradas e os agregados rodam no próprio SQLite,
+# então nada carrega a tabela inteira em memória.
+
+HISTORY_COLUMNS = [
+    "timestamp",
+    "model_label",
+    "model_name",
+    "text_a",
+    "text_b",
+    "similarity",
+    "percent",
+    "classificacao",
+]
+
+GROUP_COLUMNS = ("model_label", "model_name", "classificacao", "day")
+
+_SCHEMA = [
+    "CREATE TABLE IF NOT EXISTS history ("
+    " id INTEGER PRIMARY KEY AUTOINCREMENT,"
+    " timestamp TEXT NOT NULL,"
+    " model_label TEXT NOT NULL,"
+    " model_name TEXT NOT NULL,"
+    " text_a TEXT NOT NULL,"
+    " text_b TEXT NOT NULL,"
+    " similarity REAL,"
+    " percent REAL,"
+    " classificacao TEXT"
+    ")",
+    "CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)",
+]
+
+# filtros por modelo/classificação já saem ordenados por data pelo próprio índice
+_INDEXES = {
+    "idx_history_timestamp": "history (timestamp)",
+    "idx_history_model": "history (model_label, timestamp)",
+    "idx_history_class": "history (classificacao, timestamp)",
+}
+
+_INSERT = (
+    "INSERT INTO history (timestamp, model_label, model_name, text_a, text_b, similarity, percent, classificacao) "
+    "VALUES (?, ?, ?, ?, ?, ?, ?, ?)"
+)
+
+
+def _to_float(value: Any) -> Optional[float]:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+class HistoryStore:
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        # timeout: espera o lock de escrita de outro processo em vez de falhar na hora
+        self._db = sqlite3.connect(str(self.path), check_same_thread=False, timeout=30)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        for stmt in _SCHEMA:
+            self._db.execute(stmt)
+        self._create_indexes()
+        self._db.commit()
+
+    def _create_indexes(self) -> None:
+        for name, target in _INDEXES.items():
+            self._db.execute(f"CREATE INDEX IF NOT EXISTS {name} ON {target}")
+
+    # ---------- escrita ----------
+
+    def append_many(self, rows: Iterable[Sequence[Any]]) -> int:
+        # cada linha na ordem de HISTORY_COLUMNS; uma transação para o lote todo
+        batch = [tuple(r) for r in rows]
+        if not batch:
+            return 0
+        with self._lock, self._db:
+            self._db.executemany(_INSERT, batch)
+        return len(batch)
+
+    def append(self, row: Sequence[Any]) -> None:
+        self.append_many([row])
+
+    # ---------- leitura ----------
+
+    @staticmethod
+    def _where(
+        model_label: Optional[str] = None,
+        classificacao: Optional[str] = None,
+        since: Optional[str] = None,
+        until: Optional[str] = None,
+        min_similarity: Optional[float] = None,
+        text: Optional[str] = None,
+    ) -> Tuple[str, List[Any]]:
+        clauses: List[str] = []
+        params: List[Any] = []
+        if model_label:
+            clauses.append("model_label = ?")
+            params.append(model_label)
+        if classificacao:
+            clauses.append("classificacao = ?")
+            params.append(classificacao)
+        if since:
+            clauses.append("timestamp >= ?")
+            params.append(since)
+        if until:
+            clauses.append("timestamp < ?")
+            params.append(until)
+        if min_similarity is not None:
+            clauses.append("similarity >= ?")
+            params.append(min_similarity)
+        if text:
+            # busca textual simples (sem índice): combine com outros filtros em tabelas grandes
+            clauses.append("(text_a LIKE ? OR text_b LIKE ?)")
+            params += [f"%{text}%", f"%{text}%"]
+        return (" WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+    def query(
+        self,
+        limit: Optional[int] = 100,
+        offset: int = 0,
+        newest_first: bool = True,
+        **filters: Any,
+    ) -> pd.DataFrame:
+        where, params = self._where(**filters)
+        sql = (
+            f"SELECT {', '.join(HISTORY_COLUMNS)} FROM history{where} "
+            f"ORDER BY timestamp {'DESC' if newest_first else 'ASC'}, id {'DESC' if newest_first else 'ASC'}"
+        )
+        if limit is not None:
+            sql += " LIMIT ? OFFSET ?"
+            params += [int(limit), int(offset)]
+        with self._lock:
+            rows = self._db.execute(sql, params).fetchall()
+        return pd.DataFrame(rows, columns=HISTORY_COLUMNS)
+
+    def count(self, **filters: Any) -> int:
+        where, params = self._where(**filters)
+        with self._lock:
+            return int(self._db.execute(f"SELECT COUNT(*) FROM history{where}", params).fetchone()[0])
+
+    def aggregates(self, group_by: Optional[str] = None, **filters: Any) -> pd.DataFrame:
+        # contagem e estatísticas de similaridade calculadas pelo SQLite
+        if group_by is not None and group_by not in GROUP_COLUMNS:
+            raise ValueError(f"group_by inválido: {group_by} (use {', '.join(GROUP_COLUMNS)})")
+        key = "substr(timestamp, 1, 10)" if group_by == "day" else group_by
+        where, params = self._where(**filters)
+        select = (
+            "COUNT(*) AS total, AVG(similarity) AS media, MIN(similarity) AS minimo, "
+            "MAX(similarity) AS maximo, AVG(similarity * similarity) AS media_quad"
+        )
+        if key is None:
+            sql = f"SELECT {select} FROM history{where}"
+            columns = ["total", "media", "minimo", "maximo", "media_quad"]
+        else:
+            sql = f"SELECT {key} AS grupo, {select} FROM history{where} GROUP BY grupo ORDER BY grupo"
+            columns = [group_by, "total", "media", "minimo", "maximo", "media_quad"]
+        with self._lock:
+            rows = self._db.execute(sql, params).fetchall()
+
+        df = pd.DataFrame(rows, columns=columns)
+        # desvio padrão amostral a partir de E[x²] - E[x]² (SQLite não tem STDDEV)
+        var = (df["media_quad"] - df["media"] ** 2) * df["total"] / (df["total"] - 1).where(df["total"] > 1)
+        df["desvio"] = var.clip(lower=0) ** 0.5
+        return df.drop(columns="media_quad")
+
+    # ---------- migração ----------
+
+    def _meta(self, key: str) -> Optional[str]:
+        with self._lock:
+            row = self._db.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def migrate_csv(self, csv_path: Path, chunk_rows: int = 10_000) -> int:
+        # importa o history.csv antigo uma única vez (o arquivo fica onde está; o
+        # meta "migrated_csv" marca a importação). Verificação e carga ficam numa
+        # transação BEGIN IMMEDIATE: com dois processos abrindo o banco ao mesmo
+        # tempo, o segundo espera o lock de escrita e então vê o meta gravado.
+        csv_path = Path(csv_path)
+        if not csv_path.exists() or self._meta("migrated_csv") is not None:
+            return 0
+
+        imported = 0
+        with open(csv_path, "r", newline="", encoding="utf-8") as f, self._lock, self._db:
+            self._db.execute("BEGIN IMMEDIATE")
+            if self._db.execute("SELECT 1 FROM meta WHERE key = 'migrated_csv'").fetchone():
+                return 0
+            # carga em massa: recriar os índices no fim é ~3x mais rápido que mantê-los a cada linha
+            for name in _INDEXES:
+                self._db.execute(f"DROP INDEX IF EXISTS {name}")
+            batch: List[Tuple[Any, ...]] = []
+            for rec in csv.DictReader(f):
+                batch.append((
+                    rec.get("timestamp") or "",
+                    rec.get("model_label") or "",
+                    rec.get("model_name") or "",
+                    rec.get("text_a") or "",
+                    rec.get("text_b") or "",
+                    _to_float(rec.get("similarity")),
+                    _to_float(rec.get("percent")),
+                    rec.get("classificacao") or None,
+                ))
+                if len(batch) >= chunk_rows:
+                    self._db.executemany(_INSERT, batch)
+                    imported += len(batch)
+                    batch = []
+            if batch:
+                self._db.executemany(_INSERT, batch)
+                imported += len(batch)
+            self._create_indexes()
+            self._db.execute(
+                "INSERT OR REPLACE INTO meta (key, value) VALUES ('migrated_csv', ?)",
+                (f"{csv_path.name}:{imported}",),
+            )
+        return imported
+
+    def set_synchronous(self, mode: str) -> None:
+        # OFF = commit só entrega ao SO; FULL = fsync a cada commit
+        with self._lock:
+            self._db.execute(f"PRAGMA synchronous={mode}")
+
+    def checkpoint(self) -> None:
+        # copia o WAL para o arquivo principal (com fsync se synchronous != OFF)
+        with self._lock:
+            self._db.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+    def stats(self) -> Dict[str, Any]:
+        return {"path": str(self.path), "rows": self.count(), "migrated_csv": self._meta("migrated_csv")}
+
+
+# Escrita em segundo plano (write-behind): append_history só enfileira a linha;
+# uma thread dedicada junta as linhas e grava em grupo (um commit por grupo),
+# quando o grupo enche (`group_rows`) ou vence a janela (`group_ms`).
+# Política de durabilidade:
+#   flush    -> commit sem fsync (o SO decide quando ir ao disco)
+#   group    -> fsync a cada grupo gravado
+#   shutdown -> sem fsync durante a execução; checkpoint com fsync ao encerrar
+# Com a fila cheia a linha é descartada (e contada), para nunca travar a requisição.
+DURABILITY = {"flush": "OFF", "group": "FULL", "shutdown": "OFF"}
+
+
+class _FlushMarker:
+    def __init__(self):
+        self.done = threading.Event()
+
+
+_STOP = object()
+
+
+class HistoryWriter:
+    def __init__(
+        self,
+        store: HistoryStore,
+        max_queue: int = 10_000,
+        group_rows: int = 256,
+        group_ms: float = 200.0,
+        durability: str = "group",
+    ):
+        if durability not in DURABILITY:
+            raise ValueError(f"Durabilidade desconhecida: {durability} (use {', '.join(DURABILITY)})")
+        self.store = store
+        self.max_queue = max_queue
+        self.group_rows = group_rows
+        self.group_wait = group_ms / 1000
+        self.durability = durability
+        self._queue: "queue.Queue[Any]" = queue.Queue(maxsize=max_queue)
+        self._flush_ms: Deque[float] = deque(maxlen=1000)
+        self._drop_lock = threading.Lock()
+        self._closed = False
+        self.rows_written = 0
+        self.groups = 0
+        self.dropped_rows = 0
+        self.last_error: Optional[str] = None
+
+        store.set_synchronous(DURABILITY[durability])
+        self._thread = threading.Thread(target=self._run, name="history-writer", daemon=True)
+        self._thread.start()
+
+    def _drop(self, n: int) -> None:
+        with self._drop_lock:
+            self.dropped_rows += n
+
+    def put(self, row: Sequence[Any]) -> bool:
+        if self._closed:
+            self._drop(1)
+            return False
+        try:
+            self._queue.put_nowait(tuple(row))
+            return True
+        except queue.Full:
+            self._drop(1)
+            return False
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        # espera tudo o que já foi enfileirado chegar ao SQLite (leituras logo após escritas)
+        if self._closed:
+            return True
+        marker = _FlushMarker()
+        deadline = None if timeout is None else time.monotonic() + timeout
+        try:
+            # fila cheia: o tempo esperando vaga também conta no timeout
+            self._queue.put(marker, timeout=timeout)
+        except queue.Full:
+            return False
+        remaining = None if deadline is None else max(0.0, deadline - time.monotonic())
+        return marker.done.wait(remaining)
+
+    def _collect(self) -> Tuple[List[Tuple[Any, ...]], List[_FlushMarker], bool]:
+        rows: List[Tuple[Any, ...]] = []
+        markers: List[_FlushMarker] = []
+        item = self._queue.get()
+        deadline = time.monotonic() + self.group_wait
+        while True:
+            if item is _STOP:
+                return rows, markers, True
+            if isinstance(item, _FlushMarker):
+                # um pedido de flush fecha o grupo na hora
+                markers.append(item)
+                return rows, markers, False
+            rows.append(item)
+            timeout = deadline - time.monotonic()
+            if len(rows) >= self.group_rows or timeout <= 0:
+                return rows, markers, False
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                return rows, markers, False
+
+    def _write(self, rows: List[Tuple[Any, ...]]) -> None:
+        if not rows:
+            return
+        t0 = time.perf_counter()
+        try:
+            self.store.append_many(rows)
+        except sqlite3.Error as exc:
+            # não derruba a thread: o grupo é perdido e contado como descartado
+            self._drop(len(rows))
+            self.last_error = f"{type(exc).__name__}: {exc}"
+            return
+        self._flush_ms.append((time.perf_counter() - t0) * 1000)
+        self.rows_written += len(rows)
+        self.groups += 1
+
+    def _run(self) -> None:
+        while True:
+            rows, markers, stop = self._collect()
+            self._write(rows)
+            for marker in markers:
+                marker.done.set()
+            if stop:
+                break
+
+        # drena o que ainda estiver na fila antes de encerrar
+        rest: List[Tuple[Any, ...]] = []
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if isinstance(item, _FlushMarker):
+                item.done.set()
+            elif item is not _STOP:
+                rest.append(item)
+        for start in range(0, len(rest), self.group_rows):
+            self._write(rest[start:start + self.group_rows])
+
+        if self.durability == "shutdown":
+            self.store.set_synchronous("FULL")
+            self.store.checkpoint()
+
+    def close(self, timeout: Optional[float] = 30.0) -> None:
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(_STOP)
+        self._thread.join(timeout)
+
+    def metrics(self) -> Dict[str, Any]:
+        flush_ms = sorted(self._flush_ms)
+
+        def pct(q: float) -> Optional[float]:
+            return round(flush_ms[min(len(flush_ms) - 1, int(q * len(flush_ms)))], 3) if flush_ms else None
+
+        return {
+            "durability": self.durability,
+            "queue_depth": self._queue.qsize(),
+            "max_queue": self.max_queue,
+            "rows_written": self.rows_written,
+            "groups": self.groups,
+            "avg_group_rows": round(self.rows_written / max(1, self.groups), 2),
+            "dropped_rows": self.dropped_rows,
+            "flush_p50_ms": pct(0.50),
+            "flush_p99_ms": pct(0.99),
+            "flush_max_ms": round(flush_ms[-1], 3) if flush_ms else None,
+            "last_error": self.last_error,
+        }
@@ -0,0 +1,156 @@
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from core import EmbeddingCache, encode_texts, token_lengths
+
+if TYPE_CHECKING:
+    from sentence_transformers import SentenceTransformer
+
+# Modo documento longo: textos acima de max_seq_length seriam truncados pelo
+# modelo. Aqui cada documento vira uma lista de trechos (frases agrupadas em
+# janelas que cabem no modelo), todos os trechos são codificados num único
+# encode e a similaridade sai da matriz trecho x trecho:
+#   mean     -> cosseno entre as médias dos trechos de cada documento
+#   maxsim   -> cada trecho casa com o mais parecido do outro lado (média, simétrica)
+#   coverage -> fração dos trechos com algum par acima de `threshold` (simétrica)
+# Os trechos passam pelo cache de embeddings: comparar o mesmo documento com
+# vários outros não o codifica de novo.
+STRATEGIES = ("mean", "maxsim", "coverage")
+
+# mesmo corte da faixa "alta" de core.classify
+COVERAGE_THRESHOLD = 0.70
+
+_SENTENCE_END = re.compile(r"(?<=[.!?…;])\s+|\n+")
+
+
+@dataclass(frozen=True)
+class LongDocResult:
+    score: float
+    strategy: str
+    chunks_a: List[str]
+    chunks_b: List[str]
+    # melhor trecho de B para cada trecho de A: (i, j, similaridade)
+    alignment: List[Tuple[int, int, float]]
+
+
+def split_sentences(text: str) -> List[str]:
+    return [s.strip() for s in _SENTENCE_END.split(text) if s.strip()]
+
+
+def _split_long(model: SentenceTransformer, sentences: List[str], max_tokens: int) -> Tuple[List[str], List[int]]:
+    # frases que sozinhas não cabem no modelo são partidas ao meio (por palavras) até caber;
+    # token_lengths satura em max_seq_length, então atingir o teto também conta como estouro
+    max_len = getattr(model, "max_seq_length", None) or 512
+    pieces: List[str] = []
+    lengths: List[int] = []
+    stack = list(zip(sentences, token_lengths(model, sentences).tolist()))[::-1] if sentences else []
+    while stack:
+        piece, n = stack.pop()
+        words = piece.split()
+        if (n <= max_tokens and n < max_len) or len(words) < 2:
+            pieces.append(piece)
+            lengths.append(n)
+            continue
+        mid = len(words) // 2
+        halves = [" ".join(words[:mid]), " ".join(words[mid:])]
+        stack.extend(list(zip(halves, token_lengths(model, halves).tolist()))[::-1])
+    return pieces, lengths
+
+
+def chunk_text(
+    model: SentenceTransformer,
+    text: str,
+    max_tokens: Optional[int] = None,
+    overlap: int = 1,
+) -> List[str]:
+    # janelas de frases consecutivas com até max_tokens; `overlap` frases se repetem
+    # entre janelas vizinhas para não perder contexto na fronteira
+    max_len = getattr(model, "max_seq_length", None) or 512
+    max_tokens = min(max_tokens or max_len, max_len)
+    # token_lengths conta [CLS]/[SEP]; a janela paga esse custo só uma vez
+    special = 2
+    pieces, lengths = _split_long(model, split_sentences(text), max_tokens)
+    content = [max(1, int(n) - special) for n in lengths]
+
+    chunks: List[str] = []
+    start = 0
+    while start < len(pieces):
+        end, used = start, special
+        while end < len(pieces) and (end == start or used + content[end] <= max_tokens):
+            used += content[end]
+            end += 1
+        chunks.append(" ".join(pieces[start:end]))
+        if end >= len(pieces):
+            break
+        start = max(start + 1, end - overlap)
+    return chunks or [text.strip()]
+
+
+def _score(sim: np.ndarray, emb_a: np.ndarray, emb_b: np.ndarray, strategy: str, threshold: float) -> float:
+    if strategy == "mean":
+        mean_a, mean_b = emb_a.mean(axis=0), emb_b.mean(axis=0)
+        denom = float(np.linalg.norm(mean_a) * np.linalg.norm(mean_b))
+        return float(mean_a @ mean_b) / denom if denom else 0.0
+    if strategy == "maxsim":
+        return 0.5 * float(sim.max(axis=1).mean() + sim.max(axis=0).mean())
+    if strategy == "coverage":
+        covered_a = (sim.max(axis=1) >= threshold).mean()
+        covered_b = (sim.max(axis=0) >= threshold).mean()
+        return 0.5 * float(covered_a + covered_b)
+    raise ValueError(f"Estratégia desconhecida: {strategy} (use {', '.join(STRATEGIES)})")
+
+
+def _result(
+    chunks_a: List[str],
+    chunks_b: List[str],
+    emb_a: np.ndarray,
+    emb_b: np.ndarray,
+    strategy: str,
+    threshold: float,
+) -> LongDocResult:
+    sim = emb_a @ emb_b.T
+    best = sim.argmax(axis=1)
+    alignment = [(i, int(j), float(sim[i, j])) for i, j in enumerate(best)]
+    return LongDocResult(_score(sim, emb_a, emb_b, strategy, threshold), strategy, chunks_a, chunks_b, alignment)
+
+
+def doc_similarity(
+    model: SentenceTransformer,
+    text_a: str,
+    text_b: str,
+    strategy: str = "maxsim",
+    cache: Optional[EmbeddingCache] = None,
+    max_tokens: Optional[int] = None,
+    threshold: float = COVERAGE_THRESHOLD,
+) -> LongDocResult:
+    return compare_one_to_many(model, text_a, [text_b], strategy, cache, max_tokens, threshold)[0]
+
+
+def compare_one_to_many(
+    model: SentenceTransformer,
+    doc: str,
+    others: Sequence[str],
+    strategy: str = "maxsim",
+    cache: Optional[EmbeddingCache] = None,
+    max_tokens: Optional[int] = None,
+    threshold: float = COVERAGE_THRESHOLD,
+) -> List[LongDocResult]:
+    if strategy not in STRATEGIES:
+        raise ValueError(f"Estratégia desconhecida: {strategy} (use {', '.join(STRATEGIES)})")
+
+    chunks = [chunk_text(model, doc, max_tokens)] + [chunk_text(model, t, max_tokens) for t in others]
+    # todos os trechos de todos os documentos num único encode
+    flat = [c for doc_chunks in chunks for c in doc_chunks]
+    emb = encode_texts(model, flat, cache=cache)
+
+    bounds = np.cumsum([0] + [len(c) for c in chunks])
+    emb_doc = emb[bounds[0]:bounds[1]]
+    return [
+        _result(chunks[0], chunks[k], emb_doc, emb[bounds[k]:bounds[k + 1]], strategy, threshold)
+        for k in range(1, len(chunks))
+    ]
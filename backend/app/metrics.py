@@ -0,0 +1,201 @@
+from __future__ import annotations
+
+import os
+import threading
+import time
+import weakref
+from bisect import bisect_left
+from typing import Any, Dict, List, Optional, Tuple
+
+# Métricas por estágio do caminho quente (por modelo):
+#   tokenize        -> model.preprocess/tokenize (embrulhado na instância)
+#   forward         -> módulo Transformer (forward hooks)
+#   pooling         -> módulo Pooling (forward hooks); outros módulos usam o nome da classe
+#   encode          -> model.encode inteiro (inclui os três acima)
+#   token_lengths   -> tokenização do planejamento de lotes
+#   cache_lookup    -> consulta ao cache de embeddings
+#   cosine          -> produto interno dos pares
+#   history_append  -> append_history (enfileirar no writer)
+# Cada estágio tem contador, itens (textos/pares) e histograma de latência com
+# buckets fixos, exportados no formato texto do Prometheus.
+#
+# Desligado (padrão), o custo é um teste de `ENABLED` em core: nenhum hook fica
+# instalado e nada é medido. Ligue com STS_METRICS=1, enable() ou a página Diagnóstico.
+
+ENABLED = os.environ.get("STS_METRICS", "").lower() in ("1", "true", "on")
+
+# limites superiores dos buckets, em segundos (+Inf implícito)
+BUCKETS = (0.0001, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_STAGE_NAMES = {"transformer": "forward"}
+
+
+class _Histogram:
+    __slots__ = ("buckets", "count", "items", "sum", "max")
+
+    def __init__(self):
+        self.buckets = [0] * (len(BUCKETS) + 1)
+        self.count = 0
+        self.items = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+
+_LOCK = threading.Lock()
+_SERIES: Dict[Tuple[str, str], _Histogram] = {}
+_HOOKS: "weakref.WeakKeyDictionary[Any, List[Any]]" = weakref.WeakKeyDictionary()
+_HOOKS_LOCK = threading.Lock()
+_STARTS = threading.local()
+
+
+def observe(stage: str, model: Optional[str], seconds: float, items: int = 1) -> None:
+    key = (stage, model or "-")
+    with _LOCK:
+        hist = _SERIES.get(key)
+        if hist is None:
+            hist = _SERIES[key] = _Histogram()
+        hist.buckets[bisect_left(BUCKETS, seconds)] += 1
+        hist.count += 1
+        hist.items += items
+        hist.sum += seconds
+        if seconds > hist.max:
+            hist.max = seconds
+
+
+# ---------- hooks no modelo ----------
+
+def _stage_of(module: Any) -> str:
+    name = type(module).__name__.lower()
+    return _STAGE_NAMES.get(name, name)
+
+
+def instrument(model: Any, label: Optional[str]) -> None:
+    # instala (uma vez por modelo) os hooks de forward e o embrulho de tokenize
+    with _HOOKS_LOCK:
+        if model not in _HOOKS:
+            _HOOKS[model] = _install(model, label)
+
+
+def _install(model: Any, label: Optional[str]) -> List[Any]:
+    handles: List[Any] = []
+    for module in getattr(model, "children", lambda: [])():
+        stage = _stage_of(module)
+
+        def pre_hook(mod, args):
+            starts = getattr(_STARTS, "values", None)
+            if starts is None:
+                starts = _STARTS.values = {}
+            starts[id(mod)] = time.perf_counter()
+
+        def post_hook(mod, args, output, _stage=stage):
+            t0 = getattr(_STARTS, "values", {}).pop(id(mod), None)
+            if t0 is not None:
+                observe(_stage, label, time.perf_counter() - t0)
+
+        handles.append(module.register_forward_pre_hook(pre_hook))
+        handles.append(module.register_forward_hook(post_hook))
+
+    # sentence-transformers 5.x tokeniza em preprocess(); versões anteriores em tokenize()
+    method = "preprocess" if hasattr(type(model), "preprocess") else "tokenize"
+    original = getattr(model, method, None)
+    if original is not None:
+        def tokenize(texts, *args, **kwargs):
+            t0 = time.perf_counter()
+            out = original(texts, *args, **kwargs)
+            observe("tokenize", label, time.perf_counter() - t0, len(texts))
+            return out
+
+        setattr(model, method, tokenize)
+        handles.append(lambda: model.__dict__.pop(method, None))
+    return handles
+
+
+def _uninstrument_all() -> None:
+    with _HOOKS_LOCK:
+        installed = [_HOOKS.pop(model, []) for model in list(_HOOKS.keys())]
+    for handles in installed:
+        for handle in handles:
+            if callable(handle):
+                handle()
+            else:
+                handle.remove()
+
+
+# ---------- liga/desliga ----------
+
+def enable() -> None:
+    global ENABLED
+    ENABLED = True
+
+
+def disable() -> None:
+    # remove os hooks: desligado volta a custar zero no forward
+    global ENABLED
+    ENABLED = False
+    _uninstrument_all()
+
+
+def reset() -> None:
+    with _LOCK:
+        _SERIES.clear()
+
+
+# ---------- leitura ----------
+
+def snapshot() -> List[Dict[str, Any]]:
+    with _LOCK:
+        rows = [
+            {
+                "stage": stage,
+                "model": model,
+                "count": h.count,
+                "items": h.items,
+                "total_s": round(h.sum, 6),
+                "mean_ms": round(h.sum / h.count * 1000, 3) if h.count else 0.0,
+                "p99_ms_le": round(_quantile_bound(h, 0.99) * 1000, 3),
+                "max_ms": round(h.max * 1000, 3),
+            }
+            for (stage, model), h in _SERIES.items()
+        ]
+    return sorted(rows, key=lambda r: (r["model"], -r["total_s"]))
+
+
+def _quantile_bound(hist: _Histogram, q: float) -> float:
+    # limite superior do bucket que contém o quantil (o máximo observado no último)
+    target = q * hist.count
+    running = 0
+    for i, n in enumerate(hist.buckets):
+        running += n
+        if running >= target and n:
+            return BUCKETS[i] if i < len(BUCKETS) else hist.max
+    return 0.0
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def render_prometheus() -> str:
+    lines = [
+        "# HELP sts_stage_seconds Latência por estágio do pipeline de similaridade.",
+        "# TYPE sts_stage_seconds histogram",
+    ]
+    items = [
+        "# HELP sts_stage_items_total Textos/pares processados por estágio.",
+        "# TYPE sts_stage_items_total counter",
+    ]
+    with _LOCK:
+        for (stage, model), h in sorted(_SERIES.items()):
+            labels = f'stage="{_escape(stage)}",model="{_escape(model)}"'
+            running = 0
+            for bound, n in zip(BUCKETS, h.buckets):
+                running += n
+                lines.append(f'sts_stage_seconds_bucket{{{labels},le="{bound}"}} {running}')
+            lines.append(f'sts_stage_seconds_bucket{{{labels},le="+Inf"}} {h.count}')
+            lines.append(f"sts_stage_seconds_sum{{{labels}}} {h.sum:.9f}")
+            lines.append(f"sts_stage_seconds_count{{{labels}}} {h.count}")
+            items.append(f"sts_stage_items_total{{{labels}}} {h.items}")
+    lines.append("# HELP sts_metrics_enabled Instrumentação ligada (1) ou desligada (0).")
+    lines.append("# TYPE sts_metrics_enabled gauge")
+    lines.append(f"sts_metrics_enabled {int(ENABLED)}")
+    return "\n".join(lines + items) + "\n"
@@ -0,0 +1,207 @@
+from __future__ import annotations
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any, Dict, Iterable, List, Optional, Tuple
+
+from core import MODEL_BACKENDS, MODELS, load_model, release_memory
+from governor import process_rss
+
+if TYPE_CHECKING:
+    from sentence_transformers import SentenceTransformer
+
+# Registro de modelos do processo (páginas, CLI e scripts de experimento).
+# Cada (modelo, backend) é carregado no primeiro uso e a mesma instância é
+# devolvida a todos os chamadores. Se a soma estimada dos modelos residentes
+# passa do orçamento, os menos usados recentemente saem do registro (o último
+# carregado nunca sai). Quem ainda segura uma referência continua funcionando;
+# a memória volta quando essa referência some.
+#
+# Orçamento: MODEL_MEMORY_BUDGET, ou STS_MODEL_BUDGET_MB no ambiente.
+# Pré-carga: preload(), ou STS_PRELOAD_MODELS="Rótulo 1,Rótulo 2" com preload_from_env().
+
+MODEL_MEMORY_BUDGET = int(float(os.environ.get("STS_MODEL_BUDGET_MB", "1024")) * 1024 * 1024)
+WARMUP_TEXTS = ["aquecimento do modelo", "primeira inferência"]
+
+Key = Tuple[str, str]
+
+
+def model_nbytes(model: Any) -> int:
+    # pesos + buffers; backends sem parâmetros torch (onnx, int8 empacotado) devolvem 0
+    total = 0
+    for tensors in (getattr(model, "parameters", None), getattr(model, "buffers", None)):
+        if tensors is None:
+            continue
+        for t in tensors():
+            total += t.numel() * t.element_size()
+    return total
+
+
+@dataclass
+class _Entry:
+    model: "SentenceTransformer"
+    load_s: float
+    nbytes: int
+    rss_delta: int
+    last_used: float
+    hits: int = 0
+    warmed: bool = False
+
+
+class ModelRegistry:
+    def __init__(self, budget_bytes: int = MODEL_MEMORY_BUDGET):
+        self.budget_bytes = budget_bytes
+        self._entries: "OrderedDict[Key, _Entry]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._loading: Dict[Key, threading.Lock] = {}
+        self.loads = 0
+        self.evictions = 0
+
+    @staticmethod
+    def _key(model_label: str, backend: Optional[str]) -> Key:
+        if model_label not in MODELS:
+            raise KeyError(f"Modelo desconhecido: {model_label} (use {', '.join(MODELS)})")
+        return model_label, backend or MODEL_BACKENDS.get(model_label, "torch")
+
+    def get(self, model_label: str, backend: Optional[str] = None) -> "SentenceTransformer":
+        key = self._key(model_label, backend)
+        with self._lock:
+            entry = self._touch(key)
+            if entry is not None:
+                return entry.model
+            load_lock = self._loading.setdefault(key, threading.Lock())
+
+        # um carregamento por chave: sessões simultâneas esperam o mesmo modelo
+        with load_lock:
+            with self._lock:
+                entry = self._touch(key)
+                if entry is not None:
+                    return entry.model
+            rss0 = process_rss()
+            t0 = time.perf_counter()
+            model = load_model(*key)
+            load_s = time.perf_counter() - t0
+            rss_delta = max(process_rss() - rss0, 0)
+            entry = _Entry(model, load_s, model_nbytes(model) or rss_delta, rss_delta, time.monotonic())
+            with self._lock:
+                self._entries[key] = entry
+                self.loads += 1
+                self._loading.pop(key, None)
+                evicted = self._evict(keep=key)
+        if evicted:
+            release_memory()
+        return model
+
+    def _touch(self, key: Key) -> Optional[_Entry]:
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+            entry.last_used = time.monotonic()
+            entry.hits += 1
+        return entry
+
+    def _evict(self, keep: Key) -> int:
+        # LRU: o início do OrderedDict é o usado há mais tempo
+        evicted = 0
+        while self.total_bytes() > self.budget_bytes and len(self._entries) > 1:
+            key = next(k for k in self._entries if k != keep)
+            del self._entries[key]
+            self.evictions += 1
+            evicted += 1
+        return evicted
+
+    def warmup(self, model_label: str, backend: Optional[str] = None) -> None:
+        # o primeiro encode paga inicializações preguiçosas (threads, kernels, tokenizer)
+        model = self.get(model_label, backend)
+        model.encode(WARMUP_TEXTS, show_progress_bar=False)
+        with self._lock:
+            entry = self._entries.get(self._key(model_label, backend))
+            if entry is not None:
+                entry.warmed = True
+
+    def preload(self, model_labels: Iterable[str], warmup: bool = True) -> None:
+        for label in model_labels:
+            if warmup:
+                self.warmup(label)
+            else:
+                self.get(label)
+
+    def preload_async(self, model_labels: Iterable[str], warmup: bool = True) -> threading.Thread:
+        thread = threading.Thread(
+            target=self.preload, args=(list(model_labels), warmup), name="model-preload", daemon=True
+        )
+        thread.start()
+        return thread
+
+    def unload(self, model_label: str, backend: Optional[str] = None) -> bool:
+        with self._lock:
+            entry = self._entries.pop(self._key(model_label, backend), None)
+        if entry is None:
+            return False
+        del entry
+        release_memory()
+        return True
+
+    def is_loaded(self, model_label: str, backend: Optional[str] = None) -> bool:
+        with self._lock:
+            return self._key(model_label, backend) in self._entries
+
+    def total_bytes(self) -> int:
+        return sum(e.nbytes for e in self._entries.values())
+
+    def stats(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        with self._lock:
+            models: List[Dict[str, Any]] = [
+                {
+                    "model": label,
+                    "backend": backend,
+                    "name": MODELS[label],
+                    "load_s": round(e.load_s, 3),
+                    "bytes": e.nbytes,
+                    "rss_delta_bytes": e.rss_delta,
+                    "hits": e.hits,
+                    "idle_s": round(now - e.last_used, 1),
+                    "warmed": e.warmed,
+                }
+                for (label, backend), e in self._entries.items()
+            ]
+            return {
+                "models": models,
+                "total_bytes": self.total_bytes(),
+                "budget_bytes": self.budget_bytes,
+                "loads": self.loads,
+                "evictions": self.evictions,
+            }
+
+
+_REGISTRY: Optional[ModelRegistry] = None
+_REGISTRY_LOCK = threading.Lock()
+_PRELOAD: Optional[threading.Thread] = None
+
+
+def get_registry() -> ModelRegistry:
+    global _REGISTRY
+    with _REGISTRY_LOCK:
+        if _REGISTRY is None:
+            _REGISTRY = ModelRegistry()
+        return _REGISTRY
+
+
+def get_model(model_label: str, backend: Optional[str] = None) -> "SentenceTransformer":
+    return get_registry().get(model_label, backend)
+
+
+def preload_from_env(warmup: bool = True) -> Optional[threading.Thread]:
+    # pré-carga em segundo plano, uma vez por processo, sem atrasar a primeira renderização
+    global _PRELOAD
+    labels = [s.strip() for s in os.environ.get("STS_PRELOAD_MODELS", "").split(",") if s.strip()]
+    labels = [label for label in labels if label in MODELS]
+    registry = get_registry()
+    with _REGISTRY_LOCK:
+        if _PRELOAD is None and labels:
+            _PRELOAD = registry.preload_async(labels, warmup)
+        return _PRELOAD
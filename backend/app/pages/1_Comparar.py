@@ -3,7 +3,12 @@ import pandas as pd
 from datetime import datetime
 from zoneinfo import ZoneInfo
 
-from core import get_paths, load_model, cosine_similarity, classify, MODELS
+from core import get_paths, cosine_similarity, classify, get_embedding_cache, token_lengths, MODELS
+from longdoc import STRATEGIES, doc_similarity
+from governor import touch_session
+from model_registry import get_model
+from session_log import SessionLog
+from session_stats import SessionStats
 
 st.set_page_config(page_title="Comparar", page_icon="🧪", layout="wide")
 
@@ -24,29 +29,24 @@ with st.sidebar:
     st.caption("Modo **privado por sessão** (não compartilha com outros usuários).")
     st.markdown("---")
     st.caption("Dica: faça alguns testes e depois veja **Histórico** e **Análises**.")
+    cache_stats = get_embedding_cache(paths).stats()
+    st.caption(
+        f"Cache de embeddings: {cache_stats['hits_memory'] + cache_stats['hits_disk']} acertos, "
+        f"{cache_stats['misses']} faltas."
+    )
 
-@st.cache_resource(show_spinner=False)
-def _cached_model(model_label: str):
-    return load_model(model_label)
-
-# Inicializa histórico da sessão
+# Inicializa histórico da sessão (colunar; linhas antigas vão para disco acima do limite)
 if "history" not in st.session_state:
-    st.session_state["history"] = pd.DataFrame(
-        columns=[
-            "timestamp",
-            "model_label",
-            "model_name",
-            "text_a",
-            "text_b",
-            "similarity",
-            "percent",
-            "classificacao",
-        ]
-    )
+    st.session_state["history"] = SessionLog()
+if "history_stats" not in st.session_state:
+    st.session_state["history_stats"] = SessionStats.from_records(st.session_state["history"].records())
 
-# carrega modelo fixo
+# contabiliza a sessão no governador de memória do servidor (pode compactar sessões ociosas)
+touch_session(st.session_state["history"], st.session_state["history_stats"])
+
+# carrega modelo fixo (registro do processo: uma instância compartilhada por todas as sessões)
 model_label = MODEL_LABEL
-model = _cached_model(model_label)
+model = get_model(model_label)
 
 colA, colB = st.columns(2)
 
@@ -66,6 +66,25 @@ with colB:
         placeholder="Cole ou digite o Texto B...",
     )
 
+# Documentos longos: acima de max_seq_length o modelo trunca o texto
+STRATEGY_LABELS = {
+    "maxsim": "Alinhamento entre trechos (max-sim)",
+    "mean": "Média dos trechos",
+    "coverage": "Cobertura (trechos com par ≥ 0.70)",
+}
+
+colL, colS = st.columns([1, 2])
+with colL:
+    long_mode = st.toggle("📄 Modo documento longo", value=False)
+with colS:
+    strategy = st.selectbox(
+        "Estratégia",
+        STRATEGIES,
+        format_func=STRATEGY_LABELS.get,
+        disabled=not long_mode,
+        label_visibility="collapsed",
+    )
+
 btn = st.button("Comparar", type="primary", use_container_width=True)
 
 if btn:
@@ -85,8 +104,19 @@ if btn:
             "pequenos parágrafos."
         )
 
+    long_result = None
     with st.spinner("Calculando similaridade..."):
-        score = cosine_similarity(model, a, b)
+        if long_mode:
+            long_result = doc_similarity(model, a, b, strategy, cache=get_embedding_cache(paths))
+            score = long_result.score
+        else:
+            score = cosine_similarity(model, a, b, cache=get_embedding_cache(paths))
+
+    if not long_mode and token_lengths(model, [a, b]).max() >= model.max_seq_length:
+        st.info(
+            f"ℹ️ Um dos textos passa de {model.max_seq_length} tokens e foi **truncado** pelo modelo. "
+            "Ative o **Modo documento longo** para comparar o texto inteiro."
+        )
 
     percent = score * 100
     nivel = classify(score)
@@ -100,6 +130,25 @@ if btn:
 
     st.caption(f"Modelo usado: {model_label} ({MODELS[model_label]})")
 
+    if long_result is not None:
+        with st.expander(
+            f"Trechos: {len(long_result.chunks_a)} em A, {len(long_result.chunks_b)} em B "
+            f"({STRATEGY_LABELS[long_result.strategy]})"
+        ):
+            st.dataframe(
+                pd.DataFrame(
+                    [
+                        {
+                            "trecho_a": long_result.chunks_a[i],
+                            "melhor_trecho_b": long_result.chunks_b[j],
+                            "similaridade": round(sim, 4),
+                        }
+                        for i, j, sim in long_result.alignment
+                    ]
+                ),
+                use_container_width=True,
+            )
+
     # Timestamp no fuso do Brasil (resolve Streamlit Cloud)
     ts_br = datetime.now(BR_TZ).strftime("%Y-%m-%d %H:%M:%S %z")
 
@@ -115,33 +164,35 @@ if btn:
         "classificacao": nivel,
     }
 
-    st.session_state["history"] = pd.concat(
-        [st.session_state["history"], pd.DataFrame([new_row])],
-        ignore_index=True,
-    )
+    st.session_state["history"].append(new_row)
+    st.session_state["history_stats"].add(new_row)
 
 st.divider()
 st.subheader("Meu histórico (sessão)")
 
-hist = st.session_state["history"]
+log = st.session_state["history"]
 
-if hist.empty:
+if log.empty:
     st.info("Ainda não há itens. Faça uma comparação acima.")
 else:
-    st.dataframe(hist.sort_values("timestamp", ascending=False), use_container_width=True)
+    # só as linhas em memória (as mais recentes); o CSV abaixo traz a sessão inteira
+    st.dataframe(log.to_frame(include_spilled=False, newest_first=True), use_container_width=True)
+    if log.spilled_rows:
+        st.caption(f"{log.spilled_rows} registros mais antigos estão no arquivo temporário da sessão (incluídos no CSV).")
 
 colx, coly = st.columns(2)
 
 with colx:
     if st.button("🧹 Limpar meu histórico (sessão)"):
-        st.session_state["history"] = st.session_state["history"].iloc[0:0]
+        st.session_state["history"].clear()
+        st.session_state["history_stats"] = SessionStats()
         st.success("Histórico da sessão limpo.")
 
 with coly:
-    csv_bytes = hist.to_csv(index=False).encode("utf-8")
+    # gerado só no clique (inclui os registros que foram para disco)
     st.download_button(
         "⬇️ Baixar meu histórico (CSV)",
-        data=csv_bytes,
+        data=log.export_csv,
         file_name="meu_historico.csv",
         mime="text/csv",
         use_container_width=True,
@@ -1,49 +1,53 @@
+from functools import partial
+
 import streamlit as st
-import pandas as pd
+
+from governor import touch_session
 
 st.set_page_config(page_title="Histórico", page_icon="🗂️", layout="wide")
 st.title("🗂️ Histórico (sessão)")
 
-df = st.session_state.get("history", pd.DataFrame())
+log = st.session_state.get("history")
+touch_session(log, st.session_state.get("history_stats"))
 
-if df.empty:
+if log is None or log.empty:
     st.warning("Ainda não há histórico nesta sessão. Vá em **Comparar** e execute alguns testes.")
     st.stop()
 
-# Garante tipos
-if "percent" in df.columns:
-    df["percent"] = pd.to_numeric(df["percent"], errors="coerce")
+# colunas já tipadas (percent é float) e mais recentes primeiro; só as linhas em
+# memória: os segmentos que foram para disco entram apenas no CSV
+df = log.to_frame(include_spilled=False, newest_first=True)
 
 with st.sidebar:
     st.subheader("Filtros")
     min_percent = st.slider("Percentual mínimo", -100, 100, -100)
 
     # Slider baseado no tamanho real do histórico
+    # com tudo em disco (ou uma linha só) não há o que limitar
     total = len(df)
-    max_rows = st.slider(
-        "Máx. linhas exibidas",
-        min_value=1,
-        max_value=total,
-        value=min(200, total),
-        step=1,
-    )
-
-filtered = df.copy()
-
-if "percent" in filtered.columns:
-    filtered = filtered[filtered["percent"] >= min_percent]
-
-filtered = filtered.sort_values("timestamp", ascending=False).head(int(max_rows))
-
-st.caption(f"Mostrando {len(filtered)} de {len(df)} registros.")
+    max_rows = total
+    if total > 1:
+        max_rows = st.slider(
+            "Máx. linhas exibidas",
+            min_value=1,
+            max_value=total,
+            value=min(200, total),
+            step=1,
+        )
+
+filtered = df[df["percent"] >= min_percent].head(int(max_rows))
+
+st.caption(f"Mostrando {len(filtered)} de {len(df)} registros em memória.")
+if log.spilled_rows:
+    st.caption(f"{log.spilled_rows} registros mais antigos estão no arquivo temporário da sessão (incluídos no CSV).")
 st.dataframe(filtered, use_container_width=True)
 
 st.divider()
 
-csv_bytes = filtered.to_csv(index=False).encode("utf-8")
+# gerado só no clique: sessão inteira (inclusive o que foi para disco) com o filtro de percentual
 st.download_button(
     "⬇️ Baixar CSV filtrado",
-    data=csv_bytes,
+    data=partial(log.export_csv, min_percent=min_percent),
     file_name="history_filtrado.csv",
     mime="text/csv",
 )
@@ -1,8 +1,7 @@
 import streamlit as st
-import pandas as pd
-import matplotlib.pyplot as plt
 
-from core import get_paths, reports_available, load_batch
+import figures
+from core import BATCH_PERCENT_COLUMNS, get_paths, reports_available, load_batch, read_report
 
 st.set_page_config(page_title="Avaliação (TCC)", page_icon="🎓", layout="wide")
 
@@ -45,16 +44,9 @@ if err:
 
 st.write(f"Linhas no batch: **{len(df_batch)}**")
 
-# Coluna percentual
-percent_col_candidates = [
-    "similaridade_percent",
-    "percent",
-    "percentual",
-    "similarity_percent",
-]
-
+# Coluna percentual (já numérica: load_batch converte na leitura, uma vez por arquivo)
 percent_col = next(
-    (c for c in percent_col_candidates if c in df_batch.columns),
+    (c for c in BATCH_PERCENT_COLUMNS if c in df_batch.columns),
     None,
 )
 
@@ -64,11 +56,6 @@ if percent_col is None:
         "(esperado: similaridade_percent)."
     )
 else:
-    df_batch[percent_col] = pd.to_numeric(
-        df_batch[percent_col],
-        errors="coerce",
-    )
-
     vals = df_batch[percent_col].dropna().astype(float)
 
     # Métricas
@@ -94,30 +81,9 @@ else:
             "Para conjuntos pequenos, menos bins tendem a gerar melhor visualização."
         )
 
-    # Histograma
-    fig, ax = plt.subplots()
-
-    ax.hist(vals, bins=bins, edgecolor="black")
-
-    ax.set_title("Histograma — Similaridade (%) no batch")
-    ax.set_xlabel("Similaridade (%)")
-    ax.set_ylabel("Frequência")
-    ax.grid(True, axis="y", alpha=0.3)
-
-    if show_mean:
-        mean_val = vals.mean()
-
-        ax.axvline(mean_val, linestyle="--", linewidth=2)
-
-        ax.text(
-            mean_val,
-            ax.get_ylim()[1] * 0.95,
-            f" média={mean_val:.1f}%",
-            rotation=90,
-            va="top",
-        )
-
-    st.pyplot(fig, clear_figure=True)
+    # Histograma (imagem em cache: só redesenha quando o batch, os bins ou o toggle mudam)
+    png = figures.render(figures.batch_histogram, vals.to_numpy(dtype=float), bins, show_mean)
+    st.image(png, use_container_width=True)
 
 # Tabela
 with st.expander("Ver tabela completa do batch"):
@@ -164,7 +130,7 @@ else:
 
         st.markdown(f"### {title}")
 
-        st.image(str(img_path), use_container_width=True)
+        st.image(read_report(img_path), use_container_width=True)
 
         st.caption(
             f"Figura — {title}. Resultado obtido durante os testes experimentais "
@@ -0,0 +1,129 @@
+import streamlit as st
+import pandas as pd
+
+import metrics
+from core import get_paths, get_embedding_cache, history_writer_metrics
+from figures import get_figure_cache
+from file_cache import get_file_cache
+from governor import get_governor, touch_session
+from model_registry import get_registry
+
+st.set_page_config(page_title="Diagnóstico", page_icon="🩺", layout="wide")
+
+paths = get_paths()
+
+st.title("🩺 Diagnóstico do servidor")
+st.caption("Memória do processo Streamlit, compartilhada por todas as sessões abertas.")
+
+governor = get_governor()
+touch_session(st.session_state.get("history"), st.session_state.get("history_stats"))
+
+
+def _mb(n: int) -> str:
+    return f"{n / (1024 * 1024):.1f} MB"
+
+
+# =========================================================
+# 1) MEMÓRIA
+# =========================================================
+report = governor.report()
+
+c1, c2, c3, c4 = st.columns(4)
+c1.metric("RSS do processo", _mb(report["rss_bytes"]))
+c2.metric("Históricos das sessões", _mb(report["sessions_bytes"]))
+c3.metric("Orçamento das sessões", _mb(report["budget_bytes"]))
+c4.metric("Figuras abertas (pyplot)", f"{report['open_figures']}")
+
+st.caption(
+    f"Sessões ociosas há mais de {governor.idle_seconds:.0f}s são compactadas primeiro quando o total passa "
+    f"do orçamento. Compactações até agora: {report['compactions']} ({_mb(report['compacted_bytes'])} liberados)."
+)
+
+st.subheader("Sessões")
+if report["sessions"]:
+    st.dataframe(pd.DataFrame(report["sessions"]), use_container_width=True)
+else:
+    st.info("Nenhuma sessão registrada ainda.")
+
+if st.button("🗜️ Compactar sessões ociosas agora"):
+    freed = governor.compact_idle()
+    st.success(f"{_mb(freed)} liberados.")
+
+st.divider()
+
+# =========================================================
+# 2) CACHES E ESCRITA
+# =========================================================
+st.subheader("Modelos carregados")
+registry = get_registry()
+model_stats = registry.stats()
+c1, c2, c3 = st.columns(3)
+c1.metric("Memória dos modelos", f"{_mb(model_stats['total_bytes'])} / {_mb(model_stats['budget_bytes'])}")
+c2.metric("Carregamentos", f"{model_stats['loads']}")
+c3.metric("Descartes (LRU)", f"{model_stats['evictions']}")
+if model_stats["models"]:
+    st.dataframe(pd.DataFrame(model_stats["models"]), use_container_width=True, hide_index=True)
+    to_unload = st.selectbox("Descarregar modelo", [m["model"] for m in model_stats["models"]])
+    if st.button("Descarregar"):
+        registry.unload(to_unload)
+        st.rerun()
+else:
+    st.caption("Nenhum modelo carregado neste processo ainda.")
+
+st.subheader("Cache de embeddings")
+cache_stats = get_embedding_cache(paths).stats()
+c1, c2, c3 = st.columns(3)
+c1.metric("Entradas em memória", f"{cache_stats['entries']}")
+c2.metric("Memória do cache", f"{_mb(cache_stats['bytes'])} / {_mb(cache_stats['max_bytes'])}")
+c3.metric("Acertos / faltas", f"{cache_stats['hits_memory'] + cache_stats['hits_disk']} / {cache_stats['misses']}")
+
+st.subheader("Cache de gráficos")
+figure_stats = get_figure_cache().stats()
+c1, c2, c3 = st.columns(3)
+c1.metric("Imagens em cache", f"{figure_stats['entries']}")
+c2.metric("Memória do cache", f"{_mb(figure_stats['bytes'])} / {_mb(figure_stats['max_bytes'])}")
+c3.metric("Acertos / faltas", f"{figure_stats['hits']} / {figure_stats['misses']}")
+
+st.subheader("Cache de arquivos (data/ e reports/)")
+file_stats = get_file_cache().stats()
+c1, c2 = st.columns(2)
+c1.metric("Arquivos/consultas em cache", f"{file_stats['entries']} / {file_stats['max_entries']}")
+c2.metric("Acertos / recargas", f"{file_stats['hits']} / {file_stats['misses']}")
+
+st.subheader("Gravação do histórico global")
+writer_metrics = history_writer_metrics(paths)
+if writer_metrics is None:
+    st.caption("Nada foi gravado no histórico global por este processo ainda.")
+else:
+    st.json(writer_metrics)
+
+st.divider()
+
+# =========================================================
+# 3) TEMPO POR ESTÁGIO
+# =========================================================
+st.subheader("Tempo por estágio (tokenização, forward, pooling, cosseno, histórico)")
+
+enabled = st.toggle("Medir estágios neste processo", value=metrics.ENABLED)
+if enabled and not metrics.ENABLED:
+    metrics.enable()
+elif not enabled and metrics.ENABLED:
+    metrics.disable()
+
+stage_rows = metrics.snapshot()
+if not stage_rows:
+    st.caption("Sem medições ainda. Ligue a medição e faça comparações (ou inicie com STS_METRICS=1).")
+else:
+    st.dataframe(pd.DataFrame(stage_rows), use_container_width=True, hide_index=True)
+    cm1, cm2 = st.columns(2)
+    with cm1:
+        st.download_button(
+            "⬇️ Baixar métricas (Prometheus)",
+            data=metrics.render_prometheus().encode("utf-8"),
+            file_name="metrics.prom",
+            mime="text/plain",
+        )
+    with cm2:
+        if st.button("Zerar métricas"):
+            metrics.reset()
+            st.rerun()
@@ -0,0 +1,94 @@
+from __future__ import annotations
+
+import multiprocessing as mp
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional, Sequence, Tuple
+
+from core import cosine_similarity_batch, load_model
+
+# Pool de processos para pontuação em massa na CPU.
+# Para um modelo pequeno (MiniLM) o paralelismo interno do torch satura cedo;
+# é mais eficiente ter N processos com poucas threads cada. Cada worker carrega
+# o modelo uma única vez (initializer) e recebe fatias contíguas dos pares; os
+# resultados voltam na ordem de entrada.
+
+_worker_model = None
+_worker_batch_size = 128
+
+
+def _init_worker(model_label: str, threads: int, batch_size: int) -> None:
+    global _worker_model, _worker_batch_size
+    import torch
+
+    torch.set_num_threads(threads)
+    try:
+        torch.set_num_interop_threads(1)
+    except RuntimeError:
+        # só pode ser definido antes do primeiro uso de paralelismo
+        pass
+    _worker_model = load_model(model_label)
+    _worker_batch_size = batch_size
+
+
+def _score_shard(pairs: Sequence[Tuple[str, str]]) -> List[float]:
+    return cosine_similarity_batch(_worker_model, pairs, batch_size=_worker_batch_size)
+
+
+def default_workers() -> int:
+    return max(1, os.cpu_count() or 1)
+
+
+class ScoringPool:
+    def __init__(
+        self,
+        model_label: str,
+        workers: Optional[int] = None,
+        threads_per_worker: int = 1,
+        batch_size: int = 128,
+        shard_size: int = 2048,
+    ):
+        self.model_label = model_label
+        self.workers = workers or default_workers()
+        self.threads_per_worker = threads_per_worker
+        self.batch_size = batch_size
+        self.shard_size = shard_size
+        # "spawn": fork depois de o torch inicializar threads pode travar
+        self._pool = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=mp.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(model_label, threads_per_worker, batch_size),
+        )
+
+    def score(self, pairs: Sequence[Tuple[str, str]]) -> List[float]:
+        pairs = list(pairs)
+        if not pairs:
+            return []
+        # fatias menores que shard_size quando há poucos pares, para ocupar todos os workers
+        size = max(1, min(self.shard_size, -(-len(pairs) // self.workers)))
+        shards = [pairs[i:i + size] for i in range(0, len(pairs), size)]
+        scores: List[float] = []
+        for part in self._pool.map(_score_shard, shards):
+            scores.extend(part)
+        return scores
+
+    def close(self) -> None:
+        self._pool.shutdown(wait=True)
+
+    def __enter__(self) -> "ScoringPool":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+def score_pairs_parallel(
+    model_label: str,
+    pairs: Sequence[Tuple[str, str]],
+    workers: Optional[int] = None,
+    threads_per_worker: int = 1,
+    batch_size: int = 128,
+) -> List[float]:
+    with ScoringPool(model_label, workers, threads_per_worker, batch_size) as pool:
+        return pool.score(pairs)
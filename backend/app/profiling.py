@@ -0,0 +1,221 @@
+from __future__ import annotations
+
+import argparse
+import atexit
+import json
+import os
+import platform
+import resource
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+# Modo de perfilamento sob demanda (--profile) para a CLI e os scripts de experimento.
+# Cada execução grava em reports/profiles/<data>_<nome>/:
+#   stacks.collapsed     pilhas Python amostradas, formato "a;b;c N" (flamegraph.pl, speedscope)
+#   torch_ops.txt        tabela por operador do profiler do torch (os primeiros
+#                        TORCH_ACTIVE_STEPS lotes de encode deste processo)
+#   tracemalloc_top.txt  linhas que mais alocaram memória Python ainda viva no fim
+#   summary.json         tempo de parede/CPU, pico de RSS, argv, versões e nº de amostras
+# Sem --profile nada disto é importado/iniciado. Comandos que não codificam
+# (start(..., uses_torch=False)) não importam o torch só para perfilar.
+
+DEFAULT_INTERVAL_MS = 10.0
+TRACEMALLOC_FRAMES = 5
+TOP_ALLOCATIONS = 30
+TORCH_ROW_LIMIT = 40
+# lotes de encode gravados pelo profiler do torch; o resto da execução não acumula eventos
+TORCH_ACTIVE_STEPS = 50
+
+
+def add_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        "--profile", action="store_true",
+        help="Grava perfil (pilhas, operadores do torch, memória) em reports/profiles/.",
+    )
+    parser.add_argument(
+        "--profile-interval-ms", type=float, default=DEFAULT_INTERVAL_MS,
+        help="Intervalo de amostragem das pilhas Python (ms).",
+    )
+
+
+def _frame_label(code: Any) -> str:
+    return f"{code.co_name} ({Path(code.co_filename).name}:{code.co_firstlineno})"
+
+
+class _StackSampler:
+    # amostra as pilhas de todas as threads (menos a própria) a cada `interval` segundos
+    def __init__(self, interval: float):
+        self.interval = interval
+        self.counts: Counter = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self) -> None:
+        me = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            names = {t.ident: t.name for t in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == me:
+                    continue
+                stack = []
+                while frame is not None:
+                    stack.append(_frame_label(frame.f_code))
+                    frame = frame.f_back
+                stack.append(names.get(ident, str(ident)))
+                self.counts[";".join(reversed(stack))] += 1
+            self.samples += 1
+
+    def write(self, path: Path) -> None:
+        with open(path, "w", encoding="utf-8") as f:
+            for stack, n in self.counts.most_common():
+                f.write(f"{stack} {n}\n")
+
+
+class Profile:
+    def __init__(
+        self,
+        name: str,
+        interval_ms: float = DEFAULT_INTERVAL_MS,
+        reports_dir: Optional[Path] = None,
+        uses_torch: bool = True,
+    ):
+        if reports_dir is None:
+            from core import get_paths
+            reports_dir = get_paths().reports_dir
+        self.name = name
+        self.run_dir = reports_dir / "profiles" / f"{datetime.now():%Y%m%d_%H%M%S}_{name}"
+        self.sampler = _StackSampler(interval_ms / 1000)
+        self.uses_torch = uses_torch
+        self._torch_prof = None
+        self._steps = 0
+        self._lock = threading.Lock()
+        self._stopped = False
+
+    def start(self) -> "Profile":
+        self.run_dir.mkdir(parents=True, exist_ok=True)
+        self._t0 = time.perf_counter()
+        self._cpu0 = time.process_time()
+        # importa torch/sentence-transformers antes de ligar o tracemalloc: importar
+        # sob rastreamento deixa a carga do modelo várias vezes mais lenta. Quem não
+        # codifica não paga o import (a menos que o torch já esteja carregado).
+        torch = None
+        if self.uses_torch or "torch" in sys.modules:
+            try:
+                import torch
+                import sentence_transformers  # noqa: F401
+            except ImportError:
+                torch = None
+        tracemalloc.start(TRACEMALLOC_FRAMES)
+        if torch is not None:
+            # um passo = um lote de encode (step() em core); depois de TORCH_ACTIVE_STEPS
+            # o profiler para de gravar e a memória não cresce em jobs longos
+            self._torch_prof = torch.profiler.profile(
+                activities=[torch.profiler.ProfilerActivity.CPU],
+                schedule=torch.profiler.schedule(wait=0, warmup=0, active=TORCH_ACTIVE_STEPS, repeat=1),
+            )
+            self._torch_prof.__enter__()
+        self.sampler.start()
+        return self
+
+    def step(self) -> None:
+        with self._lock:
+            if self._torch_prof is not None and not self._stopped and self._steps < TORCH_ACTIVE_STEPS:
+                self._steps += 1
+                self._torch_prof.step()
+
+    def stop(self) -> Path:
+        global ACTIVE
+        with self._lock:
+            if self._stopped:
+                return self.run_dir
+            self._stopped = True
+        if ACTIVE is self:
+            ACTIVE = None
+        self.sampler.stop()
+        wall = time.perf_counter() - self._t0
+        cpu = time.process_time() - self._cpu0
+
+        # snapshot antes de agregar os eventos do torch: key_averages() aloca muito
+        # e dominaria o topo do tracemalloc
+        snapshot = tracemalloc.take_snapshot()
+        _, traced_peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        with open(self.run_dir / "tracemalloc_top.txt", "w", encoding="utf-8") as f:
+            for stat in snapshot.statistics("lineno")[:TOP_ALLOCATIONS]:
+                f.write(f"{stat.size / 1024:10.1f} KiB  {stat.count:8d} blocos  {stat.traceback}\n")
+
+        torch_note = "torch indisponível"
+        if self._torch_prof is not None:
+            self._torch_prof.__exit__(None, None, None)
+            events = self._torch_prof.key_averages()
+            # com --workers > 1 os encodes rodam em outros processos e não aparecem aqui
+            table = events.table(sort_by="self_cpu_time_total", row_limit=TORCH_ROW_LIMIT) if len(events) else ""
+            (self.run_dir / "torch_ops.txt").write_text(table or "(nenhum operador do torch neste processo)\n",
+                                                        encoding="utf-8")
+            torch_note = f"{len(events)} operadores em {self._steps} lote(s) de encode (máx. {TORCH_ACTIVE_STEPS})"
+
+        self.sampler.write(self.run_dir / "stacks.collapsed")
+
+        # ru_maxrss: KiB no Linux, bytes no macOS
+        scale = 1 if sys.platform == "darwin" else 1024
+        summary: Dict[str, Any] = {
+            "name": self.name,
+            "argv": sys.argv,
+            "wall_s": round(wall, 3),
+            "cpu_s": round(cpu, 3),
+            "peak_rss_bytes": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale,
+            "peak_rss_children_bytes": resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss * scale,
+            "tracemalloc_peak_bytes": traced_peak,
+            "stack_samples": self.sampler.samples,
+            "sample_interval_ms": self.sampler.interval * 1000,
+            "torch": torch_note,
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "pid": os.getpid(),
+        }
+        (self.run_dir / "summary.json").write_text(json.dumps(summary, indent=2, ensure_ascii=False), encoding="utf-8")
+        print(f"\nPerfil gravado em {self.run_dir}", file=sys.stderr)
+        return self.run_dir
+
+    def __enter__(self) -> "Profile":
+        return self.start()
+
+    def __exit__(self, *exc: Any) -> None:
+        self.stop()
+
+
+# perfil em curso no processo; core chama step() a cada lote de encode
+ACTIVE: Optional[Profile] = None
+
+
+def step() -> None:
+    profile = ACTIVE
+    if profile is not None:
+        profile.step()
+
+
+def start(name: str, args: argparse.Namespace, uses_torch: bool = True) -> Optional[Profile]:
+    # atalho para scripts: com --profile inicia agora e grava ao sair do interpretador
+    global ACTIVE
+    if not getattr(args, "profile", False):
+        return None
+    profile = Profile(
+        name, getattr(args, "profile_interval_ms", DEFAULT_INTERVAL_MS), uses_torch=uses_torch
+    ).start()
+    ACTIVE = profile
+    atexit.register(profile.stop)
+    return profile
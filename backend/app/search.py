@@ -0,0 +1,116 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, List, Optional, Tuple
+
+import numpy as np
+
+from core import EmbeddingCache, encode_texts
+from embedding_store import EmbeddingStore
+
+if TYPE_CHECKING:
+    from sentence_transformers import SentenceTransformer
+
+    from ann import IVFIndex
+
+# linhas por bloco do produto matriz-vetor (~96 MB por bloco com dim=384 em float32)
+DEFAULT_BLOCK_ROWS = 65_536
+
+
+@dataclass(frozen=True)
+class SearchHit:
+    rank: int
+    index: int
+    id: int
+    score: float
+    text: str
+
+
+def top_k_scores(
+    vectors: np.ndarray,
+    query: np.ndarray,
+    k: int,
+    block_rows: int = DEFAULT_BLOCK_ROWS,
+) -> Tuple[np.ndarray, np.ndarray]:
+    # percorre a matriz (memmap ou ndarray) em blocos e mantém só os k melhores
+    # candidatos; argpartition evita ordenar o corpus inteiro
+    n = vectors.shape[0]
+    k = min(k, n)
+    if k <= 0:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)
+
+    query = np.asarray(query, dtype=vectors.dtype).ravel()
+    best_idx = np.zeros(0, dtype=np.int64)
+    best_scores = np.zeros(0, dtype=np.float32)
+
+    for start in range(0, n, block_rows):
+        scores = np.asarray(vectors[start:start + block_rows]) @ query
+        if scores.shape[0] > k:
+            part = np.argpartition(scores, -k)[-k:]
+        else:
+            part = np.arange(scores.shape[0])
+
+        best_idx = np.concatenate([best_idx, part + start])
+        best_scores = np.concatenate([best_scores, scores[part].astype(np.float32)])
+        if best_scores.shape[0] > k:
+            keep = np.argpartition(best_scores, -k)[-k:]
+            best_idx, best_scores = best_idx[keep], best_scores[keep]
+
+    order = np.argsort(-best_scores, kind="stable")
+    return best_idx[order], best_scores[order]
+
+
+def make_hits(store: EmbeddingStore, idx: np.ndarray, scores: np.ndarray) -> List[SearchHit]:
+    return [
+        SearchHit(
+            rank=rank,
+            index=int(i),
+            id=int(store.ids[i]),
+            score=float(s),
+            text=store.text(int(i)),
+        )
+        for rank, (i, s) in enumerate(zip(idx, scores), start=1)
+    ]
+
+
+class SemanticSearcher:
+    # Busca top-k: embute a consulta uma vez e compara com o store inteiro
+    # (exato) ou só com as listas sondadas de um índice IVF (aproximado).
+
+    def __init__(
+        self,
+        store: EmbeddingStore,
+        model: SentenceTransformer,
+        cache: Optional[EmbeddingCache] = None,
+        block_rows: int = DEFAULT_BLOCK_ROWS,
+        index: Optional[IVFIndex] = None,
+        nprobe: int = 8,
+    ):
+        store.check_model(model)
+        self.store = store
+        self.model = model
+        self.cache = cache
+        self.block_rows = block_rows
+        self.index = index
+        self.nprobe = nprobe
+
+    def search_vector(self, query_vec: np.ndarray, k: int = 10) -> List[SearchHit]:
+        if self.index is not None:
+            idx, scores = self.index.search_vector(query_vec, k, nprobe=self.nprobe)
+        else:
+            idx, scores = top_k_scores(self.store.vectors, query_vec, k, self.block_rows)
+        return make_hits(self.store, idx, scores)
+
+    def search(self, query: str, k: int = 10) -> List[SearchHit]:
+        query_vec = encode_texts(self.model, [query], cache=self.cache)[0]
+        return self.search_vector(query_vec, k)
+
+
+def search(
+    store: EmbeddingStore,
+    model: SentenceTransformer,
+    query: str,
+    k: int = 10,
+    cache: Optional[EmbeddingCache] = None,
+) -> List[SearchHit]:
+    return SemanticSearcher(store, model, cache=cache).search(query, k)
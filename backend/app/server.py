@@ -0,0 +1,350 @@
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Deque, Dict, List, Optional, Tuple, Union
+
+import numpy as np
+
+import metrics
+from core import MODELS, EmbeddingCache, encode_texts, get_embedding_cache, get_paths
+from embedding_store import EmbeddingStore
+from model_registry import get_registry
+from search import SemanticSearcher
+
+# Servidor HTTP local (somente stdlib/asyncio, sem dependências novas).
+#
+#   POST /similarity  {"text_a": "...", "text_b": "..."} ou {"pairs": [[a, b], ...]}
+#   POST /embed       {"texts": ["...", ...]}
+#   POST /search      {"query": "...", "k": 10}          (requer --store)
+#   GET  /health      status, tamanho da fila, latências p50/p99 e modelos carregados
+#   GET  /metrics     métricas por estágio no formato texto do Prometheus (--metrics)
+#
+# Requisições concorrentes entram numa asyncio.Queue; o MicroBatcher junta os
+# textos que chegam dentro da janela de latência (ou até max_batch) e roda um
+# único encode para todos, fora do event loop.
+
+MAX_BODY_BYTES = 8 * 1024 * 1024
+
+
+@dataclass
+class _Job:
+    texts: List[str]
+    future: asyncio.Future
+
+
+class MicroBatcher:
+    def __init__(
+        self,
+        model,
+        max_batch: int = 128,
+        max_wait_ms: float = 5.0,
+        cache: Optional[EmbeddingCache] = None,
+    ):
+        self.model = model
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000
+        self.cache = cache
+        self.queue: "asyncio.Queue[_Job]" = asyncio.Queue()
+        self.batches = 0
+        self.batched_texts = 0
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+    async def embed(self, texts: List[str]) -> np.ndarray:
+        future = asyncio.get_running_loop().create_future()
+        await self.queue.put(_Job(texts, future))
+        return await future
+
+    async def _collect(self) -> List[_Job]:
+        # espera o primeiro pedido e junta outros até encher o lote ou vencer a janela
+        jobs = [await self.queue.get()]
+        size = len(jobs[0].texts)
+        deadline = asyncio.get_running_loop().time() + self.max_wait
+        while size < self.max_batch:
+            timeout = deadline - asyncio.get_running_loop().time()
+            if timeout <= 0:
+                break
+            try:
+                job = await asyncio.wait_for(self.queue.get(), timeout)
+            except asyncio.TimeoutError:
+                break
+            jobs.append(job)
+            size += len(job.texts)
+        return jobs
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            jobs = await self._collect()
+            texts = [t for job in jobs for t in job.texts]
+            try:
+                emb = await loop.run_in_executor(
+                    None, lambda: encode_texts(self.model, texts, batch_size=self.max_batch, cache=self.cache)
+                )
+            except Exception as exc:  # devolve o erro a todos os pedidos do lote
+                for job in jobs:
+                    if not job.future.done():
+                        job.future.set_exception(exc)
+                continue
+
+            self.batches += 1
+            self.batched_texts += len(texts)
+            start = 0
+            for job in jobs:
+                end = start + len(job.texts)
+                if not job.future.done():
+                    job.future.set_result(emb[start:end])
+                start = end
+
+
+class LatencyWindow:
+    # últimas N latências para p50/p99 no /health
+    def __init__(self, size: int = 10_000):
+        self.values: Deque[float] = deque(maxlen=size)
+
+    def add(self, ms: float) -> None:
+        self.values.append(ms)
+
+    def summary(self) -> Dict[str, float]:
+        if not self.values:
+            return {"count": 0}
+        arr = np.fromiter(self.values, dtype=np.float64)
+        return {
+            "count": int(arr.shape[0]),
+            "p50_ms": round(float(np.percentile(arr, 50)), 3),
+            "p99_ms": round(float(np.percentile(arr, 99)), 3),
+            "max_ms": round(float(arr.max()), 3),
+        }
+
+
+class HttpError(Exception):
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+_REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+            413: "Payload Too Large", 500: "Internal Server Error"}
+
+
+class SimilarityServer:
+    def __init__(
+        self,
+        model_label: str,
+        store: Optional[EmbeddingStore] = None,
+        max_batch: int = 128,
+        max_wait_ms: float = 5.0,
+        use_cache: bool = False,
+    ):
+        self.model_label = model_label
+        # com --store, o backend (torch/int8/onnx) é o mesmo com que o store foi construído
+        backend = store.backend if store is not None else None
+        # pré-carga com aquecimento: o primeiro pedido não paga as inicializações preguiçosas
+        registry = get_registry()
+        registry.warmup(model_label, backend)
+        self.model = registry.get(model_label, backend)
+        cache = get_embedding_cache(get_paths()) if use_cache else None
+        self.batcher = MicroBatcher(self.model, max_batch, max_wait_ms, cache)
+        self.searcher = SemanticSearcher(store, self.model) if store is not None else None
+        self.latency: Dict[str, LatencyWindow] = {}
+
+    # ---------- endpoints ----------
+
+    async def similarity(self, body: dict) -> dict:
+        if "pairs" in body:
+            raw = body["pairs"]
+            if not isinstance(raw, list) or not all(isinstance(p, list) and len(p) == 2 for p in raw):
+                raise HttpError(400, "'pairs' deve ser uma lista de pares [texto_a, texto_b].")
+            pairs = [(str(a), str(b)) for a, b in raw]
+        elif "text_a" in body and "text_b" in body:
+            pairs = [(str(body["text_a"]), str(body["text_b"]))]
+        else:
+            raise HttpError(400, "Envie 'text_a' e 'text_b' ou 'pairs'.")
+        if not pairs:
+            return {"model": MODELS[self.model_label], "scores": []}
+
+        texts = [t for pair in pairs for t in pair]
+        emb = await self.batcher.embed(texts)
+        scores = np.einsum("ij,ij->i", emb[0::2], emb[1::2])
+        return {"model": MODELS[self.model_label], "scores": [round(float(s), 6) for s in scores]}
+
+    async def embed(self, body: dict) -> dict:
+        texts = body.get("texts")
+        if not isinstance(texts, list):
+            raise HttpError(400, "Envie 'texts' como lista.")
+        emb = await self.batcher.embed([str(t) for t in texts]) if texts else np.zeros((0, 0))
+        return {"model": MODELS[self.model_label], "embeddings": emb.tolist()}
+
+    async def search(self, body: dict) -> dict:
+        if self.searcher is None:
+            raise HttpError(404, "Servidor iniciado sem --store.")
+        query = body.get("query")
+        if not isinstance(query, str) or not query:
+            raise HttpError(400, "Envie 'query'.")
+        k = body.get("k", 10)
+        if not isinstance(k, int) or isinstance(k, bool) or k < 1:
+            raise HttpError(400, "'k' deve ser um inteiro positivo.")
+        query_vec = (await self.batcher.embed([query]))[0]
+        hits = await asyncio.get_running_loop().run_in_executor(
+            None, self.searcher.search_vector, query_vec, k
+        )
+        return {"hits": [{"rank": h.rank, "id": h.id, "score": round(h.score, 6), "text": h.text} for h in hits]}
+
+    def health(self) -> dict:
+        return {
+            "status": "ok",
+            "model": MODELS[self.model_label],
+            "queue_depth": self.batcher.queue.qsize(),
+            "batches": self.batcher.batches,
+            "avg_batch_size": round(self.batcher.batched_texts / max(1, self.batcher.batches), 2),
+            "latency": {route: w.summary() for route, w in self.latency.items()},
+            "models": get_registry().stats(),
+        }
+
+    # ---------- HTTP ----------
+
+    async def dispatch(self, method: str, route: str, body: bytes) -> Tuple[int, Union[dict, str]]:
+        if route == "/health":
+            return 200, self.health()
+        if route == "/metrics":
+            # texto puro para o coletor local (ver metrics.render_prometheus)
+            return 200, metrics.render_prometheus()
+
+        handlers = {"/similarity": self.similarity, "/embed": self.embed, "/search": self.search}
+        handler = handlers.get(route)
+        if handler is None:
+            raise HttpError(404, f"Rota desconhecida: {route}")
+        if method != "POST":
+            raise HttpError(405, "Use POST.")
+        try:
+            payload = json.loads(body or b"{}")
+        except ValueError:
+            raise HttpError(400, "JSON inválido.")
+        if not isinstance(payload, dict):
+            raise HttpError(400, "O corpo deve ser um objeto JSON.")
+        return 200, await handler(payload)
+
+    @staticmethod
+    async def _respond(
+        writer: asyncio.StreamWriter, status: int, result: Union[dict, str], keep_alive: bool
+    ) -> None:
+        if isinstance(result, str):
+            content_type = "text/plain; version=0.0.4; charset=utf-8"
+            data = result.encode("utf-8")
+        else:
+            content_type = "application/json; charset=utf-8"
+            data = json.dumps(result, ensure_ascii=False).encode("utf-8")
+        writer.write(
+            f"HTTP/1.1 {status} {_REASONS.get(status, '')}\r\n"
+            f"Content-Type: {content_type}\r\n"
+            f"Content-Length: {len(data)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode("latin-1")
+            + data
+        )
+        await writer.drain()
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                parts = request_line.decode("latin-1").split()
+                if len(parts) != 3:
+                    await self._respond(writer, 400, {"error": "Linha de requisição inválida."}, keep_alive=False)
+                    break
+                method, target, _ = parts
+                headers: Dict[str, str] = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+
+                t0 = time.perf_counter()
+                route = target.split("?", 1)[0]
+                keep_alive = headers.get("connection", "").lower() != "close"
+                body_read = False
+                try:
+                    try:
+                        length = int(headers.get("content-length", "0"))
+                    except ValueError:
+                        raise HttpError(400, "Content-Length inválido.")
+                    if length < 0:
+                        raise HttpError(400, "Content-Length inválido.")
+                    if length > MAX_BODY_BYTES:
+                        raise HttpError(413, "Corpo muito grande.")
+                    body = await reader.readexactly(length) if length else b""
+                    body_read = True
+                    status, result = await self.dispatch(method.upper(), route, body)
+                except HttpError as exc:
+                    status, result = exc.status, {"error": str(exc)}
+                except Exception as exc:
+                    status, result = 500, {"error": f"{type(exc).__name__}: {exc}"}
+                if not body_read:
+                    # corpo recusado sem ser lido: os bytes dele não podem virar a próxima requisição
+                    keep_alive = False
+
+                if status == 200 and route not in ("/health", "/metrics"):
+                    self.latency.setdefault(route, LatencyWindow()).add((time.perf_counter() - t0) * 1000)
+
+                await self._respond(writer, status, result, keep_alive)
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self, host: str, port: int) -> None:
+        self.batcher.start()
+        server = await asyncio.start_server(self.handle, host, port)
+        print(f"Servidor em http://{host}:{port} (modelo {MODELS[self.model_label]})")
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            await self.batcher.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serviço HTTP local de similaridade com micro-batching.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--model", default="Multilingual (final)", choices=list(MODELS))
+    parser.add_argument("--store", default=None, help="Store em data/stores/ para o endpoint /search.")
+    parser.add_argument("--max-batch", type=int, default=128, help="Máximo de textos por encode.")
+    parser.add_argument("--max-wait-ms", type=float, default=5.0, help="Janela para juntar pedidos.")
+    parser.add_argument("--cache", action="store_true", help="Usa o cache de embeddings em data/.")
+    parser.add_argument("--metrics", action="store_true", help="Liga as métricas por estágio (GET /metrics).")
+    args = parser.parse_args()
+
+    if args.metrics:
+        metrics.enable()
+
+    store = EmbeddingStore.open(get_paths().stores_dir / args.store) if args.store else None
+    server = SimilarityServer(args.model, store, args.max_batch, args.max_wait_ms, args.cache)
+    try:
+        asyncio.run(server.serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
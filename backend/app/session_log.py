@@ -0,0 +1,246 @@
+from __future__ import annotations
+
+import itertools
+import shutil
+import sys
+import tempfile
+import threading
+import weakref
+from array import array
+from pathlib import Path
+from typing import IO, Any, Dict, Iterator, List, Mapping, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+# Histórico da sessão em colunas (em vez de pd.concat a cada comparação):
+#   - numéricos em array("d"), rótulos (modelo/classificação) internados em
+#     array("H") com uma tabela de valores, textos em listas;
+#   - append é O(1) amortizado;
+#   - acima de `max_rows` em memória, a metade mais antiga vai para um
+#     segmento .npz compactado num diretório temporário da sessão;
+#   - to_frame() monta o DataFrame só quando a página precisa mostrar/exportar;
+#   - um lock protege escrita/compactação: o governador de memória pode chamar
+#     spill_all() de outra thread (outra sessão).
+
+SESSION_MEMORY_ROWS = 5_000
+
+COLUMNS = [
+    "timestamp",
+    "model_label",
+    "model_name",
+    "text_a",
+    "text_b",
+    "similarity",
+    "percent",
+    "classificacao",
+]
+
+_TEXT = ("timestamp", "text_a", "text_b")
+_NUMERIC = ("similarity", "percent")
+_INTERNED = ("model_label", "model_name", "classificacao")
+
+
+class _Interner:
+    # código 0 = ausente (None/NaN)
+    def __init__(self):
+        self.values: List[Optional[str]] = [None]
+        self._codes: Dict[str, int] = {}
+
+    def code(self, value: Any) -> int:
+        if value is None or value != value:
+            return 0
+        value = str(value)
+        code = self._codes.get(value)
+        if code is None:
+            code = len(self.values)
+            self.values.append(value)
+            self._codes[value] = code
+        return code
+
+    def decode(self, codes: np.ndarray) -> pd.Categorical:
+        # categorias compartilhadas por todas as partes: o concat continua categórico
+        return pd.Categorical.from_codes(codes.astype(np.int64) - 1, categories=self.values[1:])
+
+
+def _to_float(value: Any) -> float:
+    try:
+        return float(str(value).replace(",", "."))
+    except (TypeError, ValueError):
+        return float("nan")
+
+
+def _pack_texts(values: List[str]) -> Dict[str, np.ndarray]:
+    encoded = [v.encode("utf-8") for v in values]
+    offsets = np.cumsum([len(e) for e in encoded], dtype=np.int64)
+    return {"blob": np.frombuffer(b"".join(encoded), dtype=np.uint8), "offsets": offsets}
+
+
+def _unpack_texts(blob: np.ndarray, offsets: np.ndarray) -> List[str]:
+    raw = blob.tobytes()
+    starts = np.concatenate([[0], offsets[:-1]])
+    return [raw[s:e].decode("utf-8") for s, e in zip(starts.tolist(), offsets.tolist())]
+
+
+class SessionLog:
+    def __init__(self, max_rows: int = SESSION_MEMORY_ROWS, spill_dir: Optional[Path] = None):
+        self.max_rows = max(2, max_rows)
+        self._spill_root = Path(spill_dir) if spill_dir is not None else None
+        self._spill_dir: Optional[Path] = None
+        self._segments: List[Path] = []
+        self._spilled_rows = 0
+        self._interners = {name: _Interner() for name in _INTERNED}
+        self._lock = threading.RLock()
+        self._reset_memory()
+
+    def _reset_memory(self) -> None:
+        self._text: Dict[str, List[str]] = {name: [] for name in _TEXT}
+        self._num: Dict[str, array] = {name: array("d") for name in _NUMERIC}
+        self._codes: Dict[str, array] = {name: array("H") for name in _INTERNED}
+
+    # ---------- escrita ----------
+
+    def append(self, row: Mapping[str, Any]) -> None:
+        with self._lock:
+            for name in _TEXT:
+                value = row.get(name)
+                self._text[name].append("" if value is None else str(value))
+            for name in _NUMERIC:
+                self._num[name].append(_to_float(row.get(name)))
+            for name in _INTERNED:
+                self._codes[name].append(self._interners[name].code(row.get(name)))
+
+            if self.memory_rows >= self.max_rows:
+                self._spill(self.memory_rows // 2)
+
+    def _spill(self, n: int) -> None:
+        if self._spill_dir is None:
+            if self._spill_root is not None:
+                self._spill_root.mkdir(parents=True, exist_ok=True)
+            self._spill_dir = Path(tempfile.mkdtemp(prefix="session_log_", dir=self._spill_root))
+            # apaga os segmentos quando a sessão (e o log) deixar de existir
+            weakref.finalize(self, shutil.rmtree, str(self._spill_dir), True)
+
+        arrays: Dict[str, np.ndarray] = {}
+        for name in _TEXT:
+            packed = _pack_texts(self._text[name][:n])
+            arrays[f"{name}__blob"] = packed["blob"]
+            arrays[f"{name}__offsets"] = packed["offsets"]
+            del self._text[name][:n]
+        for name in _NUMERIC:
+            arrays[name] = np.frombuffer(self._num[name], dtype=np.float64)[:n].copy()
+            del self._num[name][:n]
+        for name in _INTERNED:
+            arrays[name] = np.frombuffer(self._codes[name], dtype=np.uint16)[:n].copy()
+            del self._codes[name][:n]
+
+        path = self._spill_dir / f"segment_{len(self._segments):05d}.npz"
+        np.savez_compressed(path, **arrays)
+        self._segments.append(path)
+        self._spilled_rows += n
+
+    def spill_all(self) -> int:
+        # compacta: tudo o que está em memória vai para disco (sessão ociosa sob pressão)
+        with self._lock:
+            n = self.memory_rows
+            if n:
+                self._spill(n)
+            return n
+
+    def clear(self) -> None:
+        with self._lock:
+            for path in self._segments:
+                path.unlink(missing_ok=True)
+            self._segments = []
+            self._spilled_rows = 0
+            self._reset_memory()
+
+    # ---------- leitura ----------
+
+    @property
+    def memory_rows(self) -> int:
+        return len(self._num["percent"])
+
+    @property
+    def spilled_rows(self) -> int:
+        return self._spilled_rows
+
+    def __len__(self) -> int:
+        return self._spilled_rows + self.memory_rows
+
+    @property
+    def empty(self) -> bool:
+        return len(self) == 0
+
+    def _memory_columns(self) -> Dict[str, Any]:
+        cols: Dict[str, Any] = {name: list(self._text[name]) for name in _TEXT}
+        for name in _NUMERIC:
+            cols[name] = np.frombuffer(self._num[name], dtype=np.float64).copy()
+        for name in _INTERNED:
+            cols[name] = self._interners[name].decode(np.frombuffer(self._codes[name], dtype=np.uint16))
+        return cols
+
+    def _segment_columns(self, path: Path) -> Dict[str, Any]:
+        with np.load(path) as data:
+            cols: Dict[str, Any] = {
+                name: _unpack_texts(data[f"{name}__blob"], data[f"{name}__offsets"]) for name in _TEXT
+            }
+            for name in _NUMERIC:
+                cols[name] = data[name]
+            for name in _INTERNED:
+                cols[name] = self._interners[name].decode(data[name])
+        return cols
+
+    def _snapshot(self) -> Tuple[List[Path], Dict[str, Any]]:
+        # segmentos + cópia das colunas em memória, consistentes entre si
+        with self._lock:
+            return list(self._segments), self._memory_columns()
+
+    def to_frame(self, include_spilled: bool = True, newest_first: bool = False) -> pd.DataFrame:
+        segments, memory = self._snapshot()
+        parts = [self._segment_columns(p) for p in segments] if include_spilled else []
+        parts.append(memory)
+        frames = [pd.DataFrame(cols, columns=COLUMNS) for cols in parts]
+        df = pd.concat(frames, ignore_index=True) if len(frames) > 1 else frames[0]
+        return df.iloc[::-1].reset_index(drop=True) if newest_first else df
+
+    def export_csv(self, min_percent: Optional[float] = None) -> IO[bytes]:
+        # CSV da sessão inteira num arquivo temporário, um segmento por vez: o
+        # histórico que foi para disco não volta todo para a memória
+        segments, memory = self._snapshot()
+        out = tempfile.TemporaryFile()
+        parts = itertools.chain((self._segment_columns(p) for p in segments), [memory])
+        for i, cols in enumerate(parts):
+            frame = pd.DataFrame(cols, columns=COLUMNS)
+            if min_percent is not None:
+                frame = frame[frame["percent"] >= min_percent]
+            frame.to_csv(out, index=False, header=i == 0, encoding="utf-8")
+        out.seek(0)
+        return out
+
+    def records(self) -> Iterator[Dict[str, Any]]:
+        # linhas como dicionários, das mais antigas às mais novas (segmentos primeiro)
+        segments, memory = self._snapshot()
+        parts = itertools.chain((self._segment_columns(p) for p in segments), [memory])
+        for cols in parts:
+            n = len(cols["percent"])
+            for i in range(n):
+                yield {name: cols[name][i] for name in COLUMNS}
+
+    def memory_bytes(self) -> int:
+        # aproximado: buffers dos arrays + objetos str das colunas de texto
+        with self._lock:
+            total = sum(a.itemsize * len(a) for a in self._num.values())
+            total += sum(a.itemsize * len(a) for a in self._codes.values())
+            total += sum(sys.getsizeof(s) for col in self._text.values() for s in col)
+            return total
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "rows": len(self),
+            "memory_rows": self.memory_rows,
+            "spilled_rows": self._spilled_rows,
+            "segments": len(self._segments),
+            "memory_bytes": self.memory_bytes(),
+            "disk_bytes": sum(p.stat().st_size for p in self._segments if p.exists()),
+        }
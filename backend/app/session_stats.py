@@ -0,0 +1,138 @@
+from __future__ import annotations
+
+import heapq
+import itertools
+import math
+from array import array
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+
+# Agregados da sessão mantidos a cada comparação (em vez de recalcular tudo a
+# cada rerun do Streamlit): contagem, soma, mínimo/máximo, histograma fino de
+# bins fixos em -100..100, contagem e histograma por classificação e os 5
+# maiores/menores resultados em heaps. Histogramas com outra granularidade e
+# quantis (boxplot) saem do histograma fino, sem tocar nas linhas.
+
+PERCENT_RANGE = (-100.0, 100.0)
+FINE_BINS = 400  # 0,5 ponto percentual por bin
+TOP_N = 5
+
+_EDGES = np.linspace(PERCENT_RANGE[0], PERCENT_RANGE[1], FINE_BINS + 1)
+_CENTERS = (_EDGES[:-1] + _EDGES[1:]) / 2
+
+
+def _fine_bin(percent: float) -> int:
+    lo, hi = PERCENT_RANGE
+    pos = int((percent - lo) / (hi - lo) * FINE_BINS)
+    return min(max(pos, 0), FINE_BINS - 1)
+
+
+def _to_float(value: Any) -> Optional[float]:
+    # aceita vírgula decimal ("-12,3"), como nos históricos antigos
+    try:
+        out = float(str(value).replace(",", "."))
+    except (TypeError, ValueError):
+        return None
+    return None if math.isnan(out) else out
+
+
+class SessionStats:
+    def __init__(self, top_n: int = TOP_N):
+        self.top_n = top_n
+        self.count = 0
+        self.sum = 0.0
+        self.min: Optional[float] = None
+        self.max: Optional[float] = None
+        self.sim_sum = 0.0
+        self.sim_count = 0
+        self.sim_min: Optional[float] = None
+        self.sim_max: Optional[float] = None
+        self.fine_hist = np.zeros(FINE_BINS, dtype=np.int64)
+        self.class_counts: Dict[str, int] = {}
+        self.class_hist: Dict[str, np.ndarray] = {}
+        # percentuais na ordem de chegada (gráfico de evolução): 4 bytes por comparação
+        self.series = array("f")
+        self._seq = itertools.count()
+        self._top: List[Tuple[float, int, Mapping[str, Any]]] = []
+        self._bottom: List[Tuple[float, int, Mapping[str, Any]]] = []
+
+    def add(self, row: Mapping[str, Any]) -> None:
+        percent = _to_float(row.get("percent"))
+        if percent is None:
+            return
+        self.count += 1
+        self.sum += percent
+        self.min = percent if self.min is None else min(self.min, percent)
+        self.max = percent if self.max is None else max(self.max, percent)
+        self.series.append(percent)
+
+        b = _fine_bin(percent)
+        self.fine_hist[b] += 1
+        label = row.get("classificacao")
+        if label is not None and label == label:  # descarta NaN
+            label = str(label)
+            self.class_counts[label] = self.class_counts.get(label, 0) + 1
+            self.class_hist.setdefault(label, np.zeros(FINE_BINS, dtype=np.int64))[b] += 1
+
+        sim = _to_float(row.get("similarity"))
+        if sim is not None:
+            self.sim_count += 1
+            self.sim_sum += sim
+            self.sim_min = sim if self.sim_min is None else min(self.sim_min, sim)
+            self.sim_max = sim if self.sim_max is None else max(self.sim_max, sim)
+
+        # heaps de tamanho fixo: top guarda os maiores, bottom os menores (sinal invertido)
+        seq = next(self._seq)
+        item = dict(row)
+        for heap, key in ((self._top, percent), (self._bottom, -percent)):
+            if len(heap) < self.top_n:
+                heapq.heappush(heap, (key, seq, item))
+            elif key > heap[0][0]:
+                heapq.heapreplace(heap, (key, seq, item))
+
+    @classmethod
+    def from_records(cls, rows: Iterable[Mapping[str, Any]], top_n: int = TOP_N) -> "SessionStats":
+        stats = cls(top_n)
+        for row in rows:
+            stats.add(row)
+        return stats
+
+    # ---------- leitura ----------
+
+    @property
+    def mean(self) -> Optional[float]:
+        return self.sum / self.count if self.count else None
+
+    @property
+    def sim_mean(self) -> Optional[float]:
+        return self.sim_sum / self.sim_count if self.sim_count else None
+
+    def nbytes(self) -> int:
+        total = self.fine_hist.nbytes + sum(h.nbytes for h in self.class_hist.values())
+        return total + self.series.itemsize * len(self.series)
+
+    def histogram(self, bins: int, classificacao: Optional[str] = None) -> Tuple[np.ndarray, np.ndarray]:
+        # reagrupa o histograma fino em `bins` faixas de -100..100 (resolução de 0,5 ponto)
+        fine = self.fine_hist if classificacao is None else self.class_hist.get(classificacao)
+        if fine is None:
+            fine = np.zeros(FINE_BINS, dtype=np.int64)
+        return np.histogram(_CENTERS, bins=bins, range=PERCENT_RANGE, weights=fine)
+
+    def quantiles(self, qs: Sequence[float]) -> List[Optional[float]]:
+        # quantis aproximados pelo centro do bin fino (erro máximo de 0,25 ponto)
+        if not self.count:
+            return [None for _ in qs]
+        cum = np.cumsum(self.fine_hist)
+        out = []
+        for q in qs:
+            idx = int(np.searchsorted(cum, q * self.count, side="left"))
+            value = float(_CENTERS[min(idx, FINE_BINS - 1)])
+            out.append(min(max(value, self.min), self.max))
+        return out
+
+    def top(self) -> List[Mapping[str, Any]]:
+        return [row for _, _, row in sorted(self._top, key=lambda t: (-t[0], t[1]))]
+
+    def bottom(self) -> List[Mapping[str, Any]]:
+        return [row for _, _, row in sorted(self._bottom, key=lambda t: (-t[0], t[1]))]
@@ -0,0 +1,63 @@
+import argparse
+import sys
+import time
+from pathlib import Path
+
+# permite importar o core da aplicação (backend/app)
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "app"))
+
+from allpairs import MODES, all_pairs
+from core import MODELS, get_embedding_cache, get_paths
+from model_registry import get_model
+from semantic_search import iter_texts
+import profiling
+
+DEFAULT_MODEL = "Multilingual (final)"
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Similaridade N x M entre duas coleções, em blocos e com retomada."
+    )
+    parser.add_argument("--a", required=True, help="Coleção A (.txt um por linha, ou .csv).")
+    parser.add_argument("--b", required=True, help="Coleção B (.txt um por linha, ou .csv).")
+    parser.add_argument("--column", default="text", help="Coluna de texto quando a entrada é CSV.")
+    parser.add_argument("--out", required=True, help="Pasta de saída (reexecute a mesma para retomar).")
+    parser.add_argument("--mode", choices=MODES, default="sparse")
+    parser.add_argument("--threshold", type=float, default=0.7, help="Limiar do modo sparse (-1 a 1).")
+    parser.add_argument("--memory-mb", type=float, default=256, help="Orçamento de memória por bloco.")
+    parser.add_argument("--model", default=DEFAULT_MODEL, choices=list(MODELS))
+    parser.add_argument("--batch-size", type=int, default=256)
+    parser.add_argument("--cache", action="store_true", help="Usa o cache de embeddings em data/.")
+    profiling.add_arguments(parser)
+    args = parser.parse_args()
+    profiling.start("all_pairs", args)
+
+    paths = get_paths()
+    model = get_model(args.model)
+
+    t0 = time.perf_counter()
+    plan = all_pairs(
+        args.model,
+        model,
+        iter_texts(Path(args.a), args.column),
+        iter_texts(Path(args.b), args.column),
+        Path(args.out),
+        mode=args.mode,
+        threshold=args.threshold,
+        memory_budget_mb=args.memory_mb,
+        batch_size=args.batch_size,
+        cache=get_embedding_cache(paths) if args.cache else None,
+    )
+    elapsed = time.perf_counter() - t0
+
+    print(f"✅ Matriz {plan.n_rows} x {plan.n_cols} concluída em {elapsed:.1f}s")
+    print(f"Blocos: {plan.tile_rows} x {plan.tile_cols} | modo: {plan.mode}")
+    if plan.mode == "dense":
+        print(f"Arquivo: {Path(args.out) / 'scores.f16'} (float16, {plan.n_rows} x {plan.n_cols})")
+    else:
+        print(f"Arquivo: {Path(args.out) / 'pairs.csv'} (i, j, score >= {plan.threshold})")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,30 +1,40 @@
+import argparse
 import csv
+import json
 import os
+import sys
+import time
 from datetime import datetime
 from pathlib import Path
+from typing import Iterator, List, Optional, Tuple
 
 # Esconde logs do HuggingFace/Transformers (limpa o terminal)
 os.environ["TRANSFORMERS_VERBOSITY"] = "error"
 os.environ["HF_HUB_DISABLE_SYMLINKS_WARNING"] = "1"
 
-from transformers.utils import logging
-logging.set_verbosity_error()
+# permite importar o core da aplicação (backend/app)
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "app"))
+from core import MODELS, cosine_similarity, cosine_similarity_batch, get_paths, read_history
+from model_registry import get_model as registry_model
+import profiling
 
-from sentence_transformers import SentenceTransformer, util
-
-MODEL_NAME = "paraphrase-multilingual-MiniLM-L12-v2"
+MODEL_LABEL = "Multilingual (final)"
+MODEL_NAME = MODELS[MODEL_LABEL]
 BASE_DIR = Path(__file__).resolve().parents[1]
 DATA_DIR = BASE_DIR / "data"
 RESULTS_PATH = DATA_DIR / "results_multilingual.csv"
 
 
-# Carrega uma vez só
-model = SentenceTransformer(MODEL_NAME)
+def get_model():
+    # Carrega no primeiro uso (--help e history não pagam torch/transformers);
+    # depois o registro de modelos devolve a mesma instância
+    from transformers.utils import logging
+    logging.set_verbosity_error()
+    return registry_model(MODEL_LABEL)
+
 
 def similarity(text_a: str, text_b: str) -> float:
-    emb_a = model.encode(text_a, convert_to_tensor=True)
-    emb_b = model.encode(text_b, convert_to_tensor=True)
-    return float(util.cos_sim(emb_a, emb_b).item())
+    return cosine_similarity(get_model(), text_a, text_b)
 
 def save_result(text_a: str, text_b: str, score: float, path: str = RESULTS_PATH) -> None:
     now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
@@ -49,7 +59,167 @@ def classify(score: float) -> str:
         return "baixa-moderada"
     return "baixa"
 
-if __name__ == "__main__":
+RESULT_HEADER = ["timestamp", "model", "text_a", "text_b", "similarity", "percent"]
+
+
+def iter_pairs(path: Path, col_a: str, col_b: str) -> Iterator[Tuple[str, str]]:
+    # lê CSV ou JSONL em streaming (uma linha por vez, sem carregar o arquivo)
+    with open(path, "r", newline="", encoding="utf-8") as f:
+        if path.suffix.lower() in (".jsonl", ".ndjson"):
+            for line in f:
+                if line.strip():
+                    obj = json.loads(line)
+                    yield str(obj.get(col_a) or ""), str(obj.get(col_b) or "")
+        else:
+            for row in csv.DictReader(f):
+                yield (row.get(col_a) or ""), (row.get(col_b) or "")
+
+
+def iter_chunks(pairs: Iterator[Tuple[str, str]], size: int) -> Iterator[List[Tuple[str, str]]]:
+    chunk: List[Tuple[str, str]] = []
+    for pair in pairs:
+        chunk.append(pair)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def input_signature(input_path: Path) -> dict:
+    st = input_path.stat()
+    return {"input": str(input_path.resolve()), "input_size": st.st_size, "input_mtime_ns": st.st_mtime_ns}
+
+
+def load_checkpoint(path: Path, input_path: Path) -> Optional[dict]:
+    # só vale o checkpoint da mesma entrada (caminho, tamanho e mtime); senão None
+    if not path.exists():
+        return None
+    with open(path, "r", encoding="utf-8") as f:
+        ckpt = json.load(f)
+    signature = input_signature(input_path)
+    if all(ckpt.get(k) == v for k, v in signature.items()):
+        return ckpt
+    print(f"⚠️ Checkpoint {path.name} é de outra entrada (ou ela mudou); ignorando.")
+    return None
+
+
+def save_checkpoint(path: Path, ckpt: dict) -> None:
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(ckpt, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+def run_batch(args: argparse.Namespace) -> None:
+    input_path = Path(args.input)
+    output_path = Path(args.output)
+    ckpt_path = output_path.with_name(output_path.name + ".progress.json")
+
+    if args.restart:
+        ckpt_path.unlink(missing_ok=True)
+        output_path.unlink(missing_ok=True)
+    ckpt = load_checkpoint(ckpt_path, input_path)
+    out_size = output_path.stat().st_size if output_path.exists() else 0
+
+    if ckpt is not None and out_size >= ckpt["bytes"]:
+        # descarta linhas gravadas depois do último checkpoint (job interrompido)
+        os.truncate(output_path, ckpt["bytes"])
+    elif out_size:
+        # sem checkpoint desta entrada, a saída existente não é nossa: não sobrescreve
+        raise SystemExit(
+            f"ERRO: {output_path} já existe e não há checkpoint desta entrada. "
+            "Use --restart para sobrescrever ou escolha outro --output."
+        )
+    else:
+        ckpt = {**input_signature(input_path), "rows_done": 0, "bytes": 0}
+    if ckpt["rows_done"]:
+        print(f"Retomando a partir da linha {ckpt['rows_done'] + 1}.")
+
+    pairs = iter_pairs(input_path, args.col_a, args.col_b)
+    for _ in range(ckpt["rows_done"]):
+        next(pairs, None)
+
+    # com --workers > 1, os blocos são divididos entre processos (um modelo por worker)
+    pool = None
+    if args.workers > 1:
+        from parallel import ScoringPool
+        pool = ScoringPool(MODEL_LABEL, args.workers, args.threads_per_worker, args.batch_size)
+
+    def score_chunk(chunk: List[Tuple[str, str]]) -> List[float]:
+        if pool is not None:
+            return pool.score(chunk)
+        return cosine_similarity_batch(get_model(), chunk, batch_size=args.batch_size)
+
+    t0 = time.perf_counter()
+    scored = 0
+    try:
+        with open(output_path, "a", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f)
+            if ckpt["bytes"] == 0:
+                writer.writerow(RESULT_HEADER)
+
+            for chunk in iter_chunks(pairs, args.chunk_size):
+                scores = score_chunk(chunk)
+                now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+                writer.writerows(
+                    [now, MODEL_NAME, a, b, f"{score:.6f}", f"{score*100:.2f}"]
+                    for (a, b), score in zip(chunk, scores)
+                )
+                f.flush()
+                os.fsync(f.fileno())
+
+                ckpt["rows_done"] += len(chunk)
+                ckpt["bytes"] = os.fstat(f.fileno()).st_size
+                save_checkpoint(ckpt_path, ckpt)
+
+                scored += len(chunk)
+                rate = scored / max(time.perf_counter() - t0, 1e-9)
+                print(f"{ckpt['rows_done']} pares processados ({rate:.0f} pares/s)")
+    finally:
+        if pool is not None:
+            pool.close()
+
+    print(f"\n✅ Batch concluído: {ckpt['rows_done']} pares em {output_path}")
+
+
+def export_history(args: argparse.Namespace) -> None:
+    # só lê CSV: não carrega o modelo
+    df = read_history(get_paths(), limit=args.limit or None, model_label=args.model)
+    df.to_csv(args.output, index=False, encoding="utf-8")
+    print(f"✅ {len(df)} registros exportados para {args.output}")
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Comparador Semântico PT-BR (IA leve).")
+    sub = parser.add_subparsers(dest="command")
+
+    p_batch = sub.add_parser("batch", help="Pontua pares de um CSV/JSONL em lotes, com retomada.")
+    p_batch.add_argument("--input", required=True, help="Arquivo .csv ou .jsonl com os pares.")
+    p_batch.add_argument("--output", default=str(DATA_DIR / "results_batch_cli.csv"))
+    p_batch.add_argument("--col-a", default="text_a", help="Coluna/campo do texto A.")
+    p_batch.add_argument("--col-b", default="text_b", help="Coluna/campo do texto B.")
+    p_batch.add_argument("--chunk-size", type=int, default=10_000, help="Pares lidos por bloco.")
+    p_batch.add_argument("--batch-size", type=int, default=128, help="Textos por forward do modelo.")
+    p_batch.add_argument("--workers", type=int, default=1, help="Processos de encoding (1 = neste processo).")
+    p_batch.add_argument("--threads-per-worker", type=int, default=1, help="Threads do torch por worker.")
+    p_batch.add_argument("--restart", action="store_true", help="Ignora o checkpoint e recomeça.")
+    profiling.add_arguments(p_batch)
+    p_batch.set_defaults(func=run_batch)
+
+    p_hist = sub.add_parser("history", help="Exporta o histórico do app (Streamlit) para CSV.")
+    p_hist.add_argument("--output", default=str(DATA_DIR / "history_export.csv"))
+    p_hist.add_argument("--model", default=None, choices=list(MODELS), help="Filtra por modelo.")
+    p_hist.add_argument("--limit", type=int, default=0, help="Só os N registros mais recentes.")
+    profiling.add_arguments(p_hist)
+    p_hist.set_defaults(func=export_history)
+
+    return parser
+
+
+def interactive() -> None:
     print("=== Comparador Semântico PT-BR (IA leve) ===")
     a = input("Texto A:\n> ").strip()
     b = input("\nTexto B:\n> ").strip()
@@ -69,3 +239,13 @@ if __name__ == "__main__":
 
     save_result(a, b, score)
     print(f"\n✅ Salvo em {RESULTS_PATH}")
+
+
+if __name__ == "__main__":
+    args = build_parser().parse_args()
+    if args.command is None:
+        interactive()
+    else:
+        # history só lê o SQLite: não importa o torch para perfilar
+        profiling.start(f"cli_{args.command}", args, uses_torch=args.command != "history")
+        args.func(args)
@@ -0,0 +1,130 @@
+import argparse
+import csv
+import sys
+import time
+from pathlib import Path
+from typing import Iterator
+
+# permite importar o core da aplicação (backend/app)
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "app"))
+
+from ann import IVFIndex, IVFParams
+from core import MODELS, embedding_dim, get_embedding_cache, get_paths, model_key
+from embedding_store import EmbeddingStore
+from model_registry import get_model
+from search import SemanticSearcher
+import profiling
+
+DEFAULT_MODEL = "Multilingual (final)"
+
+
+def iter_texts(path: Path, column: str) -> Iterator[str]:
+    # .csv -> usa a coluna informada; qualquer outro arquivo -> um texto por linha
+    with open(path, "r", newline="", encoding="utf-8") as f:
+        if path.suffix.lower() == ".csv":
+            for row in csv.DictReader(f):
+                text = (row.get(column) or "").strip()
+                if text:
+                    yield text
+        else:
+            for line in f:
+                text = line.strip()
+                if text:
+                    yield text
+
+
+def cmd_index(args: argparse.Namespace) -> None:
+    paths = get_paths()
+    store_dir = paths.stores_dir / args.store
+
+    if (store_dir / "meta.json").exists():
+        store = EmbeddingStore.open(store_dir)
+        model = get_model(store.model_label, store.backend)
+    else:
+        model = get_model(args.model)
+        store = EmbeddingStore.create(store_dir, args.model, embedding_dim(model), key=model_key(model))
+
+    t0 = time.perf_counter()
+    added = store.add_texts(
+        model,
+        iter_texts(Path(args.input), args.column),
+        chunk_size=args.chunk_size,
+        batch_size=args.batch_size,
+        cache=get_embedding_cache(paths) if args.cache else None,
+    )
+    elapsed = time.perf_counter() - t0
+
+    print(f"✅ {added} textos adicionados em {elapsed:.1f}s")
+    print(f"Store: {store_dir} ({len(store)} textos, modelo {store.meta.model_name})")
+
+
+def cmd_build_ann(args: argparse.Namespace) -> None:
+    paths = get_paths()
+    store_dir = paths.stores_dir / args.store
+    store = EmbeddingStore.open(store_dir)
+
+    t0 = time.perf_counter()
+    index = IVFIndex.build(store, IVFParams(nlist=args.nlist, pq_m=args.pq_m))
+    index.save(store_dir / args.index)
+
+    print(f"✅ Índice IVF construído em {time.perf_counter() - t0:.1f}s")
+    print(f"Índice: {store_dir / args.index} (nlist={index.nlist}, pq_m={args.pq_m})")
+
+
+def cmd_query(args: argparse.Namespace) -> None:
+    paths = get_paths()
+    store_dir = paths.stores_dir / args.store
+    store = EmbeddingStore.open(store_dir)
+    model = get_model(store.model_label, store.backend)
+
+    # com --nprobe, usa o índice IVF (busca aproximada só nas listas mais próximas)
+    index = IVFIndex.load(store_dir / args.index, store) if args.nprobe else None
+    searcher = SemanticSearcher(store, model, index=index, nprobe=args.nprobe or 8)
+
+    t0 = time.perf_counter()
+    hits = searcher.search(args.query, k=args.k)
+    elapsed = (time.perf_counter() - t0) * 1000
+
+    print(f"Top {len(hits)} de {len(store)} textos ({elapsed:.1f} ms):\n")
+    for hit in hits:
+        print(f"{hit.rank:>3}. {hit.score * 100:6.2f}%  [id={hit.id}] {hit.text}")
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Busca semântica top-k em um corpus indexado.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_index = sub.add_parser("index", help="Adiciona textos (TXT ou CSV) a um store.")
+    p_index.add_argument("--store", required=True, help="Nome do store em data/stores/.")
+    p_index.add_argument("--input", required=True, help="Arquivo .txt (um por linha) ou .csv.")
+    p_index.add_argument("--column", default="text", help="Coluna de texto quando a entrada é CSV.")
+    p_index.add_argument("--model", default=DEFAULT_MODEL, choices=list(MODELS), help="Modelo (store novo).")
+    p_index.add_argument("--chunk-size", type=int, default=10_000)
+    p_index.add_argument("--batch-size", type=int, default=256)
+    p_index.add_argument("--cache", action="store_true", help="Usa o cache de embeddings em data/.")
+    profiling.add_arguments(p_index)
+    p_index.set_defaults(func=cmd_index)
+
+    p_query = sub.add_parser("query", help="Retorna os k textos mais similares à consulta.")
+    p_query.add_argument("--store", required=True, help="Nome do store em data/stores/.")
+    p_query.add_argument("-k", type=int, default=10)
+    p_query.add_argument("--nprobe", type=int, default=0, help="Usa o índice IVF sondando N listas (0 = busca exata).")
+    p_query.add_argument("--index", default="ivf", help="Subpasta do índice IVF dentro do store.")
+    p_query.add_argument("query", help="Texto de consulta.")
+    profiling.add_arguments(p_query)
+    p_query.set_defaults(func=cmd_query)
+
+    p_ann = sub.add_parser("build-ann", help="Constrói o índice aproximado (IVF/PQ) de um store.")
+    p_ann.add_argument("--store", required=True, help="Nome do store em data/stores/.")
+    p_ann.add_argument("--nlist", type=int, default=1024, help="Número de listas (centróides do k-means).")
+    p_ann.add_argument("--pq-m", type=int, default=0, help="Subespaços do PQ para os resíduos (0 = sem PQ).")
+    p_ann.add_argument("--index", default="ivf", help="Subpasta do índice dentro do store.")
+    p_ann.set_defaults(func=cmd_build_ann)
+
+    return parser
+
+
+if __name__ == "__main__":
+    args = build_parser().parse_args()
+    profiling.start(f"semantic_search_{args.command}", args)
+    args.func(args)
@@ -0,0 +1,92 @@
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# permite importar o core da aplicação (backend/app)
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "app"))
+from core import get_paths
+from embedding_store import EmbeddingStore
+from ann import IVFIndex, IVFParams
+from search import top_k_scores
+import profiling
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Recall@k x latência do índice IVF contra a busca exata.")
+    parser.add_argument("--store", required=True, help="Nome do store em data/stores/.")
+    parser.add_argument("--nlist", type=int, default=1024)
+    parser.add_argument("--pq-m", type=int, default=0, help="Subespaços do PQ (0 = sem PQ).")
+    parser.add_argument("--rerank", type=int, default=100)
+    parser.add_argument("--nprobe", type=int, nargs="+", default=[1, 2, 4, 8, 16, 32, 64])
+    parser.add_argument("-k", type=int, default=10)
+    parser.add_argument("--queries", type=int, default=200, help="Consultas amostradas do próprio store.")
+    parser.add_argument("--rebuild", action="store_true", help="Ignora índice salvo e reconstrói.")
+    profiling.add_arguments(parser)
+    args = parser.parse_args()
+    profiling.start("ann_report", args)
+
+    paths = get_paths()
+    store_dir = paths.stores_dir / args.store
+    index_dir = store_dir / f"ivf_{args.nlist}_pq{args.pq_m}"
+    store = EmbeddingStore.open(store_dir)
+
+    if (index_dir / "ivf.json").exists() and not args.rebuild:
+        print(f"Carregando índice: {index_dir}")
+        index = IVFIndex.load(index_dir, store)
+    else:
+        print(f"Construindo índice (nlist={args.nlist}, pq_m={args.pq_m}) para {len(store)} vetores...")
+        t0 = time.perf_counter()
+        index = IVFIndex.build(store, IVFParams(nlist=args.nlist, pq_m=args.pq_m))
+        print(f"Índice construído em {time.perf_counter() - t0:.1f}s")
+        index.save(index_dir)
+
+    # consultas = vetores do store; o próprio vetor é removido dos dois resultados
+    rng = np.random.default_rng(0)
+    query_rows = np.sort(rng.choice(len(store), size=min(args.queries, len(store)), replace=False))
+    queries = np.asarray(store.vectors[query_rows], dtype=np.float32)
+    k = args.k
+
+    exact, exact_ms = [], []
+    for row, q in zip(query_rows, queries):
+        t0 = time.perf_counter()
+        idx, _ = top_k_scores(store.vectors, q, k + 1)
+        exact_ms.append((time.perf_counter() - t0) * 1000)
+        exact.append([int(i) for i in idx if i != row][:k])
+    exact_p50 = float(np.percentile(exact_ms, 50))
+
+    rows = []
+    for nprobe in args.nprobe:
+        recalls, lat = [], []
+        for row, q, truth in zip(query_rows, queries, exact):
+            t0 = time.perf_counter()
+            idx, _ = index.search_vector(q, k + 1, nprobe=nprobe, rerank=args.rerank)
+            lat.append((time.perf_counter() - t0) * 1000)
+            found = [int(i) for i in idx if i != row][:k]
+            recalls.append(len(set(found) & set(truth)) / max(1, len(truth)))
+
+        p50 = float(np.percentile(lat, 50))
+        rows.append({
+            "nprobe": nprobe,
+            f"recall@{k}": round(float(np.mean(recalls)), 4),
+            "p50_ms": round(p50, 3),
+            "p99_ms": round(float(np.percentile(lat, 99)), 3),
+            "exact_p50_ms": round(exact_p50, 3),
+            "speedup": round(exact_p50 / p50, 1) if p50 else None,
+        })
+        print(f"nprobe={nprobe:<4} recall@{k}={rows[-1][f'recall@{k}']:.3f}  p50={p50:.2f} ms")
+
+    df = pd.DataFrame(rows)
+    out = paths.reports_dir / f"ann_recall_{args.store}_nlist{args.nlist}_pq{args.pq_m}.csv"
+    df.to_csv(out, index=False)
+
+    print("\n=== RECALL x LATÊNCIA ===\n")
+    print(df.to_string(index=False))
+    print(f"\nArquivo gerado: {out}")
+
+
+if __name__ == "__main__":
+    main()
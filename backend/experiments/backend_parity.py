@@ -0,0 +1,103 @@
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# permite importar o core da aplicação (backend/app)
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "app"))
+from core import BACKENDS, MODELS, cosine_similarity, cosine_similarity_batch, get_paths, load_model
+from batch_test import PAIRS
+import profiling
+
+
+def time_backend(model, pairs, repeats):
+    # latência por par (como no Streamlit) e tempo do lote inteiro (como no batch)
+    single = []
+    for _ in range(repeats):
+        for a, b in pairs:
+            t0 = time.perf_counter()
+            cosine_similarity(model, a, b)
+            single.append((time.perf_counter() - t0) * 1000)
+
+    batch = []
+    for _ in range(repeats):
+        t0 = time.perf_counter()
+        scores = cosine_similarity_batch(model, pairs)
+        batch.append((time.perf_counter() - t0) * 1000)
+
+    return np.array(scores), float(np.median(single)), float(np.median(batch))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Paridade e speedup dos backends de inferência.")
+    parser.add_argument("--models", nargs="+", default=list(MODELS), choices=list(MODELS))
+    parser.add_argument("--backends", nargs="+", default=list(BACKENDS), choices=list(BACKENDS))
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--tolerance", type=float, default=0.01, help="Desvio máximo aceito no score (-1..1).")
+    profiling.add_arguments(parser)
+    args = parser.parse_args()
+    profiling.start("backend_parity", args)
+
+    pairs = [(a, b) for _, a, b in PAIRS]
+    rows = []
+
+    for label in args.models:
+        reference = ref_single = ref_batch = None
+
+        # torch primeiro: é a referência de score e de tempo
+        for backend in ["torch"] + [b for b in args.backends if b != "torch"]:
+            print(f"{label} / {backend} ...")
+            try:
+                t0 = time.perf_counter()
+                model = load_model(label, backend)
+                load_s = time.perf_counter() - t0
+                cosine_similarity_batch(model, pairs[:2])  # aquecimento
+                scores, single_ms, batch_ms = time_backend(model, pairs, args.repeats)
+            except Exception as exc:
+                print(f"  indisponível: {exc}")
+                rows.append({"modelo": label, "backend": backend, "erro": str(exc).splitlines()[0]})
+                if backend == "torch":
+                    # sem a referência não há paridade a medir: outro backend no lugar
+                    # compararia o backend com ele mesmo (ou com um irmão)
+                    print(f"  {label}: referência torch indisponível, modelo pulado")
+                    break
+                continue
+
+            if backend == "torch":
+                reference, ref_single, ref_batch = scores, single_ms, batch_ms
+
+            max_dev = float(np.abs(scores - reference).max())
+            rows.append({
+                "modelo": label,
+                "backend": backend,
+                "load_s": round(load_s, 2),
+                "par_p50_ms": round(single_ms, 2),
+                "lote_ms": round(batch_ms, 2),
+                "speedup_par": round(ref_single / single_ms, 2),
+                "speedup_lote": round(ref_batch / batch_ms, 2),
+                "desvio_max": round(max_dev, 6),
+                "dentro_tolerancia": max_dev <= args.tolerance,
+                "erro": "",
+            })
+
+    df = pd.DataFrame(rows)
+    out = get_paths().reports_dir / "backend_parity.csv"
+    df.to_csv(out, index=False)
+
+    print("\n=== PARIDADE DOS BACKENDS ===\n")
+    print(df.to_string(index=False))
+
+    ok = df[df["dentro_tolerancia"].eq(True)] if "dentro_tolerancia" in df.columns else df.iloc[0:0]
+    for label, group in ok.groupby("modelo"):
+        best = group.sort_values("lote_ms").iloc[0]
+        print(f"\nMais rápido dentro da tolerância ({args.tolerance}) para {label}: "
+              f"{best['backend']} ({best['speedup_lote']}x no lote)")
+
+    print(f"\nArquivo gerado: {out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,59 @@
+import argparse
+import sys
 from pathlib import Path
 import pandas as pd
-from sentence_transformers import SentenceTransformer, util
+
+# permite importar o core da aplicação (backend/app)
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "app"))
+from core import MODELS, cosine_similarity_batch, get_embedding_cache, get_paths
+from model_registry import get_model
+from parallel import score_pairs_parallel
+import profiling
+
+# pares rotulados do experimento (categoria, texto A, texto B)
+PAIRS = [
+    ("PARAFRASE_FORTE", "O gato dorme no sofá.", "O felino está dormindo no sofá."),
+    ("PARAFRASE_FORTE", "A reunião foi cancelada por falta de participantes.", "O encontro foi cancelado porque ninguém apareceu."),
+    ("PARAFRASE_FORTE", "Preciso enviar o relatório até amanhã.", "Tenho que mandar o relatório até o dia seguinte."),
+    ("PARAFRASE_FORTE", "O sistema apresentou falhas após a atualização.", "Depois do update, o sistema começou a falhar."),
+    ("PARAFRASE_FORTE", "Ela comprou um carro novo na semana passada.", "Na semana passada, ela adquiriu um automóvel novo."),
+
+    ("PARAFRASE_MEDIA", "O aluno estudou bastante para a prova.", "O estudante se preparou muito para o exame."),
+    ("PARAFRASE_MEDIA", "O aplicativo ficou lento depois da última versão.", "Após a última versão, o app passou a ter desempenho ruim."),
+    ("PARAFRASE_MEDIA", "A empresa reduziu custos para aumentar o lucro.", "Para lucrar mais, a organização diminuiu despesas."),
+    ("PARAFRASE_MEDIA", "O servidor caiu durante o pico de acesso.", "Em horário de maior tráfego, o servidor ficou fora do ar."),
+    ("PARAFRASE_MEDIA", "O cliente solicitou mudanças no requisito.", "O usuário pediu alterações na especificação."),
+
+    ("MESMO_TEMA", "Embeddings representam textos como vetores numéricos.", "Modelos de linguagem podem transformar frases em vetores."),
+    ("MESMO_TEMA", "Cosine similarity mede o ângulo entre dois vetores.", "A similaridade do cosseno compara vetores pelo ângulo."),
+    ("MESMO_TEMA", "Transformers melhoraram tarefas de NLP nos últimos anos.", "Arquiteturas baseadas em atenção revolucionaram o processamento de linguagem."),
+    ("MESMO_TEMA", "Testes automatizados ajudam a evitar regressões.", "Escrever testes permite detectar erros após mudanças no código."),
+    ("MESMO_TEMA", "Requisitos bem definidos reduzem retrabalho.", "Uma boa especificação de requisitos diminui mudanças futuras."),
+
+    ("DIFERENTES", "Redes neurais são usadas para reconhecimento de padrões.", "O time ganhou o campeonato depois dos pênaltis."),
+    ("DIFERENTES", "A análise de requisitos é essencial em projetos de software.", "A receita leva farinha, ovos e leite."),
+    ("DIFERENTES", "O banco de dados relacional usa tabelas e chaves.", "A praia estava cheia no feriado."),
+    ("DIFERENTES", "O algoritmo de busca encontra caminhos em grafos.", "Comprei uma bicicleta para passear no parque."),
+    ("DIFERENTES", "A biblioteca pandas facilita análise de dados.", "Meu cachorro gosta de correr atrás da bola."),
+
+    ("CONTRADITORIOS", "O projeto foi concluído antes do prazo.", "O projeto atrasou e não foi entregue no prazo."),
+    ("CONTRADITORIOS", "O sistema está funcionando corretamente.", "O sistema está com problemas e falhando."),
+    ("CONTRADITORIOS", "A internet está rápida hoje.", "A internet está muito lenta hoje."),
+    ("CONTRADITORIOS", "O usuário aprovou a interface.", "O usuário rejeitou a interface."),
+    ("CONTRADITORIOS", "A aplicação ficou mais rápida após otimização.", "A aplicação ficou mais lenta após a otimização."),
+]
+
 
 def main():
-    model_name = "paraphrase-multilingual-MiniLM-L12-v2"
+    parser = argparse.ArgumentParser(description="Batch de pares rotulados com o modelo final.")
+    parser.add_argument("--workers", type=int, default=1, help="Processos de encoding (1 = neste processo).")
+    parser.add_argument("--threads-per-worker", type=int, default=1, help="Threads do torch por worker.")
+    profiling.add_arguments(parser)
+    args = parser.parse_args()
+    profiling.start("batch_test", args)
+
+    model_label = "Multilingual (final)"
+    model_name = MODELS[model_label]
 
     # base do projeto (backend/)
     BASE_DIR = Path(__file__).resolve().parents[1]
@@ -12,46 +62,26 @@ def main():
 
     output_file = DATA_DIR / "results_multilingual_batch.csv"
 
-    pairs = [
-        ("PARAFRASE_FORTE", "O gato dorme no sofá.", "O felino está dormindo no sofá."),
-        ("PARAFRASE_FORTE", "A reunião foi cancelada por falta de participantes.", "O encontro foi cancelado porque ninguém apareceu."),
-        ("PARAFRASE_FORTE", "Preciso enviar o relatório até amanhã.", "Tenho que mandar o relatório até o dia seguinte."),
-        ("PARAFRASE_FORTE", "O sistema apresentou falhas após a atualização.", "Depois do update, o sistema começou a falhar."),
-        ("PARAFRASE_FORTE", "Ela comprou um carro novo na semana passada.", "Na semana passada, ela adquiriu um automóvel novo."),
-
-        ("PARAFRASE_MEDIA", "O aluno estudou bastante para a prova.", "O estudante se preparou muito para o exame."),
-        ("PARAFRASE_MEDIA", "O aplicativo ficou lento depois da última versão.", "Após a última versão, o app passou a ter desempenho ruim."),
-        ("PARAFRASE_MEDIA", "A empresa reduziu custos para aumentar o lucro.", "Para lucrar mais, a organização diminuiu despesas."),
-        ("PARAFRASE_MEDIA", "O servidor caiu durante o pico de acesso.", "Em horário de maior tráfego, o servidor ficou fora do ar."),
-        ("PARAFRASE_MEDIA", "O cliente solicitou mudanças no requisito.", "O usuário pediu alterações na especificação."),
-
-        ("MESMO_TEMA", "Embeddings representam textos como vetores numéricos.", "Modelos de linguagem podem transformar frases em vetores."),
-        ("MESMO_TEMA", "Cosine similarity mede o ângulo entre dois vetores.", "A similaridade do cosseno compara vetores pelo ângulo."),
-        ("MESMO_TEMA", "Transformers melhoraram tarefas de NLP nos últimos anos.", "Arquiteturas baseadas em atenção revolucionaram o processamento de linguagem."),
-        ("MESMO_TEMA", "Testes automatizados ajudam a evitar regressões.", "Escrever testes permite detectar erros após mudanças no código."),
-        ("MESMO_TEMA", "Requisitos bem definidos reduzem retrabalho.", "Uma boa especificação de requisitos diminui mudanças futuras."),
-
-        ("DIFERENTES", "Redes neurais são usadas para reconhecimento de padrões.", "O time ganhou o campeonato depois dos pênaltis."),
-        ("DIFERENTES", "A análise de requisitos é essencial em projetos de software.", "A receita leva farinha, ovos e leite."),
-        ("DIFERENTES", "O banco de dados relacional usa tabelas e chaves.", "A praia estava cheia no feriado."),
-        ("DIFERENTES", "O algoritmo de busca encontra caminhos em grafos.", "Comprei uma bicicleta para passear no parque."),
-        ("DIFERENTES", "A biblioteca pandas facilita análise de dados.", "Meu cachorro gosta de correr atrás da bola."),
-
-        ("CONTRADITORIOS", "O projeto foi concluído antes do prazo.", "O projeto atrasou e não foi entregue no prazo."),
-        ("CONTRADITORIOS", "O sistema está funcionando corretamente.", "O sistema está com problemas e falhando."),
-        ("CONTRADITORIOS", "A internet está rápida hoje.", "A internet está muito lenta hoje."),
-        ("CONTRADITORIOS", "O usuário aprovou a interface.", "O usuário rejeitou a interface."),
-        ("CONTRADITORIOS", "A aplicação ficou mais rápida após otimização.", "A aplicação ficou mais lenta após a otimização."),
-    ]
-
-    print(f"Carregando modelo: {model_name}")
-    model = SentenceTransformer(model_name)
+    text_pairs = [(a, b) for _, a, b in PAIRS]
+    # os workers não usam o cache deste processo: só o caminho local consulta/mostra o cache
+    cache = None
+
+    if args.workers > 1:
+        # cada worker carrega o próprio modelo; resultados voltam na ordem dos pares
+        print(f"Pontuando com {args.workers} processos ({model_name})")
+        scores = score_pairs_parallel(model_label, text_pairs, args.workers, args.threads_per_worker)
+    else:
+        print(f"Carregando modelo: {model_name}")
+        model = get_model(model_label)
+        cache = get_embedding_cache(get_paths())
+
+        # todos os pares de uma vez (textos repetidos são codificados uma vez só);
+        # re-execuções reaproveitam o cache de embeddings em data/
+        scores = cosine_similarity_batch(model, text_pairs, cache=cache)
 
     rows = []
-    for idx, (categoria, a, b) in enumerate(pairs, start=1):
-        emb_a = model.encode(a, convert_to_tensor=True)
-        emb_b = model.encode(b, convert_to_tensor=True)
-        score = util.cos_sim(emb_a, emb_b).item() * 100
+    for idx, ((categoria, a, b), cos) in enumerate(zip(PAIRS, scores), start=1):
+        score = cos * 100
 
         rows.append({
             "id": idx,
@@ -71,6 +101,8 @@ def main():
     print(f"Média: {df['similaridade_percent'].mean():.2f}%")
     print(f"Mínimo: {df['similaridade_percent'].min():.2f}%")
     print(f"Máximo: {df['similaridade_percent'].max():.2f}%")
+    if cache is not None:
+        print(f"Cache de embeddings: {cache.stats()}")
 
 if __name__ == "__main__":
     main()
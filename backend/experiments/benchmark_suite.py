@@ -0,0 +1,270 @@
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+
+# permite importar o core da aplicação (backend/app)
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "app"))
+import core
+from core import MODELS, cosine_similarity, encode_texts, get_paths, load_model
+from examples import EXAMPLES
+from history_store import HistoryStore, HistoryWriter
+from batch_test import PAIRS
+import profiling
+
+# Suíte de desempenho dos caminhos de inferência e do histórico:
+#   run     -> mede e grava um JSON em reports/benchmarks/ (opcionalmente compara com --baseline)
+#   compare -> compara dois JSONs e falha (código 1) se alguma métrica piorou além do limite
+# Cada métrica guarda valor, unidade e direção ("lower"/"higher" é melhor), então o
+# compare não depende de saber o que cada nome significa.
+
+DEFAULT_THRESHOLD = 0.10
+
+
+def _texts():
+    return list(dict.fromkeys(t for _, a, b in EXAMPLES + PAIRS for t in (a, b)))
+
+
+def _percentiles(samples_ms, prefix, out):
+    arr = np.asarray(samples_ms, dtype=float)
+    for q in (50, 90, 99):
+        out[f"{prefix}_p{q}_ms"] = _metric(float(np.percentile(arr, q)), "ms", "lower")
+
+
+def _metric(value, unit, better):
+    return {"value": round(value, 6), "unit": unit, "better": better}
+
+
+def bench_cold_load(model_label, repeats):
+    # processo novo por repetição: inclui import de torch/transformers e leitura dos pesos
+    code = (
+        "import sys, time; t0 = time.perf_counter(); sys.path.insert(0, {app!r}); "
+        "from core import load_model; load_model({label!r}); print(time.perf_counter() - t0)"
+    ).format(app=str(Path(core.__file__).resolve().parent), label=model_label)
+    times = []
+    for _ in range(repeats):
+        proc = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True)
+        if proc.returncode != 0:
+            raise RuntimeError(proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else "falhou")
+        times.append(float(proc.stdout.strip().splitlines()[-1]))
+    return _metric(float(np.median(times)), "s", "lower")
+
+
+def bench_pair_latency(model, pairs, repeats):
+    # sem cache de embeddings: mede o forward, não o acerto de cache
+    samples = []
+    for _ in range(repeats):
+        for _, a, b in pairs:
+            t0 = time.perf_counter()
+            cosine_similarity(model, a, b)
+            samples.append((time.perf_counter() - t0) * 1000)
+    out = {}
+    _percentiles(samples, "pair_latency", out)
+    return out
+
+
+def bench_throughput(model, texts, batch_sizes, threads, repeats):
+    import torch
+
+    out = {}
+    previous = torch.get_num_threads()
+    try:
+        for n_threads in threads:
+            torch.set_num_threads(n_threads)
+            for bs in batch_sizes:
+                encode_texts(model, texts[:bs], batch_size=bs, token_budget=None)  # aquecimento
+                secs = []
+                for _ in range(repeats):
+                    t0 = time.perf_counter()
+                    encode_texts(model, texts, batch_size=bs, token_budget=None)
+                    secs.append(time.perf_counter() - t0)
+                out[f"encode_throughput_bs{bs}_t{n_threads}"] = _metric(
+                    len(texts) / float(np.median(secs)), "texts/s", "higher"
+                )
+    finally:
+        torch.set_num_threads(previous)
+    return out
+
+
+def _history_rows(n):
+    texts = _texts()
+    now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    rows = []
+    for i in range(n):
+        score = (i % 200) / 100 - 1
+        rows.append([now, "bench", "bench-model", texts[i % len(texts)], texts[(i * 7) % len(texts)],
+                     score, score * 100, core.classify(score)])
+    return rows
+
+
+def bench_history(n_rows, repeats):
+    out = {}
+    rows = _history_rows(n_rows)
+    with tempfile.TemporaryDirectory(prefix="bench_history_") as tmp:
+        store = HistoryStore(Path(tmp) / "history.sqlite")
+
+        t0 = time.perf_counter()
+        store.append_many(rows)
+        out["history_bulk_insert"] = _metric(n_rows / (time.perf_counter() - t0), "rows/s", "higher")
+
+        # writer em segundo plano: custo do put() na thread da página e vazão até o SQLite;
+        # a fila comporta todas as linhas para que nenhuma seja descartada (e contada como escrita)
+        writer = HistoryWriter(store, max_queue=n_rows + 1)
+        puts = []
+        t0 = time.perf_counter()
+        for row in rows:
+            t1 = time.perf_counter()
+            writer.put(row)
+            puts.append((time.perf_counter() - t1) * 1e6)
+        if not writer.flush(timeout=120):
+            raise RuntimeError("HistoryWriter não esvaziou a fila em 120s")
+        elapsed = time.perf_counter() - t0
+        if writer.dropped_rows:
+            raise RuntimeError(f"HistoryWriter descartou {writer.dropped_rows} de {n_rows} linhas")
+        out["history_writer_rows"] = _metric(writer.rows_written / elapsed, "rows/s", "higher")
+        out["history_put_p50_us"] = _metric(float(np.percentile(puts, 50)), "us", "lower")
+        out["history_put_p99_us"] = _metric(float(np.percentile(puts, 99)), "us", "lower")
+        writer.close()
+
+        for name, fn in (
+            ("history_query_page", lambda: store.query(limit=100)),
+            ("history_query_filtered", lambda: store.query(limit=100, classificacao="alta", min_similarity=0.8)),
+            ("history_aggregates", lambda: store.aggregates(group_by="classificacao")),
+        ):
+            samples = []
+            for _ in range(repeats):
+                t0 = time.perf_counter()
+                fn()
+                samples.append((time.perf_counter() - t0) * 1000)
+            out[f"{name}_p50_ms"] = _metric(float(np.percentile(samples, 50)), "ms", "lower")
+        store.close()
+    return out
+
+
+def _versions():
+    out = {"python": platform.python_version(), "numpy": np.__version__}
+    for name in ("torch", "transformers", "sentence_transformers", "pandas"):
+        try:
+            out[name] = __import__(name).__version__
+        except ImportError:
+            out[name] = None
+    return out
+
+
+def run(args):
+    texts = _texts()
+    texts = (texts * (args.texts // len(texts) + 1))[:args.texts]
+    pairs = PAIRS[:args.pairs]
+    threads = sorted(set(args.threads))
+
+    metrics = {}
+    for label in args.models:
+        print(f"== {label} ({MODELS[label]})")
+        metrics[f"{label}/cold_load_s"] = bench_cold_load(label, args.load_repeats)
+        print(f"   carga a frio: {metrics[f'{label}/cold_load_s']['value']:.2f}s")
+
+        model = load_model(label)
+        cosine_similarity(model, *PAIRS[0][1:])  # aquecimento
+        results = bench_pair_latency(model, pairs, args.repeats)
+        results.update(bench_throughput(model, texts, args.batch_sizes, threads, args.repeats))
+        for name, m in results.items():
+            metrics[f"{label}/{name}"] = m
+            print(f"   {name}: {m['value']:.2f} {m['unit']}")
+        del model
+
+    print("== histórico")
+    for name, m in bench_history(args.history_rows, args.repeats).items():
+        metrics[f"history/{name}"] = m
+        print(f"   {name}: {m['value']:.2f} {m['unit']}")
+
+    report = {
+        "meta": {
+            "created": datetime.now().isoformat(timespec="seconds"),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "versions": _versions(),
+            "models": {label: MODELS[label] for label in args.models},
+            "params": {
+                "texts": len(texts), "pairs": len(pairs), "batch_sizes": args.batch_sizes,
+                "threads": threads, "repeats": args.repeats, "history_rows": args.history_rows,
+            },
+        },
+        "metrics": metrics,
+    }
+
+    out = Path(args.output) if args.output else (
+        get_paths().reports_dir / "benchmarks" / f"bench_{datetime.now():%Y%m%d_%H%M%S}.json"
+    )
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(json.dumps(report, indent=2, ensure_ascii=False), encoding="utf-8")
+    print(f"\nArquivo gerado: {out}")
+
+    if args.baseline:
+        return compare(json.loads(Path(args.baseline).read_text(encoding="utf-8")), report, args.threshold)
+    return 0
+
+
+def compare(baseline, current, threshold):
+    # variação relativa no sentido "pior": positivo = regressão
+    regressions = 0
+    base_metrics, cur_metrics = baseline["metrics"], current["metrics"]
+    print(f"\n=== COMPARAÇÃO (limite de regressão: {threshold:.0%}) ===\n")
+    for name in sorted(set(base_metrics) | set(cur_metrics)):
+        base, cur = base_metrics.get(name), cur_metrics.get(name)
+        if base is None or cur is None:
+            print(f"  ?      {name}: só no {'atual' if base is None else 'baseline'}")
+            continue
+        b, c = base["value"], cur["value"]
+        if not b:
+            continue
+        change = (c - b) / b if cur["better"] == "lower" else (b - c) / b
+        flag = "PIOR  " if change > threshold else ("melhor" if change < -threshold else "ok    ")
+        regressions += change > threshold
+        print(f"  {flag} {name}: {b:.4g} -> {c:.4g} {cur['unit']} ({change:+.1%})")
+    print(f"\n{regressions} regressão(ões) acima de {threshold:.0%}.")
+    return 1 if regressions else 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Suíte de desempenho (latência, vazão, carga e histórico).")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_run = sub.add_parser("run", help="Executa os benchmarks e grava o JSON.")
+    p_run.add_argument("--models", nargs="+", default=list(MODELS), choices=list(MODELS))
+    p_run.add_argument("--output", default=None, help="JSON de saída (padrão: reports/benchmarks/bench_<data>.json).")
+    p_run.add_argument("--baseline", default=None, help="JSON de referência para comparar ao final.")
+    p_run.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD)
+    p_run.add_argument("--pairs", type=int, default=len(PAIRS), help="Pares usados na latência por par.")
+    p_run.add_argument("--texts", type=int, default=512, help="Textos por medição de vazão.")
+    p_run.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 8, 32, 64])
+    p_run.add_argument("--threads", type=int, nargs="+", default=[1, os.cpu_count() or 1])
+    p_run.add_argument("--repeats", type=int, default=3)
+    p_run.add_argument("--load-repeats", type=int, default=1)
+    p_run.add_argument("--history-rows", type=int, default=20000)
+    profiling.add_arguments(p_run)
+
+    p_cmp = sub.add_parser("compare", help="Compara um resultado com o baseline.")
+    p_cmp.add_argument("baseline")
+    p_cmp.add_argument("current")
+    p_cmp.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                       help="Piora relativa tolerada (0.10 = 10%%).")
+
+    args = parser.parse_args()
+    if args.command == "run":
+        profiling.start("benchmark_suite", args)
+        raise SystemExit(run(args))
+    baseline = json.loads(Path(args.baseline).read_text(encoding="utf-8"))
+    current = json.loads(Path(args.current).read_text(encoding="utf-8"))
+    raise SystemExit(compare(baseline, current, args.threshold))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# permite importar o core da aplicação (backend/app)
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "app"))
+from core import DEFAULT_TOKEN_BUDGET, MODELS, encode_texts, get_paths, load_model, token_lengths
+from examples import EXAMPLES
+from batch_test import PAIRS
+import profiling
+
+
+def build_texts(n_long: int, long_words: int, seed: int):
+    # frases curtas dos exemplos + parágrafos sintéticos longos montados com elas
+    short = list(dict.fromkeys(t for _, a, b in EXAMPLES + PAIRS for t in (a, b)))
+    rng = random.Random(seed)
+    long_texts = []
+    for _ in range(n_long):
+        words = []
+        while len(words) < long_words:
+            words.extend(rng.choice(short).split())
+        long_texts.append(" ".join(words[:rng.randint(long_words // 4, long_words)]))
+    texts = short + long_texts
+    rng.shuffle(texts)
+    return texts
+
+
+def time_encode(model, texts, batch_size, token_budget, repeats):
+    times = []
+    for _ in range(repeats):
+        t0 = time.perf_counter()
+        emb = encode_texts(model, texts, batch_size=batch_size, token_budget=token_budget)
+        times.append(time.perf_counter() - t0)
+    return emb, float(np.median(times))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Lotes fixos vs. lotes por orçamento de tokens.")
+    parser.add_argument("--model", default="Multilingual (final)", choices=list(MODELS))
+    parser.add_argument("--long", type=int, default=200, help="Quantidade de textos longos sintéticos.")
+    parser.add_argument("--long-words", type=int, default=300, help="Palavras máximas por texto longo.")
+    parser.add_argument("--copies", type=int, default=4, help="Repetições do conjunto (mais volume).")
+    parser.add_argument("--batch-size", type=int, default=64)
+    parser.add_argument("--budgets", type=int, nargs="+", default=[DEFAULT_TOKEN_BUDGET // 2, DEFAULT_TOKEN_BUDGET, DEFAULT_TOKEN_BUDGET * 2])
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=42)
+    profiling.add_arguments(parser)
+    args = parser.parse_args()
+    profiling.start("bucketing_benchmark", args)
+
+    # cópias com um sufixo distinto: sem isso a deduplicação esconderia o volume
+    base = build_texts(args.long, args.long_words, args.seed)
+    texts = [f"{t} ({c})" if c else t for c in range(args.copies) for t in base]
+
+    model = load_model(args.model)
+    lengths = token_lengths(model, texts)
+    print(f"{len(texts)} textos | tokens: mediana {int(np.median(lengths))}, "
+          f"máx {int(lengths.max())}, total {int(lengths.sum())}")
+
+    encode_texts(model, texts[:32], batch_size=args.batch_size)  # aquecimento
+
+    reference, ref_s = time_encode(model, texts, args.batch_size, None, args.repeats)
+    rows = [{"modo": f"fixo ({args.batch_size}/lote)", "tempo_s": ref_s, "textos_s": len(texts) / ref_s,
+             "speedup": 1.0, "desvio_max": 0.0}]
+    for budget in args.budgets:
+        emb, secs = time_encode(model, texts, args.batch_size, budget, args.repeats)
+        rows.append({
+            "modo": f"orçamento {budget} tokens",
+            "tempo_s": secs,
+            "textos_s": len(texts) / secs,
+            "speedup": ref_s / secs,
+            "desvio_max": float(np.abs(emb - reference).max()),
+        })
+
+    df = pd.DataFrame(rows).round(4)
+    out = get_paths().reports_dir / "bucketing_benchmark.csv"
+    df.to_csv(out, index=False)
+
+    print("\n=== LOTES POR ORÇAMENTO DE TOKENS ===\n")
+    print(df.to_string(index=False))
+    print(f"\nArquivo gerado: {out}")
+
+
+if __name__ == "__main__":
+    main()
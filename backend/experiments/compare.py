@@ -1,11 +1,16 @@
-from sentence_transformers import SentenceTransformer, util
+import sys
+from pathlib import Path
 
-model = SentenceTransformer("all-MiniLM-L6-v2")
+# permite importar o core da aplicação (backend/app)
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "app"))
+from core import cosine_similarity
+from model_registry import get_model
+
+# modelo carregado no primeiro uso pelo registro do processo
+MODEL_LABEL = "Baseline (comparação)"
 
 def similarity(text_a: str, text_b: str) -> float:
-    emb_a = model.encode(text_a, convert_to_tensor=True)
-    emb_b = model.encode(text_b, convert_to_tensor=True)
-    return float(util.cos_sim(emb_a, emb_b).item())
+    return cosine_similarity(get_model(MODEL_LABEL), text_a, text_b)
 
 if __name__ == "__main__":
     print("=== Comparador Semântico (IA leve) ===")
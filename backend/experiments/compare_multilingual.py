@@ -1,17 +1,21 @@
 import csv
+import sys
 from datetime import datetime
+from pathlib import Path
+
+# permite importar o core da aplicação (backend/app)
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "app"))
+from core import cosine_similarity
+from model_registry import get_model
 from transformers.utils import logging
 logging.set_verbosity_error()
-from sentence_transformers import SentenceTransformer, util
 
 
-# Modelo melhor para o PT-BR
-model = SentenceTransformer("paraphrase-multilingual-MiniLM-L12-v2")
+# Modelo melhor para o PT-BR (carregado no primeiro uso pelo registro do processo)
+MODEL_LABEL = "Multilingual (final)"
 
 def similarity(text_a: str, text_b: str) -> float:
-    emb_a = model.encode(text_a, convert_to_tensor=True)
-    emb_b = model.encode(text_b, convert_to_tensor=True)
-    return float(util.cos_sim(emb_a, emb_b).item())
+    return cosine_similarity(get_model(MODEL_LABEL), text_a, text_b)
 
 def save_result(text_a, text_b, score, path="results_multilingual.csv"):
     now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
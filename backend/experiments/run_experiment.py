@@ -0,0 +1,211 @@
+import argparse
+import json
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import matplotlib
+matplotlib.use("Agg")
+import matplotlib.pyplot as plt
+
+# permite importar o core da aplicação (backend/app)
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "app"))
+from core import MODELS, cache_key, classify, encode_texts, get_embedding_cache, get_paths, normalize_text
+from model_registry import get_model
+from batch_test import PAIRS
+import profiling
+
+# Experimento multi-modelo em uma passada (substitui rodar compare_csv.py,
+# compare_multilingual.py, batch_test.py e analyze_results*.py à mão):
+#   1) lê os pares rotulados (CSV categoria,texto_a,texto_b; padrão: PAIRS do batch_test)
+#   2) para cada modelo, consulta o cache de embeddings em data/ e só carrega o
+#      modelo se faltar algum texto; cada texto distinto é codificado uma vez
+#   3) pontua todos os pares e grava em reports/experiments/<nome>/:
+#        results.csv          um par por linha e modelo (similaridade e classe)
+#        summary.csv          n, média, desvio, mínimo e máximo por modelo e categoria
+#        classes.csv          contagem de classes por modelo
+#        boxplot_categoria.png, comparison_mean.png, distribution.png
+#        run.json             textos novos x do cache e tempos por modelo
+# Rodar de novo com um modelo a mais (ou pares a mais) só codifica o que é novo.
+
+ALL_CATEGORIES = "TODAS"
+
+
+def load_dataset(path):
+    if path is None:
+        return pd.DataFrame(PAIRS, columns=["categoria", "texto_a", "texto_b"])
+    df = pd.read_csv(path)
+    missing = {"categoria", "texto_a", "texto_b"} - set(df.columns)
+    if missing:
+        raise SystemExit(f"Colunas ausentes em {path}: {', '.join(sorted(missing))}")
+    return df[["categoria", "texto_a", "texto_b"]].dropna().astype(str).reset_index(drop=True)
+
+
+def embed_unique(label, texts, cache, batch_size):
+    # consulta o cache antes de carregar o modelo: tudo em cache = nenhum torch/forward
+    t0 = time.perf_counter()
+    found = cache.get_many(cache_key(label), texts) if cache is not None else [None] * len(texts)
+    missing = [i for i, vec in enumerate(found) if vec is None]
+    stats = {"texts": len(texts), "cached": len(texts) - len(missing), "encoded": len(missing)}
+
+    if missing:
+        t1 = time.perf_counter()
+        model = get_model(label)
+        stats["load_s"] = round(time.perf_counter() - t1, 3)
+        t1 = time.perf_counter()
+        todo = [texts[i] for i in missing]
+        fresh = encode_texts(model, todo, batch_size=batch_size)
+        stats["encode_s"] = round(time.perf_counter() - t1, 3)
+        if cache is not None:
+            cache.put_many(cache_key(label), todo, fresh)
+        for j, i in enumerate(missing):
+            found[i] = fresh[j]
+
+    stats["total_s"] = round(time.perf_counter() - t0, 3)
+    return np.vstack(found), stats
+
+
+def score_models(df, labels, cache, batch_size):
+    # índices dos textos normalizados: a mesma frase em vários pares vira um embedding só
+    normalized_a = [normalize_text(t) for t in df["texto_a"]]
+    normalized_b = [normalize_text(t) for t in df["texto_b"]]
+    unique = list(dict.fromkeys(normalized_a + normalized_b))
+    position = {t: i for i, t in enumerate(unique)}
+    idx_a = np.array([position[t] for t in normalized_a], dtype=np.int64)
+    idx_b = np.array([position[t] for t in normalized_b], dtype=np.int64)
+
+    frames, run_stats = [], {}
+    for label in labels:
+        emb, stats = embed_unique(label, unique, cache, batch_size)
+        # vetores normalizados: cosseno = produto interno linha a linha
+        scores = np.einsum("ij,ij->i", emb[idx_a], emb[idx_b])
+        run_stats[label] = stats
+        print(f"{label}: {stats['encoded']} textos codificados, {stats['cached']} do cache ({stats['total_s']:.2f}s)")
+
+        frame = df.copy()
+        frame.insert(0, "id", np.arange(1, len(df) + 1))
+        frame["modelo"] = label
+        frame["similaridade"] = np.round(scores.astype(float), 6)
+        frame["similaridade_percent"] = np.round(scores.astype(float) * 100, 2)
+        frame["classificacao"] = [classify(float(s)) for s in scores]
+        frames.append(frame)
+    return pd.concat(frames, ignore_index=True), run_stats
+
+
+def summarize(results, labels):
+    categories = list(dict.fromkeys(results["categoria"]))
+    rows = []
+    for label in labels:
+        sub = results[results["modelo"] == label]
+        groups = [(c, sub.loc[sub["categoria"] == c, "similaridade_percent"]) for c in categories]
+        for categoria, values in groups + [(ALL_CATEGORIES, sub["similaridade_percent"])]:
+            rows.append({
+                "modelo": label,
+                "categoria": categoria,
+                "n": len(values),
+                "Média": round(values.mean(), 2),
+                "Desvio": round(values.std(), 2),
+                "Mínimo": values.min(),
+                "Máximo": values.max(),
+            })
+
+    classes = results.pivot_table(index="modelo", columns="classificacao", values="id",
+                                  aggfunc="count", fill_value=0, sort=False)
+    return pd.DataFrame(rows), classes.reindex(labels).reset_index()
+
+
+def plot(results, labels, out_dir):
+    categories = list(dict.fromkeys(results["categoria"]))
+    width = 0.8 / len(labels)
+    ticks = np.arange(len(categories))
+
+    # boxplot por categoria, uma caixa por modelo
+    fig, ax = plt.subplots(figsize=(max(6, 1.6 * len(categories)), 4.5))
+    for k, label in enumerate(labels):
+        sub = results[results["modelo"] == label]
+        data = [sub.loc[sub["categoria"] == c, "similaridade_percent"] for c in categories]
+        box = ax.boxplot(data, positions=ticks + (k - (len(labels) - 1) / 2) * width,
+                         widths=width * 0.9, patch_artist=True, medianprops={"color": "black"})
+        for patch in box["boxes"]:
+            patch.set_facecolor(f"C{k}")
+            patch.set_alpha(0.6)
+        ax.plot([], [], color=f"C{k}", linewidth=8, alpha=0.6, label=label)
+    ax.set_xticks(ticks, categories, rotation=20)
+    ax.set_title("Distribuição por Categoria e Modelo")
+    ax.set_ylabel("Similaridade (%)")
+    ax.legend()
+    fig.savefig(out_dir / "boxplot_categoria.png", dpi=300, bbox_inches="tight")
+    plt.close(fig)
+
+    # média por categoria
+    means = results.groupby(["categoria", "modelo"], sort=False)["similaridade_percent"].mean().unstack()
+    fig, ax = plt.subplots(figsize=(max(6, 1.6 * len(categories)), 4.5))
+    for k, label in enumerate(labels):
+        ax.bar(ticks + (k - (len(labels) - 1) / 2) * width, means.loc[categories, label], width, label=label)
+    ax.set_xticks(ticks, categories, rotation=20)
+    ax.set_title("Similaridade Média por Categoria")
+    ax.set_ylabel("Similaridade (%)")
+    ax.legend()
+    fig.savefig(out_dir / "comparison_mean.png", dpi=300, bbox_inches="tight")
+    plt.close(fig)
+
+    # histograma sobreposto
+    fig, ax = plt.subplots()
+    bins = np.linspace(results["similaridade_percent"].min(), results["similaridade_percent"].max(), 21)
+    for label in labels:
+        ax.hist(results.loc[results["modelo"] == label, "similaridade_percent"], bins=bins, alpha=0.6, label=label)
+    ax.set_title("Distribuição das Similaridades")
+    ax.set_xlabel("Similaridade (%)")
+    ax.set_ylabel("Frequência")
+    ax.legend()
+    fig.savefig(out_dir / "distribution.png", dpi=300, bbox_inches="tight")
+    plt.close(fig)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Experimento multi-modelo com cache de embeddings.")
+    parser.add_argument("--dataset", default=None,
+                        help="CSV com categoria,texto_a,texto_b (padrão: pares rotulados do batch_test).")
+    parser.add_argument("--models", nargs="+", default=list(MODELS), choices=list(MODELS))
+    parser.add_argument("--name", default=None, help="Subpasta em reports/experiments/ (padrão: nome do dataset).")
+    parser.add_argument("--batch-size", type=int, default=64)
+    parser.add_argument("--no-cache", action="store_true", help="Ignora o cache de embeddings em data/.")
+    profiling.add_arguments(parser)
+    args = parser.parse_args()
+    profiling.start("run_experiment", args)
+
+    paths = get_paths()
+    df = load_dataset(args.dataset)
+    name = args.name or (Path(args.dataset).stem if args.dataset else "batch_test")
+    out_dir = paths.reports_dir / "experiments" / name
+    out_dir.mkdir(parents=True, exist_ok=True)
+    cache = None if args.no_cache else get_embedding_cache(paths)
+
+    print(f"{len(df)} pares, {len(args.models)} modelo(s)")
+    results, run_stats = score_models(df, args.models, cache, args.batch_size)
+    summary, classes = summarize(results, args.models)
+
+    results.to_csv(out_dir / "results.csv", index=False, encoding="utf-8")
+    summary.to_csv(out_dir / "summary.csv", index=False, encoding="utf-8")
+    classes.to_csv(out_dir / "classes.csv", index=False, encoding="utf-8")
+    plot(results, args.models, out_dir)
+    (out_dir / "run.json").write_text(json.dumps({
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "dataset": args.dataset or "batch_test.PAIRS",
+        "pairs": len(df),
+        "models": {label: {"name": MODELS[label], **run_stats[label]} for label in args.models},
+    }, indent=2, ensure_ascii=False), encoding="utf-8")
+
+    print("\n=== RESUMO ===\n")
+    print(summary.to_string(index=False))
+    print(f"\nArquivos gerados em {out_dir}:")
+    for file in ("results.csv", "summary.csv", "classes.csv", "boxplot_categoria.png",
+                 "comparison_mean.png", "distribution.png", "run.json"):
+        print(f"- {file}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+import argparse
+import http.client
+import json
+import random
+import sys
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+
+# cliente local para o servidor de app/server.py (nenhuma chamada externa)
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+from batch_test import PAIRS
+
+
+def worker(host, port, n_requests, latencies, errors, lock):
+    conn = http.client.HTTPConnection(host, port, timeout=60)
+    rng = random.Random()
+    for _ in range(n_requests):
+        _, a, b = rng.choice(PAIRS)
+        body = json.dumps({"text_a": a, "text_b": b})
+        t0 = time.perf_counter()
+        try:
+            conn.request("POST", "/similarity", body, {"Content-Type": "application/json"})
+            resp = conn.getresponse()
+            resp.read()
+            ok = resp.status == 200
+        except (OSError, http.client.HTTPException):
+            ok = False
+            conn.close()
+            conn = http.client.HTTPConnection(host, port, timeout=60)
+        ms = (time.perf_counter() - t0) * 1000
+        with lock:
+            if ok:
+                latencies.append(ms)
+            else:
+                errors.append(ms)
+    conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Teste de carga do servidor HTTP local.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--requests", type=int, default=50, help="Pedidos por cliente.")
+    args = parser.parse_args()
+
+    latencies, errors, lock = [], [], threading.Lock()
+    threads = [
+        threading.Thread(target=worker, args=(args.host, args.port, args.requests, latencies, errors, lock))
+        for _ in range(args.concurrency)
+    ]
+
+    t0 = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - t0
+
+    print(f"Pedidos: {len(latencies)} ok, {len(errors)} com erro, em {elapsed:.1f}s")
+    if latencies:
+        arr = np.array(latencies)
+        print(f"Vazão: {len(latencies) / elapsed:.1f} req/s")
+        print(f"p50: {np.percentile(arr, 50):.1f} ms | p95: {np.percentile(arr, 95):.1f} ms | "
+              f"p99: {np.percentile(arr, 99):.1f} ms")
+
+    conn = http.client.HTTPConnection(args.host, args.port, timeout=10)
+    conn.request("GET", "/health")
+    print("\n/health:", json.dumps(json.loads(conn.getresponse().read()), ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
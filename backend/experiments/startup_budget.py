@@ -0,0 +1,90 @@
+import argparse
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+# Mede o tempo de partida a frio (processo novo) dos caminhos que não fazem
+# inferência e confere que torch/transformers não foram importados por eles.
+BASE_DIR = Path(__file__).resolve().parents[1]
+APP_DIR = BASE_DIR / "app"
+CLI_DIR = BASE_DIR / "cli"
+
+HEAVY = ("torch", "transformers", "sentence_transformers")
+
+# roda o import num processo novo e lista os módulos pesados que vieram junto
+_IMPORT_CHECK = (
+    "import sys; sys.path.insert(0, {app!r}); {stmt}; "
+    "print(','.join(m for m in {heavy!r} if m in sys.modules))"
+)
+
+CASES = {
+    "import core": ("import", "import core"),
+    # matplotlib/streamlit ficam de fora: são custo da própria página, não do core
+    "core nas páginas Histórico/Avaliação": (
+        "import", "import pandas; from core import get_paths, reports_available, load_batch, read_history"
+    ),
+    "cli/main.py --help": ("cli", [str(CLI_DIR / "main.py"), "--help"]),
+    "cli/main.py history": ("cli", [str(CLI_DIR / "main.py"), "history", "--output", "{tmp}"]),
+    "cli/semantic_search.py --help": ("cli", [str(CLI_DIR / "semantic_search.py"), "--help"]),
+}
+
+
+def run_case(kind, spec, tmp, env):
+    if kind == "import":
+        code = _IMPORT_CHECK.format(app=str(APP_DIR), stmt=spec, heavy=HEAVY)
+        cmd = [sys.executable, "-c", code]
+    else:
+        cmd = [sys.executable] + [s.format(tmp=tmp) for s in spec]
+
+    t0 = time.perf_counter()
+    proc = subprocess.run(cmd, capture_output=True, text=True, env=env)
+    elapsed = time.perf_counter() - t0
+    if proc.returncode != 0:
+        raise RuntimeError(proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else "falhou")
+    heavy = proc.stdout.strip().splitlines()[-1] if kind == "import" and proc.stdout.strip() else ""
+    return elapsed, heavy
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Orçamento de tempo de partida a frio.")
+    parser.add_argument("--budget", type=float, default=1.0, help="Segundos máximos por caso (mediana).")
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    # pasta de dados temporária (STS_DATA_DIR): o history não migra nem grava em data/
+    data_dir = Path(tempfile.mkdtemp(prefix="startup_budget_"))
+    if (BASE_DIR / "data" / "history.csv").exists():
+        shutil.copy(BASE_DIR / "data" / "history.csv", data_dir / "history.csv")
+    env = {**os.environ, "STS_DATA_DIR": str(data_dir)}
+    tmp = str(data_dir / "history_export.csv")
+    failed = False
+
+    print(f"Orçamento: {args.budget:.2f}s (mediana de {args.repeats} execuções)\n")
+    for name, (kind, spec) in CASES.items():
+        try:
+            runs = [run_case(kind, spec, tmp, env) for _ in range(args.repeats)]
+        except RuntimeError as exc:
+            print(f"  ERRO  {name}: {exc}")
+            failed = True
+            continue
+
+        median = float(np.median([t for t, _ in runs]))
+        heavy = runs[-1][1]
+        ok = median <= args.budget and not heavy
+        failed |= not ok
+        note = f"  (importou {heavy})" if heavy else ""
+        print(f"  {'ok   ' if ok else 'FALHA'} {name}: {median:.2f}s{note}")
+
+    shutil.rmtree(data_dir, ignore_errors=True)
+    if failed:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()